@@ -0,0 +1,91 @@
+"""
+基准测试公共工具
+
+直接按文件路径加载 core/packer.py（它不依赖 astrbot / jmcomic）或 core 下的
+单个模块，并提供样本本子生成与“子进程隔离运行 + 峰值内存”测量。
+"""
+
+import importlib
+import importlib.util
+import logging
+import multiprocessing
+import resource
+import sys
+import time
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_packer():
+    """加载 core/packer.py 模块"""
+    spec = importlib.util.spec_from_file_location(
+        "jm_cosmos_packer", ROOT / "core" / "packer.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_core_module(name: str):
+    """
+    加载 core 下的单个模块（不执行 core/__init__.py，因而不需要 jmcomic）
+
+    未安装 AstrBot 时以标准库 logging 提供 astrbot.api.logger。
+    """
+    if importlib.util.find_spec("astrbot") is None:
+        api = types.ModuleType("astrbot.api")
+        api.logger = logging.getLogger("jm_cosmos_bench")
+        sys.modules["astrbot"] = types.ModuleType("astrbot")
+        sys.modules["astrbot.api"] = api
+
+    package = "jm_cosmos_core"
+    if package not in sys.modules:
+        module = types.ModuleType(package)
+        module.__path__ = [str(ROOT / "core")]
+        sys.modules[package] = module
+    return importlib.import_module(f"{package}.{name}")
+
+
+def make_sample_album(
+    target: Path,
+    chapters: int,
+    pages: int,
+    size: tuple[int, int] = (1000, 1400),
+    suffix: str = ".jpg",
+) -> Path:
+    """生成 Bd/Aid/Pindex 结构的样本本子（带噪点，避免图片被过度压缩）"""
+    from PIL import Image
+
+    noise = Image.effect_noise(size, 64).convert("RGB")
+    for chapter in range(1, chapters + 1):
+        chapter_dir = target / str(chapter)
+        chapter_dir.mkdir(parents=True, exist_ok=True)
+        for page in range(1, pages + 1):
+            path = chapter_dir / f"{page:05d}{suffix}"
+            if not path.exists():
+                noise.save(path, quality=85)
+    return target
+
+
+def _child(func, args, conn) -> None:
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    # Linux 上 ru_maxrss 单位为 KB
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    conn.send((elapsed, peak_mb, result))
+    conn.close()
+
+
+def run_isolated(func, *args) -> tuple[float, float, object]:
+    """在全新子进程中运行 func，返回 (耗时秒, 峰值 RSS MB, 返回值)"""
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(func, args, child))
+    proc.start()
+    elapsed, peak_mb, result = parent.recv()
+    proc.join()
+    return elapsed, peak_mb, result
@@ -0,0 +1,73 @@
+"""
+PDF 打包基准：旧的“逐张 convert_to_pdf + insert_pdf”路径 vs 现行的
+“insert_image 直接插入 + 增量落盘”路径，对比 页/秒 与峰值 RSS。
+
+用法（需安装 pymupdf 与 Pillow）:
+    python benchmarks/bench_pdf.py [--chapters 10] [--pages 50]
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from _common import load_packer, make_sample_album, run_isolated
+
+
+def legacy_pack_pdf(source_dir: Path, output_path: Path) -> int:
+    """旧实现：每张图片编码为单页 PDF 再解析插入，整本驻留内存直到保存"""
+    import fitz
+
+    packer = load_packer()
+    doc = fitz.open()
+    for img_path in packer._collect_images_sorted(source_dir):
+        img = fitz.open(img_path)
+        pdfbytes = img.convert_to_pdf()
+        img.close()
+        imgpdf = fitz.open("pdf", pdfbytes)
+        doc.insert_pdf(imgpdf)
+        imgpdf.close()
+    pages = doc.page_count
+    doc.save(output_path)
+    doc.close()
+    return pages
+
+
+def current_pack_pdf(source_dir: Path, output_path: Path) -> int:
+    """现行实现：JMPacker._pack_pdf"""
+    import fitz
+
+    packer = load_packer()
+    result = packer.JMPacker("pdf").pack(
+        source_dir, output_path.stem, output_path.parent
+    )
+    if not result.success:
+        raise RuntimeError(result.error_message)
+    with fitz.open(result.output_path) as doc:
+        return doc.page_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chapters", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="jm_bench_pdf_") as tmp:
+        tmp_dir = Path(tmp)
+        album = make_sample_album(tmp_dir / "album", args.chapters, args.pages)
+
+        print(f"{'实现':<10}{'页数':>8}{'耗时(s)':>10}{'页/秒':>10}{'峰值RSS(MB)':>14}")
+        for name, func in (("legacy", legacy_pack_pdf), ("current", current_pack_pdf)):
+            output = tmp_dir / f"{name}.pdf"
+            elapsed, peak_mb, pages = run_isolated(func, album, output)
+            print(
+                f"{name:<10}{pages:>8}{elapsed:>10.2f}"
+                f"{pages / elapsed:>10.1f}{peak_mb:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+配额预留基准：对比“每次新建连接 + 回滚日志”与长连接 WAL 数据库线程的预留吞吐。
+
+多个线程同时调用 reserve（模拟多个群同时发起下载），统计每秒完成的预留次数。
+
+用法:
+    python benchmarks/bench_quota.py [--threads 8] [--reserves 200]
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from _common import load_core_module
+
+
+class LegacyQuota:
+    """改造前的实现：每次调用新建连接，回滚日志模式下 BEGIN IMMEDIATE 预留"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS download_quota (
+                    user_id TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY (user_id, date)
+                )
+            """)
+
+    def reserve(self, user_id: str, limit: int) -> tuple[bool, int, int]:
+        today = date.today().isoformat()
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT count FROM download_quota WHERE user_id = ? AND date = ?",
+                (user_id, today),
+            ).fetchone()
+            used = row[0] if row else 0
+            if used >= limit:
+                conn.execute("ROLLBACK")
+                return False, used, limit
+            conn.execute(
+                """
+                INSERT INTO download_quota (user_id, date, count)
+                VALUES (?, ?, 1)
+                ON CONFLICT(user_id, date) DO UPDATE SET count = count + 1
+                """,
+                (user_id, today),
+            )
+            conn.execute("COMMIT")
+            return True, used + 1, limit
+        finally:
+            conn.close()
+
+
+def run(quota, threads: int, reserves: int) -> float:
+    """threads 个线程各预留 reserves 次，返回每秒预留数"""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index: int) -> None:
+        barrier.wait()
+        for _ in range(reserves):
+            quota.reserve(f"user{index % 4}", 10**9)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in workers:
+        t.join()
+    return threads * reserves / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--reserves", type=int, default=200)
+    args = parser.parse_args()
+
+    quota_mod = load_core_module("quota")
+
+    with tempfile.TemporaryDirectory(prefix="jm_bench_quota_") as tmp:
+        tmp_dir = Path(tmp)
+        print(f"{args.threads} 线程 × {args.reserves} 次预留")
+        print(f"{'实现':<16}{'预留/秒':>12}")
+
+        legacy_rate = run(
+            LegacyQuota(tmp_dir / "legacy.db"), args.threads, args.reserves
+        )
+        print(f"{'新建连接':<16}{legacy_rate:>12.0f}")
+
+        manager = quota_mod.DownloadQuotaManager(tmp_dir / "worker.db")
+        try:
+            worker_rate = run(manager, args.threads, args.reserves)
+        finally:
+            manager.close()
+        print(f"{'长连接 WAL':<16}{worker_rate:>12.0f}")
+        print(f"加速比: {worker_rate / legacy_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+ZIP 打包基准：对比各压缩策略 (auto/store/deflate) 的耗时与产物大小。
+
+样本为 JPEG 本子外加少量 PNG 与文本文件，接近真实下载目录的构成。
+
+用法（需安装 Pillow）:
+    python benchmarks/bench_zip.py [--chapters 10] [--pages 50] [--suffix .jpg]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from _common import load_packer, make_sample_album
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chapters", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--suffix", default=".jpg")
+    parser.add_argument("--password", default="")
+    args = parser.parse_args()
+
+    packer_mod = load_packer()
+
+    with tempfile.TemporaryDirectory(prefix="jm_bench_zip_") as tmp:
+        tmp_dir = Path(tmp)
+        album = make_sample_album(
+            tmp_dir / "album", args.chapters, args.pages, suffix=args.suffix
+        )
+        make_sample_album(album / "extras", 1, 3, size=(400, 400), suffix=".png")
+        (album / "info.txt").write_text("JM-Cosmos II benchmark\n" * 2000)
+        source_size = sum(p.stat().st_size for p in album.rglob("*") if p.is_file())
+
+        print(f"样本: {source_size / 1024 / 1024:.1f} MB, 加密: {bool(args.password)}")
+        print(f"{'策略':<10}{'耗时(s)':>10}{'产物(MB)':>12}{'压缩比':>10}")
+        for policy in ("deflate", "auto", "store"):
+            packer = packer_mod.JMPacker(
+                "zip", password=args.password, zip_compression=policy
+            )
+            start = time.perf_counter()
+            result = packer.pack(album, f"bench_{policy}", tmp_dir)
+            elapsed = time.perf_counter() - start
+            if not result.success:
+                raise RuntimeError(result.error_message)
+            size = result.output_path.stat().st_size
+            print(
+                f"{policy:<10}{elapsed:>10.2f}{size / 1024 / 1024:>12.1f}"
+                f"{size / source_size:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,18 +7,34 @@ JM-Cosmos II 核心模块
 from .auth import JMAuthManager
 from .base import JMClientMixin, JMConfigManager
 from .browser import JMBrowser
-from .downloader import DownloadResult, JMDownloadManager
+from .cover_cache import CoverCache
+from .domain_health import DomainHealth, http_probe
+from .downloader import (
+    PRIORITY_ADMIN,
+    PRIORITY_BACKGROUND,
+    PRIORITY_NORMAL,
+    QUEUE_PROGRESS_UNIT,
+    DownloadResult,
+    DownloadScheduler,
+    JMDownloadManager,
+)
 from .errors import classify_exception
 from .jmcomic_loader import is_jmcomic_available
-from .packer import JMPacker
+from .pack_cache import PackCache
+from .packer import JMPacker, PackResult
+from .prefetch import SubscriptionPrefetcher
 from .quota import DownloadQuotaManager
 from .subscribe import SubscriptionManager
+from .subscribe_checker import SubscriptionChecker
 
 # 集中管理 jmcomic 库的可用性检查
 JMCOMIC_AVAILABLE = is_jmcomic_available()
 
 __all__ = [
     "JMCOMIC_AVAILABLE",
+    "CoverCache",
+    "DomainHealth",
+    "http_probe",
     "DownloadQuotaManager",
     "JMAuthManager",
     "JMBrowser",
@@ -26,7 +42,16 @@ __all__ = [
     "JMConfigManager",
     "JMDownloadManager",
     "DownloadResult",
+    "DownloadScheduler",
     "JMPacker",
+    "PackCache",
+    "PackResult",
+    "PRIORITY_ADMIN",
+    "PRIORITY_BACKGROUND",
+    "PRIORITY_NORMAL",
+    "QUEUE_PROGRESS_UNIT",
+    "SubscriptionChecker",
     "SubscriptionManager",
+    "SubscriptionPrefetcher",
     "classify_exception",
 ]
@@ -0,0 +1,198 @@
+"""
+本子详情缓存模块
+
+进程内 TTL + LRU 缓存，可选 SQLite 持久化（重启后仍可命中未过期的详情）。
+持久化数据库由 SQLiteWorker 在专用线程上访问：事件循环中请使用 *_async 方法，
+内存命中不经过数据库线程。
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from astrbot.api import logger
+
+from .db import SQLiteWorker
+
+# 内存中最多保留的详情条数，超出按最久未用淘汰
+_MAX_MEMORY_ENTRIES = 1024
+
+_UPSERT_SQL = """
+    INSERT INTO album_detail (album_id, detail, fetched_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(album_id) DO UPDATE SET
+        detail = excluded.detail,
+        fetched_at = excluded.fetched_at
+"""
+_DELETE_SQL = "DELETE FROM album_detail WHERE album_id = ?"
+
+
+class AlbumDetailCache:
+    """本子详情缓存"""
+
+    def __init__(self, ttl: float, db_path: Path | None = None):
+        """
+        初始化详情缓存
+
+        Args:
+            ttl: 缓存有效期（秒），<=0 表示关闭缓存
+            db_path: SQLite 持久化文件路径，None 表示仅内存缓存
+        """
+        self.ttl = max(0.0, float(ttl))
+        self.db_path = db_path if self.ttl > 0 else None
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._db: SQLiteWorker | None = None
+        self.hits = 0
+        self.misses = 0
+        if self.db_path is not None:
+            self._init_db()
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用缓存"""
+        return self.ttl > 0
+
+    def _init_db(self):
+        """初始化数据库表"""
+
+        def create(conn: sqlite3.Connection) -> None:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS album_detail (
+                    album_id TEXT PRIMARY KEY,
+                    detail TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+
+        self._db = SQLiteWorker(self.db_path, name="jm-album-cache-db")
+        try:
+            self._db.run(create)
+        except Exception as e:
+            logger.error(f"初始化详情缓存数据库失败: {e}")
+            self._db.close()
+            self._db = None
+            self.db_path = None
+
+    def close(self) -> None:
+        """提交剩余写入并关闭数据库连接"""
+        if self._db is not None:
+            self._db.close()
+
+    # ==================== 读取 ====================
+
+    def get(self, album_id: str) -> dict | None:
+        """获取未过期的详情（返回副本），未命中返回 None"""
+        if not self.enabled:
+            return None
+        key = str(album_id)
+        entry = self._memory.get(key)
+        if entry is None and self._db is not None:
+            entry = self._load_sync(key)
+        return self._resolve(key, entry)
+
+    async def get_async(self, album_id: str) -> dict | None:
+        """get 的异步版本：内存未命中时在数据库线程中读取"""
+        if not self.enabled:
+            return None
+        key = str(album_id)
+        entry = self._memory.get(key)
+        if entry is None and self._db is not None:
+            try:
+                entry = await self._db.call(_load, key)
+            except Exception as e:
+                logger.debug(f"读取详情缓存失败: {e}")
+        return self._resolve(key, entry)
+
+    def _resolve(self, key: str, entry: tuple[float, dict] | None) -> dict | None:
+        """按有效期判定命中，并把数据库中读到的条目放入内存"""
+        if entry is not None and key not in self._memory:
+            self._remember(key, *entry)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            self.misses += 1
+            return None
+
+        self._memory.move_to_end(key)
+        self.hits += 1
+        return dict(entry[1])
+
+    # ==================== 写入 ====================
+
+    def put(self, album_id: str, detail: dict) -> None:
+        """写入详情"""
+        params = self._put_memory(album_id, detail)
+        if params is not None:
+            self._write_sync(_UPSERT_SQL, params, "写入详情缓存失败")
+
+    async def put_async(self, album_id: str, detail: dict) -> None:
+        """put 的异步版本（数据库写入与其它待执行写入合并提交）"""
+        params = self._put_memory(album_id, detail)
+        if params is not None:
+            await self._write(_UPSERT_SQL, params, "写入详情缓存失败")
+
+    def _put_memory(self, album_id: str, detail: dict) -> tuple | None:
+        """写入内存，返回需持久化的参数（未启用持久化时为 None）"""
+        if not self.enabled or not detail:
+            return None
+        key = str(album_id)
+        fetched_at = time.time()
+        self._remember(key, fetched_at, dict(detail))
+        if self._db is None:
+            return None
+        return key, json.dumps(detail, ensure_ascii=False, default=str), fetched_at
+
+    def invalidate(self, album_id: str) -> None:
+        """使某本子的缓存失效"""
+        key = str(album_id)
+        self._memory.pop(key, None)
+        if self._db is not None:
+            self._write_sync(_DELETE_SQL, (key,), "删除详情缓存失败")
+
+    async def invalidate_async(self, album_id: str) -> None:
+        """invalidate 的异步版本"""
+        key = str(album_id)
+        self._memory.pop(key, None)
+        if self._db is not None:
+            await self._write(_DELETE_SQL, (key,), "删除详情缓存失败")
+
+    def stats(self) -> dict:
+        """返回 {entries, hits, misses}"""
+        return {"entries": len(self._memory), "hits": self.hits, "misses": self.misses}
+
+    # ==================== 内部 ====================
+
+    def _remember(self, key: str, fetched_at: float, detail: dict) -> None:
+        self._memory[key] = (fetched_at, detail)
+        self._memory.move_to_end(key)
+        while len(self._memory) > _MAX_MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _load_sync(self, key: str) -> tuple[float, dict] | None:
+        try:
+            return self._db.run(_load, key)
+        except Exception as e:
+            logger.debug(f"读取详情缓存失败: {e}")
+            return None
+
+    def _write_sync(self, sql: str, params: tuple, error: str) -> None:
+        try:
+            self._db.write(sql, params).result()
+        except Exception as e:
+            logger.debug(f"{error}: {e}")
+
+    async def _write(self, sql: str, params: tuple, error: str) -> None:
+        try:
+            await asyncio.wrap_future(self._db.write(sql, params))
+        except Exception as e:
+            logger.debug(f"{error}: {e}")
+
+
+def _load(conn: sqlite3.Connection, key: str) -> tuple[float, dict] | None:
+    row = conn.execute(
+        "SELECT fetched_at, detail FROM album_detail WHERE album_id = ?", (key,)
+    ).fetchone()
+    if row is None:
+        return None
+    return row[0], json.loads(row[1])
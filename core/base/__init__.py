@@ -1,10 +1,11 @@
 """
 JM-Cosmos II 基础模块
 
-提供配置管理和客户端混入类。
+提供配置管理、客户端混入类与共享客户端池。
 """
 
 from .client import JMClientMixin
+from .client_pool import JMClientPool
 from .config import JMConfigManager
 
-__all__ = ["JMClientMixin", "JMConfigManager"]
+__all__ = ["JMClientMixin", "JMClientPool", "JMConfigManager"]
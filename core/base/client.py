@@ -8,9 +8,11 @@ from __future__ import annotations
 
 import asyncio
 from collections.abc import Callable
+from contextlib import AbstractContextManager
 from typing import TYPE_CHECKING, TypeVar
 
 from ..jmcomic_loader import can_import_jmcomic, is_jmcomic_available
+from .client_pool import CLIENT_POOL
 from .config import JMConfigManager
 
 if TYPE_CHECKING:
@@ -44,6 +46,34 @@ class JMClientMixin:
             return None
         return option.new_jm_client()
 
+    def _pooled_client(self, option: JmOption) -> AbstractContextManager:
+        """从共享池租用一个保持连接的客户端（上下文管理器，退出时归还）
+
+        适合搜索、详情等一次性查询；登录、收藏切换等需要专属客户端状态的操作
+        仍使用 _build_client。
+        """
+        return CLIENT_POOL.lease(option)
+
+    @staticmethod
+    def configure_client_pool(max_size: int, idle_timeout: float) -> None:
+        """按配置调整共享客户端池（max_size 为 0 时每次新建客户端）"""
+        CLIENT_POOL.configure(max_size, idle_timeout)
+
+    @staticmethod
+    def client_pool_stats() -> dict:
+        """客户端池统计：{idle, leased, created, reused}"""
+        return CLIENT_POOL.stats()
+
+    @staticmethod
+    def refresh_client_pool() -> None:
+        """客户端配置变化后作废池中客户端，之后按新配置新建"""
+        CLIENT_POOL.invalidate()
+
+    @staticmethod
+    def close_client_pool() -> None:
+        """关闭客户端池中的空闲连接"""
+        CLIENT_POOL.clear()
+
     async def _run_sync(self, func: Callable[..., T], *args, **kwargs) -> T:
         """
         在线程池中运行同步函数
@@ -0,0 +1,238 @@
+"""
+JMComic 客户端池模块
+
+jmcomic 默认的 curl_cffi postman 每个请求都新建 HTTP 会话，搜索、详情、
+下载的每次请求都要重新握手。客户端池复用使用 jmcomic 自带会话 postman
+（curl_cffi_session）的客户端：每次逻辑操作（一次查询、一次下载）租用一个
+客户端、操作结束归还，操作期间客户端上的状态（客户端缓存、域名重试、cookies）
+保持在同一个客户端上；客户端按身份（客户端配置、cookies 与指定域名）隔离，
+不同配置的 option 不会共用客户端，登录状态变化后旧身份的客户端不再被复用。
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+from astrbot.api import logger
+
+from ..jmcomic_loader import import_jmcomic
+
+if TYPE_CHECKING:
+    from jmcomic import JmOption
+
+# 池化客户端使用的 postman 类型键（jmcomic 依赖的 commonx 已注册的会话 postman）
+_SESSION_POSTMAN_KEY = "curl_cffi_session"
+
+
+def _identity_key(option: JmOption, domain_list: list[str] | None = None) -> str:
+    """客户端身份键：由 option 的客户端配置（域名、代理、cookies 等）与指定域名决定"""
+    try:
+        raw = json.dumps(option.client.src_dict, sort_keys=True, default=str)
+    except Exception as e:
+        logger.debug(f"读取客户端配置失败，按 option 实例区分客户端: {e}")
+        raw = str(id(option))
+    if domain_list is not None:
+        raw += "|" + json.dumps(list(domain_list))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _close_client(client) -> None:
+    """关闭客户端持有的会话（无会话时忽略）"""
+    try:
+        postman = client.get_root_postman()
+    except Exception:
+        postman = getattr(client, "postman", None)
+    # 会话 postman 本身没有 close，关闭其持有的 curl_cffi 会话
+    close = getattr(postman, "close", None) or getattr(
+        getattr(postman, "session", None), "close", None
+    )
+    if callable(close):
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"关闭客户端会话失败: {e}")
+
+
+# 池内身份：(客户端身份键, 配置代数)
+Identity = tuple[str, int]
+
+
+class JMClientPool:
+    """JM 客户端池 - 按客户端身份（配置 + 登录状态 + 域名）隔离的空闲客户端"""
+
+    def __init__(self, max_size: int = 4, idle_timeout: float = 300.0):
+        self.max_size = max(0, int(max_size))
+        self.idle_timeout = max(0.0, float(idle_timeout))
+        self._lock = threading.Lock()
+        # 配置代数：域名顺序等客户端配置变化时递增，旧代数的客户端不再复用
+        self._generation = 0
+        # 各身份的会话 postman 配置
+        self._session_options: dict[Identity, Any] = {}
+        # 空闲客户端：(身份, client, 归还时间)，按归还时间排序，总数不超过 max_size
+        self._idle: deque[tuple[Identity, Any, float]] = deque()
+        self.leased = 0
+        self.created = 0
+        self.reused = 0
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用池化"""
+        return self.max_size > 0
+
+    def configure(self, max_size: int, idle_timeout: float) -> None:
+        """按配置调整池大小与空闲超时（超出部分立即关闭）"""
+        with self._lock:
+            self.max_size = max(0, int(max_size))
+            self.idle_timeout = max(0.0, float(idle_timeout))
+            dropped = self._trim_locked(time.monotonic())
+        for client in dropped:
+            _close_client(client)
+
+    @contextmanager
+    def lease(self, option: JmOption, domain_list: list[str] | None = None):
+        """租用一个客户端，退出上下文时归还
+
+        一次逻辑操作（查询、整个下载）只租用一次，操作内的所有请求使用同一客户端；
+        客户端的会话可在多个线程中共享（curl_cffi 会话按线程持有连接）。
+        """
+        client, identity = self.acquire(option, domain_list)
+        try:
+            yield client
+        finally:
+            self.release(client, identity)
+
+    def acquire(
+        self, option: JmOption, domain_list: list[str] | None = None
+    ) -> tuple[Any, Identity | None]:
+        """
+        取出同一身份的空闲客户端或新建一个
+
+        Args:
+            option: jmcomic 配置
+            domain_list: 指定域名列表（如重试时轮换后的域名），None 为配置默认
+
+        Returns:
+            (客户端, 身份)；未池化的客户端身份为 None
+        """
+        if not self.enabled:
+            return self._build(option, domain_list), None
+
+        key = _identity_key(option, domain_list)
+        client = None
+        with self._lock:
+            identity = (key, self._generation)
+            dropped = self._trim_locked(time.monotonic())
+            for index in range(len(self._idle) - 1, -1, -1):
+                if self._idle[index][0] == identity:
+                    client = self._idle[index][1]
+                    del self._idle[index]
+                    self.reused += 1
+                    break
+            self.leased += 1
+        for stale in dropped:
+            _close_client(stale)
+
+        if client is None:
+            try:
+                client = self._new_client(option, identity, domain_list)
+            except Exception:
+                with self._lock:
+                    self.leased -= 1
+                raise
+        return client, identity
+
+    def release(self, client, identity: Identity | None) -> None:
+        """归还客户端；配置已变化时直接关闭，池满时关闭最久未用的空闲客户端"""
+        if identity is None:
+            _close_client(client)
+            return
+        dropped = [client]
+        with self._lock:
+            self.leased -= 1
+            if identity[1] == self._generation:
+                self._idle.append((identity, client, time.monotonic()))
+                dropped = self._trim_locked(time.monotonic())
+        for stale in dropped:
+            _close_client(stale)
+
+    def invalidate(self) -> None:
+        """客户端配置（如域名顺序）已变化：关闭空闲客户端，租出中的归还时关闭"""
+        with self._lock:
+            self._generation += 1
+            self._session_options.clear()
+        self.clear()
+
+    def clear(self) -> None:
+        """关闭全部空闲客户端"""
+        with self._lock:
+            dropped = [client for _, client, _ in self._idle]
+            self._idle.clear()
+        for client in dropped:
+            _close_client(client)
+
+    def stats(self) -> dict:
+        """返回 {idle, leased, created, reused}"""
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "leased": self.leased,
+                "created": self.created,
+                "reused": self.reused,
+            }
+
+    @staticmethod
+    def _build(option, domain_list: list[str] | None):
+        if domain_list is None:
+            return option.new_jm_client()
+        return option.new_jm_client(domain_list=domain_list)
+
+    def _new_client(
+        self, option: JmOption, identity: Identity, domain_list: list[str] | None
+    ):
+        base = (_identity_key(option), identity[1])
+        with self._lock:
+            session_option = self._session_options.get(base)
+        if session_option is None:
+            session_option = self._build_session_option(option)
+            with self._lock:
+                if base[1] == self._generation:
+                    self._session_options[base] = session_option
+        client = self._build(session_option, domain_list)
+        with self._lock:
+            self.created += 1
+        return client
+
+    @staticmethod
+    def _build_session_option(option: JmOption):
+        """复制 option 并把 postman 换成会话类型；不可用时沿用原 option"""
+        if import_jmcomic() is None:
+            return option
+        try:
+            option_dict = copy.deepcopy(option.deconstruct())
+            postman = option_dict["client"].setdefault("postman", {})
+            postman["type"] = _SESSION_POSTMAN_KEY
+            return option.__class__.construct(option_dict)
+        except Exception as e:
+            logger.debug(f"构建会话客户端配置失败，客户端不复用连接: {e}")
+            return option
+
+    def _trim_locked(self, now: float) -> list:
+        """移除超时与超出容量的空闲客户端（需持锁），返回待关闭列表"""
+        dropped = []
+        if self.idle_timeout:
+            while self._idle and now - self._idle[0][2] > self.idle_timeout:
+                dropped.append(self._idle.popleft()[1])
+        while len(self._idle) > self.max_size:
+            dropped.append(self._idle.popleft()[1])
+        return dropped
+
+
+# 进程内共享的客户端池，由插件初始化时按配置调整
+CLIENT_POOL = JMClientPool()
@@ -30,6 +30,8 @@ class JMConfigManager:
         self.plugin_config = plugin_config
         self.data_dir = data_dir
         self._option: JmOption | None = None
+        # 按域名健康度排好的 client_domain 顺序（None 表示按配置顺序）
+        self._domain_order: list[str] | None = None
 
     @property
     def download_dir(self) -> Path:
@@ -58,11 +60,53 @@ class JMConfigManager:
         domain_str = self.plugin_config.get("client_domain", "")
         return [d.strip() for d in domain_str.split(",") if d.strip()]
 
+    @property
+    def domain_probe_interval(self) -> int:
+        """域名健康探测间隔（秒），0 表示关闭"""
+        return self.plugin_config.get("domain_probe_interval", 600)
+
+    @property
+    def ordered_client_domain(self) -> list[str]:
+        """按健康度排序后的自定义域名列表"""
+        domains = self.client_domain
+        if self._domain_order and sorted(self._domain_order) == sorted(domains):
+            return list(self._domain_order)
+        return domains
+
+    def set_domain_order(self, domains: list[str]) -> bool:
+        """
+        更新域名尝试顺序，已创建的 JmOption 同步生效（之后新建的客户端使用新顺序）
+
+        Args:
+            domains: 排序后的域名，须与 client_domain 为同一组域名
+
+        Returns:
+            顺序是否发生变化
+        """
+        if sorted(domains) != sorted(self.client_domain):
+            return False
+        if list(domains) == self.ordered_client_domain:
+            return False
+        self._domain_order = list(domains)
+        if self._option is not None:
+            self._option.client.domain = list(domains)
+        return True
+
     @property
     def retry_times(self) -> int:
         """请求重试次数，0 表示使用 jmcomic 默认值"""
         return self.plugin_config.get("retry_times", 0)
 
+    @property
+    def client_pool_size(self) -> int:
+        """客户端池保留的空闲客户端数，0 表示每次新建客户端"""
+        return self.plugin_config.get("client_pool_size", 4)
+
+    @property
+    def client_pool_idle_timeout(self) -> int:
+        """池中空闲客户端的保留时间（秒）"""
+        return self.plugin_config.get("client_pool_idle_timeout", 300)
+
     @property
     def use_proxy(self) -> bool:
         """是否使用代理"""
@@ -83,11 +127,81 @@ class JMConfigManager:
         """最大并发图片数"""
         return self.plugin_config.get("max_concurrent_images", 5)
 
+    @property
+    def adaptive_concurrency(self) -> bool:
+        """是否按延迟与错误率自适应调整图片并发"""
+        return self.plugin_config.get("adaptive_concurrency", True)
+
+    @property
+    def adaptive_concurrency_min(self) -> int:
+        """自适应图片并发下限"""
+        return self.plugin_config.get("adaptive_concurrency_min", 2)
+
+    @property
+    def adaptive_concurrency_max(self) -> int:
+        """自适应图片并发上限，0 表示 章节并发数 × 图片并发数"""
+        return self.plugin_config.get("adaptive_concurrency_max", 0)
+
+    @property
+    def download_resume(self) -> bool:
+        """是否启用断点续传清单"""
+        return self.plugin_config.get("download_resume", True)
+
+    @property
+    def download_retry_rounds(self) -> int:
+        """部分失败后定向重试的轮数，0 表示不重试"""
+        return self.plugin_config.get("download_retry_rounds", 3)
+
+    @property
+    def download_retry_deadline(self) -> int:
+        """失败重试阶段的总时限（秒）"""
+        return self.plugin_config.get("download_retry_deadline", 60)
+
+    @property
+    def download_max_concurrent(self) -> int:
+        """同时进行的下载任务数上限，0 表示不限"""
+        return self.plugin_config.get("download_max_concurrent", 2)
+
+    @property
+    def download_max_image_workers(self) -> int:
+        """所有下载任务的图片线程总数上限，0 表示不限"""
+        return self.plugin_config.get("download_max_image_workers", 0)
+
     @property
     def pack_format(self) -> str:
         """打包格式"""
         return self.plugin_config.get("pack_format", "zip")
 
+    @property
+    def pack_max_workers(self) -> int:
+        """打包进程数（并发打包上限），0 表示在线程中打包"""
+        return self.plugin_config.get("pack_max_workers", 2)
+
+    @property
+    def pack_pipeline(self) -> bool:
+        """是否边下载边打包（仅 zip/pdf）"""
+        return self.plugin_config.get("pack_pipeline", False)
+
+    @property
+    def pack_decode_workers(self) -> int:
+        """长图解码/缩放并行进程数，0 或 1 表示逐张处理"""
+        return self.plugin_config.get("pack_decode_workers", 0)
+
+    @property
+    def zip_compression(self) -> str:
+        """ZIP 压缩策略 (auto/store/deflate)"""
+        return self.plugin_config.get("zip_compression", "auto")
+
+    @property
+    def zip_compress_level(self) -> int:
+        """ZIP deflate 压缩等级 (1-9)"""
+        return self.plugin_config.get("zip_compress_level", 6)
+
+    @property
+    def zip_volume_mb(self) -> int:
+        """ZIP 分卷大小（MB），0 表示不分卷"""
+        return self.plugin_config.get("zip_volume_mb", 0)
+
     @property
     def pack_password(self) -> str:
         """打包密码"""
@@ -98,6 +212,26 @@ class JMConfigManager:
         """是否在文件名中显示密码提示"""
         return self.plugin_config.get("filename_show_password", False)
 
+    @property
+    def pack_cache_max_mb(self) -> int:
+        """打包产物缓存上限（MB），0 表示关闭缓存"""
+        return self.plugin_config.get("pack_cache_max_mb", 0)
+
+    @property
+    def cover_cache_max_mb(self) -> int:
+        """封面缓存上限（MB），0 表示不淘汰"""
+        return max(0, self.plugin_config.get("cover_cache_max_mb", 200))
+
+    @property
+    def album_detail_cache_ttl(self) -> int:
+        """本子详情缓存有效期（秒），0 表示关闭缓存"""
+        return self.plugin_config.get("album_detail_cache_ttl", 300)
+
+    @property
+    def album_detail_cache_persist(self) -> bool:
+        """本子详情缓存是否持久化到 SQLite（重启后仍可命中）"""
+        return self.plugin_config.get("album_detail_cache_persist", False)
+
     @property
     def auto_delete_after_send(self) -> bool:
         """发送后是否自动删除"""
@@ -177,6 +311,36 @@ class JMConfigManager:
         """订阅更新检查间隔（秒），0 表示关闭后台检查"""
         return self.plugin_config.get("subscribe_check_interval", 3600)
 
+    @property
+    def subscribe_check_concurrency(self) -> int:
+        """订阅检查时同时进行的详情请求数"""
+        return max(1, self.plugin_config.get("subscribe_check_concurrency", 4))
+
+    @property
+    def subscribe_check_rpm(self) -> int:
+        """订阅检查每分钟最多发起的详情请求数，0 表示不限速"""
+        return max(0, self.plugin_config.get("subscribe_check_rpm", 30))
+
+    @property
+    def subscribe_latest_pages(self) -> int:
+        """订阅检查每轮最多翻的“最新”列表页数，0 表示每轮全量拉取详情"""
+        return max(0, self.plugin_config.get("subscribe_latest_pages", 3))
+
+    @property
+    def subscribe_prefetch(self) -> bool:
+        """订阅发现新章节后是否在后台预取"""
+        return bool(self.plugin_config.get("subscribe_prefetch", False))
+
+    @property
+    def subscribe_prefetch_max_mb(self) -> int:
+        """预取的磁盘预算（MB）：下载目录超过该大小时暂停预取，0 表示不限制"""
+        return max(0, self.plugin_config.get("subscribe_prefetch_max_mb", 2048))
+
+    @property
+    def subscribe_prefetch_ttl_hours(self) -> int:
+        """预取目录未被下载命令取用时的保留时长（小时），0 表示不过期"""
+        return max(0, self.plugin_config.get("subscribe_prefetch_ttl_hours", 72))
+
     @property
     def cookies_file(self) -> Path:
         """Cookies文件路径"""
@@ -231,7 +395,7 @@ class JMConfigManager:
 
         # 自定义域名与重试次数：留空 / 为 0 时交给 jmcomic 默认处理
         if self.client_domain:
-            option_dict["client"]["domain"] = self.client_domain
+            option_dict["client"]["domain"] = self.ordered_client_domain
         if self.retry_times > 0:
             option_dict["client"]["retry_times"] = self.retry_times
 
@@ -8,6 +8,7 @@ from pathlib import Path
 
 from astrbot.api import logger
 
+from .album_cache import AlbumDetailCache
 from .base import JMClientMixin, JMConfigManager
 from .constants import (
     CATEGORY_MAP,
@@ -18,6 +19,7 @@ from .constants import (
     get_time_list,
 )
 from .jmcomic_loader import import_jmcomic, is_jmcomic_available
+from .singleflight import SingleFlight
 
 JMCOMIC_AVAILABLE = is_jmcomic_available()
 
@@ -33,6 +35,13 @@ class JMBrowser(JMClientMixin):
             config_manager: 配置管理器实例
         """
         self.config = config_manager
+        self._detail_cache = AlbumDetailCache(
+            config_manager.album_detail_cache_ttl,
+            config_manager.data_dir / "album_cache.db"
+            if config_manager.album_detail_cache_persist
+            else None,
+        )
+        self._detail_flight = SingleFlight()
 
     # ==================== 搜索功能 ====================
 
@@ -68,15 +77,15 @@ class JMBrowser(JMClientMixin):
         self, keyword: str, page: int, mode: str, option
     ) -> list[dict]:
         """同步搜索本子（异常向上传播）"""
-        client = option.new_jm_client()
-        search_method = {
-            "site": client.search_site,
-            "tag": client.search_tag,
-            "author": client.search_author,
-            "actor": client.search_actor,
-            "work": client.search_work,
-        }.get(mode, client.search_site)
-        search_page = search_method(keyword, page)
+        with self._pooled_client(option) as client:
+            search_method = {
+                "site": client.search_site,
+                "tag": client.search_tag,
+                "author": client.search_author,
+                "actor": client.search_actor,
+                "work": client.search_work,
+            }.get(mode, client.search_site)
+            search_page = search_method(keyword, page)
 
         results = []
         for album_id, title, tags in search_page.iter_id_title_tag():
@@ -93,18 +102,23 @@ class JMBrowser(JMClientMixin):
 
     # ==================== 详情功能 ====================
 
-    async def get_album_detail(self, album_id: str) -> dict | None:
+    async def get_album_detail(
+        self, album_id: str, refresh: bool = False
+    ) -> dict | None:
         """
         获取本子详情
 
+        命中未过期的缓存时不访问网络；同一本子的并发请求合并为一次。
+
         Args:
             album_id: 本子ID
+            refresh: 是否跳过缓存强制拉取（章节数等需要最新值时使用）
 
         Returns:
             本子详情字典
 
         Raises:
-            异常会向上传播，便于上层区分网络失败与本子不存在
+            异常会向上传播，便于上层区分网络失败与本子不存在（失败结果不缓存）
         """
         if not self.is_available():
             return None
@@ -113,7 +127,32 @@ class JMBrowser(JMClientMixin):
         if option is None:
             return None
 
-        return await self._run_sync(self._get_album_detail_sync, album_id, option)
+        key = str(album_id)
+        if not refresh:
+            cached = await self._detail_cache.get_async(key)
+            if cached is not None:
+                return cached
+
+        return await self._detail_flight.run(
+            key, lambda: self._fetch_album_detail(key, option)
+        )
+
+    async def _fetch_album_detail(self, album_id: str, option) -> dict | None:
+        """拉取详情并写入缓存"""
+        detail = await self._run_sync(self._get_album_detail_sync, album_id, option)
+        if detail:
+            await self._detail_cache.put_async(album_id, detail)
+        return detail
+
+    def close(self) -> None:
+        """关闭详情缓存数据库"""
+        self._detail_cache.close()
+
+    def detail_cache_stats(self) -> dict:
+        """详情缓存统计：{entries, hits, misses, coalesced}"""
+        stats = self._detail_cache.stats()
+        stats["coalesced"] = self._detail_flight.coalesced
+        return stats
 
     def _get_album_detail_sync(self, album_id: str, option) -> dict | None:
         """同步获取本子详情（异常向上传播）"""
@@ -121,9 +160,9 @@ class JMBrowser(JMClientMixin):
         if jmcomic is None:
             return None
 
-        client = option.new_jm_client()
         parsed_id = jmcomic.JmcomicText.parse_to_jm_id(album_id)
-        album = client.get_album_detail(parsed_id)
+        with self._pooled_client(option) as client:
+            album = client.get_album_detail(parsed_id)
 
         return {
             "id": album.id,
@@ -138,6 +177,7 @@ class JMBrowser(JMClientMixin):
             "description": album.description if hasattr(album, "description") else "",
             "likes": album.likes if hasattr(album, "likes") else 0,
             "views": album.views if hasattr(album, "views") else 0,
+            "photo_ids": [str(ep[0]) for ep in getattr(album, "episode_list", [])],
         }
 
     async def get_photo_id_by_index(
@@ -172,9 +212,9 @@ class JMBrowser(JMClientMixin):
         if jmcomic is None:
             return None
 
-        client = option.new_jm_client()
         parsed_id = jmcomic.JmcomicText.parse_to_jm_id(album_id)
-        album = client.get_album_detail(parsed_id)
+        with self._pooled_client(option) as client:
+            album = client.get_album_detail(parsed_id)
 
         total_chapters = len(album.episode_list)
 
@@ -225,7 +265,6 @@ class JMBrowser(JMClientMixin):
             if jmcomic is None:
                 return None
 
-            client = option.new_jm_client()
             parsed_id = jmcomic.JmcomicText.parse_to_jm_id(album_id)
 
             # 封面保存路径
@@ -236,7 +275,8 @@ class JMBrowser(JMClientMixin):
                 return cover_path
 
             # 下载封面
-            client.download_album_cover(parsed_id, str(cover_path))
+            with self._pooled_client(option) as client:
+                client.download_album_cover(parsed_id, str(cover_path))
 
             if cover_path.exists():
                 return cover_path
@@ -311,8 +351,8 @@ class JMBrowser(JMClientMixin):
         self, method_name: str, page: int, category: str, option
     ) -> list[dict]:
         """同步获取排行榜（method_name 为 jmcomic 客户端的排行方法名，异常向上传播）"""
-        client = option.new_jm_client()
-        ranking_page = getattr(client, method_name)(page, category)
+        with self._pooled_client(option) as client:
+            ranking_page = getattr(client, method_name)(page, category)
 
         results = []
         for album_id, title in ranking_page.iter_id_title():
@@ -370,13 +410,13 @@ class JMBrowser(JMClientMixin):
         self, page: int, time: str, category: str, order_by: str, option
     ) -> list[dict]:
         """同步获取分类浏览结果（异常向上传播）"""
-        client = option.new_jm_client()
-        category_page = client.categories_filter(
-            page=page,
-            time=time,
-            category=category,
-            order_by=order_by,
-        )
+        with self._pooled_client(option) as client:
+            category_page = client.categories_filter(
+                page=page,
+                time=time,
+                category=category,
+                order_by=order_by,
+            )
 
         results = []
         for album_id, title in category_page.iter_id_title():
@@ -391,6 +431,32 @@ class JMBrowser(JMClientMixin):
             )
         return results
 
+    async def get_latest_album_ids(self, page: int = 1) -> list[str]:
+        """
+        获取“最新”排序（全部分类、全部时间）列表某一页的本子ID，按更新先后排列
+
+        供订阅检查判断哪些本子近期有更新，只需一次列表请求而非逐本拉取详情。
+        """
+        if not self.is_available():
+            return []
+
+        option = self._get_option()
+        if option is None:
+            return []
+
+        return await self._run_sync(self._get_latest_album_ids_sync, page, option)
+
+    def _get_latest_album_ids_sync(self, page: int, option) -> list[str]:
+        """同步获取最新列表（异常向上传播）"""
+        with self._pooled_client(option) as client:
+            category_page = client.categories_filter(
+                page=page,
+                time=TIME_MAP["all"],
+                category=CATEGORY_MAP["all"],
+                order_by=ORDER_MAP["new"],
+            )
+        return [str(album_id) for album_id in category_page.iter_id()]
+
     # 辅助方法：使用 constants 模块中的函数
     get_category_list = staticmethod(get_category_list)
     get_order_list = staticmethod(get_order_list)
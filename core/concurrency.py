@@ -0,0 +1,154 @@
+"""
+图片下载自适应并发控制
+
+jmcomic 的图片线程数由配置固定；线程过多会触发限流与重试，过少又浪费带宽。
+AdaptiveConcurrency 按 AIMD（加性增、乘性减）调整同时进行的图片请求数：
+下载钩子记录每张图片的耗时与异常，每个统计窗口结束时——出现限流/超时或
+错误率过高则减半，延迟明显高于基线则保持，其余情况且并发已用满则加一。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+
+# 统计窗口：满 _WINDOW_SAMPLES 个样本或超过 _WINDOW_SECONDS 秒即评估一次
+_WINDOW_SAMPLES = 20
+_WINDOW_SECONDS = 5.0
+# 窗口错误率超过该值视为拥塞
+_ERROR_RATE_LIMIT = 0.1
+# 窗口平均延迟超过基线的倍数时不再加并发
+_LATENCY_INFLATION = 2.0
+# 基线延迟每个健康窗口允许上浮的比例（网络整体变慢时基线随之抬升）
+_BASELINE_DRIFT = 1.05
+
+_THROTTLE_MARKERS = ("429", "too many requests", "timeout", "timed out")
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """是否为限流或超时类异常"""
+    if isinstance(error, TimeoutError):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _THROTTLE_MARKERS)
+
+
+class AdaptiveConcurrency:
+    """AIMD 并发上限（线程安全，供 jmcomic 下载线程共享）"""
+
+    def __init__(self, min_limit: int, max_limit: int, initial: int | None = None):
+        """
+        Args:
+            min_limit: 并发下限
+            max_limit: 并发上限
+            initial: 初始并发，默认为上限
+        """
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        start = self.max_limit if initial is None else int(initial)
+        self.limit = min(self.max_limit, max(self.min_limit, start))
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self._cond = threading.Condition()
+        self._baseline: float | None = None
+        self._last_latency: float | None = None
+        self._last_error_rate = 0.0
+        self._reset_window()
+
+    def configure(self, min_limit: int, max_limit: int) -> None:
+        """调整上下限，当前并发随之收敛到新区间"""
+        with self._cond:
+            self.min_limit = max(1, int(min_limit))
+            self.max_limit = max(self.min_limit, int(max_limit))
+            self.limit = min(self.max_limit, max(self.min_limit, self.limit))
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """占用一个并发名额（阻塞等待），退出时归还"""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            self._window_peak = max(self._window_peak, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify()
+
+    def record(self, latency: float, error: BaseException | None = None) -> None:
+        """记录一次图片请求的耗时与结果，窗口结束时调整并发"""
+        with self._cond:
+            self._samples += 1
+            self._latency_sum += latency
+            if error is not None:
+                self._errors += 1
+                if is_throttle_error(error):
+                    self._throttled += 1
+            if (
+                self._samples >= _WINDOW_SAMPLES
+                or time.monotonic() - self._window_started >= _WINDOW_SECONDS
+            ):
+                self._evaluate_locked()
+
+    def stats(self) -> dict:
+        """返回 {limit, in_flight, min, max, latency_ms, error_rate, increases, decreases}"""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "min": self.min_limit,
+                "max": self.max_limit,
+                "latency_ms": (
+                    round(self._last_latency * 1000)
+                    if self._last_latency is not None
+                    else None
+                ),
+                "error_rate": self._last_error_rate,
+                "increases": self.increases,
+                "decreases": self.decreases,
+            }
+
+    def _evaluate_locked(self) -> None:
+        mean = self._latency_sum / self._samples
+        error_rate = self._errors / self._samples
+        self._last_latency = mean
+        self._last_error_rate = error_rate
+
+        if self._throttled or error_rate > _ERROR_RATE_LIMIT:
+            # 乘性减：限流/超时或错误率过高
+            new_limit = max(self.min_limit, self.limit // 2)
+            if new_limit < self.limit:
+                self.decreases += 1
+            self.limit = new_limit
+        else:
+            inflated = (
+                self._baseline is not None
+                and mean > self._baseline * _LATENCY_INFLATION
+            )
+            if self._baseline is None:
+                self._baseline = mean
+            else:
+                self._baseline = min(mean, self._baseline * _BASELINE_DRIFT)
+            # 加性增：延迟正常且名额已用满（瓶颈在并发而非任务量）
+            if (
+                not inflated
+                and self._window_peak >= self.limit
+                and self.limit < self.max_limit
+            ):
+                self.limit += 1
+                self.increases += 1
+                self._cond.notify()
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        self._samples = 0
+        self._errors = 0
+        self._throttled = 0
+        self._latency_sum = 0.0
+        self._window_peak = self.in_flight
+        self._window_started = time.monotonic()
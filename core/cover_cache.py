@@ -0,0 +1,212 @@
+"""
+封面缓存模块
+
+封面保存在 download_dir/covers/{id}.jpg。CoverCache 按总字节数做 LRU 淘汰
+（以原图的修改时间记录最近使用），并在封面入库时预先生成压缩版本
+{id}.compressed.jpg 与原图放在一起：发送超时回退压缩时直接复用，
+重复的封面预览不再需要任何 PIL 处理。
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from astrbot.api import logger
+
+# 压缩版本的文件名后缀（{id}.compressed.jpg）
+COMPRESSED_SUFFIX = ".compressed.jpg"
+
+# 压缩参数：长边上限与 JPEG 质量
+COMPRESS_MAX_SIZE = 1024
+COMPRESS_QUALITY = 60
+
+
+def compress_image(
+    source: Path,
+    target: Path,
+    quality: int = COMPRESS_QUALITY,
+    max_size: int = COMPRESS_MAX_SIZE,
+) -> bool:
+    """
+    把图片缩放到长边不超过 max_size 并以 JPEG 保存
+
+    先写入临时文件再替换，并发读取方不会读到半个文件。
+
+    Returns:
+        是否成功
+    """
+    from PIL import Image
+
+    tmp = target.with_name(f".{target.name}.{threading.get_ident()}.tmp")
+    try:
+        with Image.open(source) as img:
+            # 转换为 RGB（处理 RGBA 等格式）
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            if img.width > max_size or img.height > max_size:
+                ratio = min(max_size / img.width, max_size / img.height)
+                new_size = (int(img.width * ratio), int(img.height * ratio))
+                img = img.resize(new_size, Image.Resampling.LANCZOS)
+            img.save(tmp, "JPEG", quality=quality, optimize=True)
+        os.replace(tmp, target)
+        return True
+    except Exception as e:
+        logger.debug(f"压缩图片失败 {source}: {e}")
+        tmp.unlink(missing_ok=True)
+        return False
+
+
+def compressed_variant(path: Path) -> Path | None:
+    """返回与原图放在一起的、不旧于原图的压缩版本，没有则返回 None"""
+    variant = path.with_name(path.stem + COMPRESSED_SUFFIX)
+    try:
+        if variant.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+            return variant
+    except OSError:
+        pass
+    return None
+
+
+class CoverCache:
+    """封面缓存 - 字节上限 + LRU 淘汰 + 预生成压缩版本"""
+
+    def __init__(self, cover_dir: Path, max_bytes: int):
+        """
+        Args:
+            cover_dir: 封面目录（通常为 download_dir/covers）
+            max_bytes: 封面与其压缩版本的总字节上限，<=0 表示不淘汰
+        """
+        self.cover_dir = cover_dir
+        self.max_bytes = max(0, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        # 各封面组（原图 + 压缩版本）的字节数与总字节数，首次需要时扫描一次，
+        # 之后增量维护
+        self._sizes: dict[str, int] | None = None
+        self._total: int | None = None
+
+    def path_for(self, album_id: str) -> Path:
+        """封面原图路径"""
+        return self.cover_dir / f"{album_id}.jpg"
+
+    def lookup(self, album_id: str) -> Path | None:
+        """
+        查询封面，命中时刷新最近使用时间
+
+        Returns:
+            封面路径，未缓存返回 None
+        """
+        path = self.path_for(album_id)
+        try:
+            # 只更新 mtime 作为 LRU 时间戳；压缩版本的 mtime 随之保持不旧于原图
+            os.utime(path)
+            variant = path.with_name(path.stem + COMPRESSED_SUFFIX)
+            if variant.exists():
+                os.utime(variant)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def admit(self, path: Path) -> None:
+        """
+        登记新下载的封面：生成压缩版本并按上限淘汰（在线程中调用）
+
+        Args:
+            path: 封面原图路径（位于 cover_dir 内）
+        """
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return
+        variant = path.with_name(path.stem + COMPRESSED_SUFFIX)
+        if compress_image(path, variant):
+            size += variant.stat().st_size
+        stem = path.name.split(".", 1)[0]
+        with self._lock:
+            if self._sizes is None:
+                self._scan_locked()
+            else:
+                # 重复登记同一封面时替换旧大小，不重复累加
+                self._total += size - self._sizes.get(stem, 0)
+                self._sizes[stem] = size
+        self.evict(keep=path)
+
+    def _scan_locked(self) -> None:
+        """扫描目录，重建各封面组大小与总字节数（需持锁）"""
+        self._sizes = {
+            group[0].name.split(".", 1)[0]: size for _, size, group in self._entries()
+        }
+        self._total = sum(self._sizes.values())
+
+    def _entries(self) -> list[tuple[float, int, list[Path]]]:
+        """按封面分组：(原图最近使用时间, 组内总字节, [文件...])"""
+        groups: dict[str, list[Path]] = {}
+        try:
+            files = list(self.cover_dir.iterdir())
+        except OSError:
+            return []
+        for file in files:
+            if file.name.startswith(".") or not file.is_file():
+                continue
+            stem = file.name.split(".", 1)[0]
+            groups.setdefault(stem, []).append(file)
+
+        entries = []
+        for stem, group in groups.items():
+            size, used = 0, 0.0
+            for file in group:
+                try:
+                    stat = file.stat()
+                except OSError:
+                    continue
+                size += stat.st_size
+                used = max(used, stat.st_mtime)
+            entries.append((used, size, group))
+        return entries
+
+    def evict(self, keep: Path | None = None) -> int:
+        """
+        按最近使用时间淘汰整组封面，直到总大小不超过上限
+
+        Args:
+            keep: 不参与淘汰的封面原图（刚写入的封面）
+
+        Returns:
+            淘汰的封面数
+        """
+        if self.max_bytes <= 0:
+            return 0
+        with self._lock:
+            if self._sizes is None:
+                self._scan_locked()
+            if self._total <= self.max_bytes:
+                return 0
+            keep_stem = keep.name.split(".", 1)[0] if keep else None
+            removed = 0
+            for _, size, group in sorted(self._entries(), key=lambda e: e[0]):
+                if self._total <= self.max_bytes:
+                    break
+                stem = group[0].name.split(".", 1)[0]
+                if stem == keep_stem:
+                    continue
+                for file in group:
+                    file.unlink(missing_ok=True)
+                self._total -= self._sizes.pop(stem, size)
+                removed += 1
+        self.evicted += removed
+        if removed:
+            logger.debug(f"封面缓存淘汰 {removed} 项")
+        return removed
+
+    def stats(self) -> dict:
+        """返回 {hits, misses, evicted, bytes}（bytes 未统计过时为 None）"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "bytes": self._total,
+        }
@@ -0,0 +1,191 @@
+"""
+SQLite 专用线程访问器
+
+每次操作都新建 sqlite3 连接要付出打开文件、读取 schema 的开销，回滚日志模式下
+每个写事务还要多次 fsync。SQLiteWorker 在一个专用线程上持有长连接（WAL +
+synchronous=NORMAL），所有语句都提交到该线程顺序执行：写入天然串行化，
+调用方可以同步等待结果，也可以在事件循环中 await 而不阻塞。
+
+单条写语句可走 write()：线程忙碌期间到达的写入会合并到同一个事务中提交，
+批量更新（如订阅检查逐条回写章节数）只需一次提交；同一语句的多组参数可走
+write_many() 一次 executemany。写入按提交顺序执行，
+之后提交的读操作总能读到此前的写入。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# 其它进程持有写锁时的等待时间（毫秒）
+_BUSY_TIMEOUT_MS = 5000
+
+
+class SQLiteWorker:
+    """在专用线程上持有长连接的 SQLite 访问器"""
+
+    def __init__(self, db_path: Path, name: str = "jm-sqlite"):
+        """
+        Args:
+            db_path: 数据库文件路径
+            name: 工作线程名前缀
+        """
+        self.db_path = db_path
+        self._conn: sqlite3.Connection | None = None
+        self._thread_id: int | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=name, initializer=self._bind_thread
+        )
+        self._closed = False
+        # 待合并提交的写入：(future, sql, params)
+        self._pending: list[tuple[Future, str, tuple]] = []
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+        self.write_count = 0
+        self.write_batches = 0
+
+    def _bind_thread(self) -> None:
+        self._thread_id = threading.get_ident()
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取长连接（仅在工作线程中调用），首次使用时打开并设置 WAL"""
+        if self._conn is None:
+            # 自动提交模式：单条语句立即生效，多语句事务由调用方显式 BEGIN
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={_BUSY_TIMEOUT_MS}")
+            self._conn = conn
+        return self._conn
+
+    def _call(self, func: Callable[..., T], args: tuple) -> T:
+        return func(self._connection(), *args)
+
+    def submit(self, func: Callable[..., T], *args: Any) -> Future[T]:
+        """
+        把 func(conn, *args) 提交到工作线程执行
+
+        Returns:
+            concurrent.futures.Future，事件循环中可用 asyncio.wrap_future 等待
+        """
+        if self._closed:
+            raise RuntimeError("数据库已关闭")
+        return self._executor.submit(self._call, func, args)
+
+    def run(self, func: Callable[..., T], *args: Any) -> T:
+        """同步执行 func(conn, *args) 并返回结果（工作线程内调用时直接执行）"""
+        if threading.get_ident() == self._thread_id:
+            return self._call(func, args)
+        return self.submit(func, *args).result()
+
+    async def call(self, func: Callable[..., T], *args: Any) -> T:
+        """在工作线程执行 func(conn, *args) 并等待结果，不阻塞事件循环"""
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def write(self, sql: str, params: tuple = ()) -> Future[int]:
+        """
+        提交一条写语句，与其它待执行的写入合并到同一事务
+
+        Returns:
+            Future，结果为该语句影响的行数
+        """
+        future: Future[int] = Future()
+        with self._pending_lock:
+            if self._closed:
+                raise RuntimeError("数据库已关闭")
+            self._pending.append((future, sql, tuple(params)))
+            # 持锁提交：close() 置位关闭标志后才会停止线程，已入队的写入必有 flush
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                self._executor.submit(self._flush)
+        return future
+
+    def write_many(self, sql: str, params_seq) -> Future[int]:
+        """
+        同一写语句的多组参数在一个事务中 executemany 提交（此前提交的写入先执行）
+
+        Returns:
+            Future，结果为影响的总行数
+        """
+        return self.submit(self._executemany, sql, [tuple(p) for p in params_seq])
+
+    def _executemany(self, conn: sqlite3.Connection, sql: str, rows: list) -> int:
+        conn.execute("BEGIN")
+        try:
+            count = conn.executemany(sql, rows).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            self._rollback()
+            raise
+        self.write_count += len(rows)
+        self.write_batches += 1
+        return count
+
+    def _flush(self) -> None:
+        """在工作线程中把待执行的写入放进一个事务提交"""
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+            self._flush_scheduled = False
+        if not batch:
+            return
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            counts = [conn.execute(sql, params).rowcount for _, sql, params in batch]
+            conn.execute("COMMIT")
+        except Exception:
+            # 整批失败时逐条重试，只让出错的语句失败
+            self._rollback()
+            self._execute_each(batch)
+            return
+        self.write_count += len(batch)
+        self.write_batches += 1
+        for (future, _, _), count in zip(batch, counts):
+            future.set_result(count)
+
+    def _rollback(self) -> None:
+        if self._conn is not None and self._conn.in_transaction:
+            try:
+                self._conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+
+    def _execute_each(self, batch: list[tuple[Future, str, tuple]]) -> None:
+        for future, sql, params in batch:
+            try:
+                count = self._connection().execute(sql, params).rowcount
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                self.write_count += 1
+                self.write_batches += 1
+                future.set_result(count)
+
+    def close(self) -> None:
+        """关闭连接并停止工作线程（已提交的写入与操作先执行完）"""
+        with self._pending_lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        def _close() -> None:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        self._executor.submit(_close)
+        self._executor.shutdown(wait=True)
+
+        # 兜底：任何未能执行的写入都以异常结束，调用方不会永远等待
+        with self._pending_lock:
+            leftover, self._pending = self._pending, []
+        for future, _, _ in leftover:
+            if not future.done():
+                future.set_exception(RuntimeError("数据库已关闭，写入未执行"))
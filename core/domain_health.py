@@ -0,0 +1,217 @@
+"""
+域名健康度跟踪
+
+jmcomic 按 client_domain 的顺序依次尝试域名，排在前面的域名失效时每个请求都要
+先耗尽它的重试次数。DomainHealth 在后台探测配置的域名，记录延迟 EWMA 与失败
+次数，按“可用优先、延迟从低到高”给出新客户端使用的域名顺序；状态持久化到
+数据目录，重启后直接沿用上次的排序。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from astrbot.api import logger
+
+# 延迟 EWMA 的平滑系数（越大越偏向最近一次探测）
+_EWMA_ALPHA = 0.3
+# 连续失败达到该次数视为不可用，排到最后
+_FAILURE_THRESHOLD = 2
+# 单次探测超时（秒）
+PROBE_TIMEOUT = 5.0
+# 并行探测的线程数
+_PROBE_WORKERS = 4
+
+
+def http_probe(domain: str, timeout: float = PROBE_TIMEOUT, proxies=None) -> None:
+    """
+    默认探测方式：GET https://<domain>/
+
+    收到任何 5xx 以下的响应即视为可达（禁漫域名首页常返回 403/404），
+    连接失败、超时或 5xx 抛出异常。
+    """
+    url = f"https://{domain}/"
+    try:
+        from curl_cffi import requests as curl_requests
+    except ImportError:
+        curl_requests = None
+
+    if curl_requests is not None:
+        resp = curl_requests.get(
+            url, timeout=timeout, proxies=proxies or None, allow_redirects=False
+        )
+        status = resp.status_code
+    else:
+        import urllib.error
+        import urllib.request
+
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+    if status >= 500:
+        raise RuntimeError(f"HTTP {status}")
+
+
+class DomainHealth:
+    """域名健康度表（线程安全：探测在线程中执行，排序在事件循环中读取）"""
+
+    def __init__(
+        self,
+        state_path: Path | None = None,
+        transport: Callable[[str], None] | None = None,
+    ):
+        """
+        Args:
+            state_path: 状态文件路径，None 表示不持久化
+            transport: 探测函数，接收域名，失败时抛异常；默认 http_probe
+        """
+        self.state_path = state_path
+        self.transport = transport or http_probe
+        self._lock = threading.RLock()
+        # domain -> {ewma_ms, successes, failures, consecutive_failures, last_checked}
+        self._domains: dict[str, dict] = {}
+        self._load()
+
+    # ==================== 记录 ====================
+
+    def record_success(self, domain: str, latency: float) -> None:
+        """记录一次成功请求（latency 为秒）"""
+        latency_ms = latency * 1000
+        with self._lock:
+            entry = self._entry(domain)
+            ewma = entry["ewma_ms"]
+            entry["ewma_ms"] = (
+                latency_ms
+                if ewma is None
+                else _EWMA_ALPHA * latency_ms + (1 - _EWMA_ALPHA) * ewma
+            )
+            entry["successes"] += 1
+            entry["consecutive_failures"] = 0
+            entry["last_checked"] = time.time()
+
+    def record_failure(self, domain: str) -> None:
+        """记录一次失败请求"""
+        with self._lock:
+            entry = self._entry(domain)
+            entry["failures"] += 1
+            entry["consecutive_failures"] += 1
+            entry["last_checked"] = time.time()
+
+    def probe(self, domains: list[str]) -> None:
+        """并行探测一组域名并记录结果（阻塞，需在线程中调用）"""
+        if not domains:
+            return
+
+        def run(domain: str) -> tuple[str, float | None]:
+            started = time.monotonic()
+            try:
+                self.transport(domain)
+            except Exception as e:
+                logger.debug(f"域名探测失败 {domain}: {e}")
+                return domain, None
+            return domain, time.monotonic() - started
+
+        with ThreadPoolExecutor(
+            max_workers=min(_PROBE_WORKERS, len(domains)),
+            thread_name_prefix="jm-domain-probe",
+        ) as executor:
+            results = list(executor.map(run, domains))
+        for domain, latency in results:
+            if latency is None:
+                self.record_failure(domain)
+            else:
+                self.record_success(domain, latency)
+
+    # ==================== 查询 ====================
+
+    def is_healthy(self, domain: str) -> bool:
+        """最近未连续失败（未探测过的域名视为可用）"""
+        with self._lock:
+            entry = self._domains.get(domain)
+            return entry is None or entry["consecutive_failures"] < _FAILURE_THRESHOLD
+
+    def ordered(self, domains: list[str]) -> list[str]:
+        """
+        按健康度排序：可用优先，其次延迟 EWMA 从低到高；
+        未探测过的域名排在已知可用域名之后，同等情况下保持配置顺序
+        """
+
+        def key(item: tuple[int, str]):
+            index, domain = item
+            entry = self._domains.get(domain)
+            ewma = entry["ewma_ms"] if entry else None
+            return (
+                not self.is_healthy(domain),
+                ewma if ewma is not None else float("inf"),
+                index,
+            )
+
+        with self._lock:
+            return [domain for _, domain in sorted(enumerate(domains), key=key)]
+
+    def stats(self, domains: list[str]) -> list[dict]:
+        """按排序返回各域名状态：{domain, healthy, ewma_ms, failures}"""
+        result = []
+        for domain in self.ordered(domains):
+            with self._lock:
+                entry = dict(self._domains.get(domain) or {})
+            result.append(
+                {
+                    "domain": domain,
+                    "healthy": self.is_healthy(domain),
+                    "ewma_ms": entry.get("ewma_ms"),
+                    "failures": entry.get("failures", 0),
+                }
+            )
+        return result
+
+    # ==================== 持久化 ====================
+
+    def save(self) -> None:
+        """原子写入状态文件"""
+        if self.state_path is None:
+            return
+        with self._lock:
+            payload = json.dumps(self._domains)
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_suffix(".json.tmp")
+            tmp.write_text(payload, encoding="utf-8")
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.debug(f"保存域名健康状态失败: {e}")
+
+    def _load(self) -> None:
+        if self.state_path is None:
+            return
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.debug(f"域名健康状态损坏，重新记录: {e}")
+            return
+        if isinstance(data, dict):
+            for domain, entry in data.items():
+                if isinstance(entry, dict):
+                    self._entry(domain).update(entry)
+
+    def _entry(self, domain: str) -> dict:
+        return self._domains.setdefault(
+            domain,
+            {
+                "ewma_ms": None,
+                "successes": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "last_checked": 0.0,
+            },
+        )
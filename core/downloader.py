@@ -7,22 +7,43 @@ JMComic 下载管理模块
 from __future__ import annotations
 
 import asyncio
-from collections.abc import Callable
-from dataclasses import dataclass
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass, field, replace
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
+from astrbot.api import logger
+
 from .base import JMClientMixin, JMConfigManager
+from .base.client_pool import CLIENT_POOL
+from .concurrency import AdaptiveConcurrency
 from .errors import classify_exception
 from .jmcomic_loader import import_jmcomic, is_jmcomic_available
+from .manifest import DownloadManifest
+from .progress import ProgressStream, throttle_progress
+from .retry import backoff_delay, rotate_domains, rotate_host
 
 if TYPE_CHECKING:
     from jmcomic import JmOption
 
+    from .packer import PackPipeline
+
 JMCOMIC_AVAILABLE = is_jmcomic_available()
 
 _PROGRESS_DOWNLOADER_CLASS = None
 
+# 排队通知使用的进度单位：回调收到 (排队位置, 排队总数, QUEUE_PROGRESS_UNIT)
+QUEUE_PROGRESS_UNIT = "queue"
+
+# 下载优先级：管理员优先，后台任务（如订阅预取）最后
+PRIORITY_ADMIN = 1
+PRIORITY_NORMAL = 0
+PRIORITY_BACKGROUND = -1
+
 
 def _get_progress_downloader_class(jmcomic):
     """惰性构建一个带进度计数的 JmDownloader 子类（jmcomic 可用时才能定义）。"""
@@ -31,7 +52,7 @@ def _get_progress_downloader_class(jmcomic):
         return _PROGRESS_DOWNLOADER_CLASS
 
     class _ProgressDownloader(jmcomic.JmDownloader):
-        """记录下载进度，供上层轮询展示。
+        """记录下载进度，并在每次变化时推送给上层（progress_sink）。
 
         进度口径（重要）：
         - 多章节相册：按“章节”计。API 端 album.page_count 恒为 0（jmcomic 的
@@ -48,18 +69,77 @@ def _get_progress_downloader_class(jmcomic):
             self.total_photos = 0  # 相册章节总数（多章节按章计进度）
             self.downloaded_photos = 0
             self.skip_photos = 0  # 增量下载时跳过的前置章节数
+            # 进度推送回调 (done, total, unit)，在下载线程中调用，需线程安全
+            self.progress_sink: Callable[[int, int, str], None] | None = None
+            # 断点续传：清单目录（None 表示关闭）与本次加载的清单
+            self.manifest_root: Path | None = None
+            self.manifest: DownloadManifest | None = None
+            self.resumed_photos = 0  # 清单校验通过、本次跳过的章节数
+            # 流水线打包：章节完整下载后通知写入线程
+            self.pack_pipeline: PackPipeline | None = None
+            # 自适应并发：所有下载共享的图片请求并发上限
+            self.concurrency: AdaptiveConcurrency | None = None
 
         def create_client(self):
-            # 每个下载使用独立 client，避免与其他并发操作共享状态
-            return self.option.new_jm_client()
+            # 整个下载租用一个池化客户端（退出 with 时归还）：客户端缓存、域名重试
+            # 状态留在同一客户端上，会话由各下载线程共享、按线程保持连接
+            client, self._client_identity = CLIENT_POOL.acquire(self.option)
+            return client
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            try:
+                return super().__exit__(exc_type, exc_val, exc_tb)
+            finally:
+                CLIENT_POOL.release(self.client, self._client_identity)
 
         def do_filter(self, detail):
-            # 增量下载：仅对本子跳过前 skip_photos 个章节，其余不过滤
-            if self.skip_photos and detail.is_album():
-                return list(detail)[self.skip_photos :]
-            return detail
+            if not detail.is_album():
+                return detail
+            # 增量下载：仅对本子跳过前 skip_photos 个章节
+            photos = list(detail)[self.skip_photos :] if self.skip_photos else detail
+            remaining = photos
+            # 断点续传：跳过清单中已完成且校验通过的章节
+            if self.manifest is not None and self.manifest.existed:
+                remaining = [
+                    photo
+                    for photo in photos
+                    if not self.manifest.photo_verified(photo.photo_id)
+                ]
+                self.resumed_photos = len(photos) - len(remaining)
+                self.downloaded_photos += self.resumed_photos
+            if self.pack_pipeline is not None:
+                self._start_pipeline(detail, photos, remaining)
+            return remaining
+
+        def _start_pipeline(self, album, photos, remaining) -> None:
+            """登记待打包章节（按阅读顺序），续传跳过的章节已完整、直接就绪"""
+            self.pack_pipeline.expect(
+                Path(self.option.dir_rule.decide_album_root_dir(album)),
+                [
+                    (
+                        photo.photo_id,
+                        Path(
+                            self.option.decide_image_save_dir(
+                                photo, ensure_exists=False
+                            )
+                        ),
+                    )
+                    for photo in photos
+                ],
+            )
+            pending = {photo.photo_id for photo in remaining}
+            for photo in photos:
+                if photo.photo_id not in pending:
+                    self.pack_pipeline.ready(photo.photo_id)
+
+        def _ensure_manifest(self, album_id) -> None:
+            if self.manifest is None and self.manifest_root is not None:
+                self.manifest = DownloadManifest.for_album(
+                    self.manifest_root, str(album_id)
+                )
 
         def before_album(self, album):
+            self._ensure_manifest(album.album_id)
             super().before_album(album)
             # 用章节总数（扣除增量跳过的章节）作为相册进度分母
             try:
@@ -68,6 +148,9 @@ def _get_progress_downloader_class(jmcomic):
                 self.total_photos = 0
 
         def before_photo(self, photo):
+            self._ensure_manifest(photo.album_id)
+            if self.manifest is not None:
+                self.manifest.begin_photo(photo.photo_id, photo.index, len(photo))
             super().before_photo(photo)
             # 单章场景（/jmc 无 album，或单章节相册）才按图片数计进度
             if self.total_photos <= 1 and not self.total_images:
@@ -78,11 +161,60 @@ def _get_progress_downloader_class(jmcomic):
 
         def after_photo(self, photo):
             super().after_photo(photo)
+            if self.manifest is not None:
+                self.manifest.complete_photo(photo.photo_id)
+            # 有失败图片的章节留到重试结束后再写入
+            if self.pack_pipeline is not None and not any(
+                image.from_photo.photo_id == photo.photo_id
+                for image, _ in self.download_failed_image
+            ):
+                self.pack_pipeline.ready(photo.photo_id)
             self.downloaded_photos += 1
+            self._push_progress()
+
+        def before_image(self, image, img_save_path):
+            # 上次中断留下的文件（未记录或校验不符）可能只写了一半，删除后重新下载
+            photo_id = image.from_photo.photo_id
+            if (
+                image.exists
+                and self.manifest is not None
+                and self.manifest.had_photo(photo_id)
+                and not self.manifest.verify_image(photo_id, Path(img_save_path))
+            ):
+                try:
+                    Path(img_save_path).unlink()
+                    image.exists = False
+                except OSError:
+                    pass
+            super().before_image(image, img_save_path)
+
+        def download_by_image_detail(self, image):
+            if self.concurrency is None:
+                return super().download_by_image_detail(image)
+            with self.concurrency.slot():
+                started = time.monotonic()
+                try:
+                    result = super().download_by_image_detail(image)
+                except Exception as e:
+                    self.concurrency.record(time.monotonic() - started, e)
+                    raise
+                # 已存在而跳过的图片没有发起请求，不计入延迟统计
+                if not (image.exists and image.cache):
+                    self.concurrency.record(time.monotonic() - started)
+                return result
 
         def after_image(self, image, img_save_path):
             super().after_image(image, img_save_path)
+            if self.manifest is not None:
+                self.manifest.record_image(
+                    image.from_photo.photo_id, Path(img_save_path)
+                )
             self.downloaded_images += 1
+            self._push_progress()
+
+        def _push_progress(self):
+            if self.progress_sink is not None:
+                self.progress_sink(*self.progress_view())
 
         def progress_view(self):
             """返回 (已完成, 总数, 单位)；多章节相册按章节，否则按图片。"""
@@ -107,6 +239,24 @@ def _resolve_all_success(downloader, skip_photos: int) -> bool:
     return bool(getattr(downloader, "all_success", True))
 
 
+def _manifest_failures(
+    manifest: DownloadManifest, photo_ids: list[str]
+) -> tuple[int, list[str]]:
+    """
+    按清单统计缺失图片数与未完成章节
+
+    章节详情都未取到（图片总数未知）的章节按缺 1 张计。
+    """
+    failed_images = 0
+    incomplete: list[str] = []
+    for photo_id in photo_ids:
+        missing = manifest.missing_images(photo_id)
+        if missing != 0:
+            failed_images += missing if missing > 0 else 1
+            incomplete.append(str(photo_id))
+    return failed_images, incomplete
+
+
 @dataclass
 class DownloadResult:
     """下载结果"""
@@ -123,6 +273,174 @@ class DownloadResult:
     # 下载完整性：all_success 为 False 表示有图片/章节未成功下载
     all_success: bool = True
     failed_images: int = 0
+    # 未完整下载的章节ID（可据此定向重试）
+    incomplete_photos: list[str] = field(default_factory=list)
+    # 各阶段耗时（秒）：download 为首轮下载，retry 为失败重试
+    phase_timings: dict[str, float] = field(default_factory=dict)
+    # 共享同一次下载的调用方序号：0 为发起者，>0 为后加入者（用于区分打包文件名）
+    share_index: int = 0
+
+
+@dataclass(eq=False)
+class _Ticket:
+    """调度器中的一个排队下载"""
+
+    owner: str
+    priority: int
+    cost: int
+    granted: asyncio.Future = field(repr=False)
+
+
+class DownloadScheduler:
+    """
+    全局下载调度器
+
+    限制同时进行的下载数与图片下载线程总数；排队时高优先级先行，同一优先级内
+    按来源（群/用户）轮转，避免单个群连发的下载占满队列。
+    """
+
+    def __init__(self, max_jobs: int, max_workers: int = 0):
+        """
+        初始化调度器
+
+        Args:
+            max_jobs: 同时进行的下载数上限，<=0 表示不限
+            max_workers: 图片下载线程总数上限，<=0 表示不限（单个任务超限时独占运行）
+        """
+        self.max_jobs = max(0, int(max_jobs))
+        self.max_workers = max(0, int(max_workers))
+        self.running = 0
+        self.workers_in_use = 0
+        # priority -> owner -> 该来源的排队任务；OrderedDict 的顺序即轮转顺序
+        self._queues: dict[int, OrderedDict[str, deque[_Ticket]]] = {}
+
+    @property
+    def queued(self) -> int:
+        """排队中的任务数"""
+        return sum(
+            len(tickets)
+            for owners in self._queues.values()
+            for tickets in owners.values()
+        )
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        owner: str,
+        priority: int = PRIORITY_NORMAL,
+        cost: int = 1,
+        on_queued: Callable[[int, int], Any] | None = None,
+    ) -> AsyncIterator[None]:
+        """
+        获取一个下载名额，退出上下文时释放
+
+        Args:
+            owner: 公平排队的来源（群ID或用户ID）
+            priority: 优先级，数值越大越先执行
+            cost: 该任务占用的图片下载线程数
+            on_queued: 需要排队时的通知协程 (排队位置, 排队总数)
+        """
+        ticket = _Ticket(
+            owner=owner,
+            priority=priority,
+            cost=max(1, cost),
+            granted=asyncio.get_running_loop().create_future(),
+        )
+        if self.queued == 0 and self._can_start(ticket.cost):
+            self._start(ticket)
+        else:
+            self._queues.setdefault(priority, OrderedDict()).setdefault(
+                owner, deque()
+            ).append(ticket)
+            if on_queued is not None:
+                try:
+                    await on_queued(self.position(ticket), self.queued)
+                except Exception:
+                    pass
+            try:
+                await ticket.granted
+            except asyncio.CancelledError:
+                if ticket.granted.done() and not ticket.granted.cancelled():
+                    self._release(ticket)
+                else:
+                    self._remove(ticket)
+                raise
+
+        try:
+            yield
+        finally:
+            self._release(ticket)
+
+    def position(self, ticket: _Ticket) -> int:
+        """任务在执行顺序中的位置（从1开始），不在队列中返回 0"""
+        for index, queued in enumerate(self._service_order(), start=1):
+            if queued is ticket:
+                return index
+        return 0
+
+    def stats(self) -> dict:
+        """返回 {running, queued, workers}"""
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "workers": self.workers_in_use,
+        }
+
+    def _service_order(self):
+        """按调度顺序遍历排队任务：优先级降序，同优先级内按来源轮转"""
+        for priority in sorted(self._queues, reverse=True):
+            owners = list(self._queues[priority].values())
+            depth = max((len(tickets) for tickets in owners), default=0)
+            for round_index in range(depth):
+                for tickets in owners:
+                    if round_index < len(tickets):
+                        yield tickets[round_index]
+
+    def _can_start(self, cost: int) -> bool:
+        if self.max_jobs and self.running >= self.max_jobs:
+            return False
+        if self.max_workers and self.running:
+            return self.workers_in_use + cost <= self.max_workers
+        return True
+
+    def _start(self, ticket: _Ticket) -> None:
+        self.running += 1
+        self.workers_in_use += ticket.cost
+
+    def _release(self, ticket: _Ticket) -> None:
+        self.running -= 1
+        self.workers_in_use -= ticket.cost
+        self._dispatch()
+
+    def _remove(self, ticket: _Ticket) -> None:
+        owners = self._queues.get(ticket.priority)
+        tickets = owners.get(ticket.owner) if owners else None
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del owners[ticket.owner]
+            if not owners:
+                del self._queues[ticket.priority]
+        # 队首被移除后，后面的任务可能已可执行
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """按调度顺序放行队首任务，直到名额用尽（队首放不下时不越过它，避免饿死）"""
+        while True:
+            head = next(self._service_order(), None)
+            if head is None or not self._can_start(head.cost):
+                return
+            owners = self._queues[head.priority]
+            owners[head.owner].popleft()
+            # 被服务的来源移到轮转末尾
+            if owners[head.owner]:
+                owners.move_to_end(head.owner)
+            else:
+                del owners[head.owner]
+            if not owners:
+                del self._queues[head.priority]
+            self._start(head)
+            head.granted.set_result(None)
 
 
 class JMDownloadManager(JMClientMixin):
@@ -137,20 +455,47 @@ class JMDownloadManager(JMClientMixin):
         """
         self.config = config_manager
         self._current_progress = {}
+        # 进行中的下载：key -> {"task", "progress", "sharers"}
+        self._inflight: dict[str, dict] = {}
+        # 下载目录的使用者计数：共享下载的目录需最后一个使用者发送完才清理
+        self._save_path_refs: dict[Path, int] = {}
+        # 同一本子目录的下载串行执行（不同 skip 不合并，但不能同时写同一目录）；
+        # 计数含排队与进行中的调用，非零时目录不会被清理
+        self._album_locks: dict[str, asyncio.Lock] = {}
+        self._album_users: dict[str, int] = {}
+        self._save_path_albums: dict[Path, str] = {}
+        self.coalesced_downloads = 0
+        self.scheduler = DownloadScheduler(
+            config_manager.download_max_concurrent,
+            config_manager.download_max_image_workers,
+        )
+        self.concurrency = (
+            AdaptiveConcurrency(*self._concurrency_bounds())
+            if config_manager.adaptive_concurrency
+            else None
+        )
 
     async def download_album(
         self,
         album_id: str,
         progress_callback: Callable[[int, int], Any] | None = None,
         skip_photos: int = 0,
+        owner: str = "",
+        priority: int = PRIORITY_NORMAL,
+        pack_pipeline: PackPipeline | None = None,
     ) -> DownloadResult:
         """
         异步下载本子
 
         Args:
             album_id: 本子ID
-            progress_callback: 进度回调协程 (current, total)，按 25% 步进调用
+            progress_callback: 进度回调协程 (done, total, unit)，按 ~10% 步进调用；
+                排队时以 (排队位置, 排队总数, QUEUE_PROGRESS_UNIT) 调用
             skip_photos: 跳过前 N 个章节（用于增量下载新章节）
+            owner: 公平排队的来源（群ID或用户ID）
+            priority: 调度优先级（PRIORITY_ADMIN/NORMAL/BACKGROUND）
+            pack_pipeline: 流水线打包；仅在本次调用实际发起下载时启用
+                （pack_pipeline.started），合并到进行中下载时不使用
 
         Returns:
             DownloadResult 下载结果
@@ -181,11 +526,24 @@ class JMDownloadManager(JMClientMixin):
                     error_message="无法创建下载配置",
                 )
 
-            return await self._run_with_progress(
-                self._download_album_sync,
-                (album_id, option, skip_photos),
-                progress_callback,
-            )
+            sync_func = self._download_album_sync
+            if pack_pipeline is not None:
+                sync_func = partial(sync_func, pack_pipeline=pack_pipeline)
+            self._album_users[album_id] = self._album_users.get(album_id, 0) + 1
+            try:
+                return await self._run_with_progress(
+                    f"album:{album_id}:{max(0, int(skip_photos))}",
+                    sync_func,
+                    (album_id, option, skip_photos),
+                    progress_callback,
+                    owner=owner,
+                    priority=priority,
+                    cost=self.config.max_concurrent_photos
+                    * self.config.max_concurrent_images,
+                    album_id=album_id,
+                )
+            finally:
+                self._leave_album(album_id)
 
         except Exception as e:
             _, friendly = classify_exception(e)
@@ -205,7 +563,8 @@ class JMDownloadManager(JMClientMixin):
         album_id: str,
         option: JmOption,
         skip_photos: int = 0,
-        progress_holder: dict | None = None,
+        progress_sink: Callable[[int, int, str], None] | None = None,
+        pack_pipeline: PackPipeline | None = None,
     ) -> DownloadResult:
         """同步下载本子（在线程池中执行）"""
         try:
@@ -226,25 +585,49 @@ class JMDownloadManager(JMClientMixin):
             downloader_cls = _get_progress_downloader_class(jmcomic)
             downloader = downloader_cls(option)
             downloader.skip_photos = max(0, int(skip_photos))
-            # 暴露下载器实例供上层轮询进度
-            if progress_holder is not None:
-                progress_holder["downloader"] = downloader
+            downloader.progress_sink = progress_sink
+            downloader.manifest_root = self._manifest_root()
+            downloader.concurrency = self.concurrency
+            downloader.pack_pipeline = pack_pipeline
 
-            # 直接驱动下载器（不使用 check_exception），部分失败由下方统计读取
-            with downloader:
-                album = downloader.download_album(parsed_id)
+            # 直接驱动下载器（不使用 check_exception），部分失败先定向重试，
+            # 剩余失败由下方统计读取
+            timings: dict[str, float] = {}
+            try:
+                with downloader:
+                    started = time.monotonic()
+                    album = downloader.download_album(parsed_id)
+                    timings["download"] = time.monotonic() - started
+                    timings["retry"] = self._retry_failures(jmcomic, downloader, option)
+            finally:
+                if downloader.manifest is not None:
+                    downloader.manifest.save()
+                # 重试结束，剩余章节按现状写入
+                if pack_pipeline is not None:
+                    pack_pipeline.seal()
 
             save_path = Path(option.dir_rule.decide_album_root_dir(album))
 
             failed_images = len(getattr(downloader, "download_failed_image", []))
             failed_images += len(getattr(downloader, "download_failed_photo", []))
-            all_success = _resolve_all_success(downloader, skip_photos)
+            all_success = _resolve_all_success(
+                downloader, skip_photos + downloader.resumed_photos
+            )
 
             # API 端 album.page_count 恒为 0，改用下载器实际累计的图片数作为图片总数
             image_count = (
                 getattr(downloader, "downloaded_images", 0) or album.page_count
             )
 
+            incomplete_photos: list[str] = []
+            if downloader.manifest is not None:
+                photo_ids = [p.photo_id for p in list(album)[downloader.skip_photos :]]
+                failed_images, incomplete_photos = _manifest_failures(
+                    downloader.manifest, photo_ids
+                )
+                image_count = downloader.manifest.image_count(photo_ids) or image_count
+                all_success = all_success and not incomplete_photos
+
             return DownloadResult(
                 success=True,
                 album_id=str(album.id),
@@ -255,6 +638,8 @@ class JMDownloadManager(JMClientMixin):
                 save_path=save_path,
                 all_success=all_success,
                 failed_images=failed_images,
+                incomplete_photos=incomplete_photos,
+                phase_timings=timings,
             )
 
         except Exception as e:
@@ -274,6 +659,9 @@ class JMDownloadManager(JMClientMixin):
         self,
         photo_id: str,
         progress_callback: Callable[[int, int], Any] | None = None,
+        owner: str = "",
+        priority: int = PRIORITY_NORMAL,
+        album_id: str = "",
     ) -> DownloadResult:
         """
         异步下载章节
@@ -281,6 +669,10 @@ class JMDownloadManager(JMClientMixin):
         Args:
             photo_id: 章节ID
             progress_callback: 进度回调协程 (current, total)
+            owner: 公平排队的来源（群ID或用户ID）
+            priority: 调度优先级
+            album_id: 所属本子ID；章节写入本子目录与本子的下载清单，
+                给出时与同一本子的其它下载串行执行
 
         Returns:
             DownloadResult 下载结果
@@ -311,9 +703,22 @@ class JMDownloadManager(JMClientMixin):
                     error_message="无法创建下载配置",
                 )
 
-            return await self._run_with_progress(
-                self._download_photo_sync, (photo_id, option), progress_callback
-            )
+            if album_id:
+                self._album_users[album_id] = self._album_users.get(album_id, 0) + 1
+            try:
+                return await self._run_with_progress(
+                    f"photo:{photo_id}",
+                    self._download_photo_sync,
+                    (photo_id, option),
+                    progress_callback,
+                    owner=owner,
+                    priority=priority,
+                    cost=self.config.max_concurrent_images,
+                    album_id=album_id,
+                )
+            finally:
+                if album_id:
+                    self._leave_album(album_id)
 
         except Exception as e:
             _, friendly = classify_exception(e)
@@ -332,7 +737,7 @@ class JMDownloadManager(JMClientMixin):
         self,
         photo_id: str,
         option: JmOption,
-        progress_holder: dict | None = None,
+        progress_sink: Callable[[int, int, str], None] | None = None,
     ) -> DownloadResult:
         """同步下载章节"""
         try:
@@ -352,11 +757,20 @@ class JMDownloadManager(JMClientMixin):
             parsed_id = jmcomic.JmcomicText.parse_to_jm_id(photo_id)
             downloader_cls = _get_progress_downloader_class(jmcomic)
             downloader = downloader_cls(option)
-            if progress_holder is not None:
-                progress_holder["downloader"] = downloader
+            downloader.progress_sink = progress_sink
+            downloader.manifest_root = self._manifest_root()
+            downloader.concurrency = self.concurrency
 
-            with downloader:
-                photo = downloader.download_photo(parsed_id)
+            timings: dict[str, float] = {}
+            try:
+                with downloader:
+                    started = time.monotonic()
+                    photo = downloader.download_photo(parsed_id)
+                    timings["download"] = time.monotonic() - started
+                    timings["retry"] = self._retry_failures(jmcomic, downloader, option)
+            finally:
+                if downloader.manifest is not None:
+                    downloader.manifest.save()
 
             save_path = Path(option.decide_image_save_dir(photo))
             image_count = len(photo.images) if hasattr(photo, "images") else 0
@@ -365,6 +779,13 @@ class JMDownloadManager(JMClientMixin):
             failed_images += len(getattr(downloader, "download_failed_photo", []))
             all_success = bool(getattr(downloader, "all_success", True))
 
+            incomplete_photos: list[str] = []
+            if downloader.manifest is not None:
+                failed_images, incomplete_photos = _manifest_failures(
+                    downloader.manifest, [photo.photo_id]
+                )
+                all_success = all_success and not incomplete_photos
+
             return DownloadResult(
                 success=True,
                 album_id=str(photo.album_id)
@@ -377,6 +798,8 @@ class JMDownloadManager(JMClientMixin):
                 save_path=save_path,
                 all_success=all_success,
                 failed_images=failed_images,
+                incomplete_photos=incomplete_photos,
+                phase_timings=timings,
             )
 
         except Exception as e:
@@ -394,43 +817,270 @@ class JMDownloadManager(JMClientMixin):
 
     async def _run_with_progress(
         self,
+        key: str,
         sync_func: Callable[..., DownloadResult],
         args: tuple,
         progress_callback: Callable[[int, int], Any] | None,
+        owner: str = "",
+        priority: int = PRIORITY_NORMAL,
+        cost: int = 1,
+        album_id: str = "",
     ) -> DownloadResult:
-        """在线程池执行同步下载，并按需轮询下载器进度回调上层。"""
-        progress_holder: dict = {}
-        task = asyncio.create_task(self._run_sync(sync_func, *args, progress_holder))
+        """在线程池执行同步下载，并把下载器推送的进度节流后回调上层。
+
+        下载先经全局调度器排队获取名额。同一 key 的下载进行中（含排队中）时，
+        后来的调用方直接挂到该任务上，共享下载结果与进度，不再重复下载到同一
+        目录；各调用方仍各自打包与发送。key 不同但属于同一本子（album_id）的
+        下载按到达顺序串行，后者借助下载清单跳过前者已完成的章节。
+        """
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = {"progress": ProgressStream(), "sharers": 0, "callbacks": []}
+            if progress_callback is not None:
+                entry["callbacks"].append(progress_callback)
+            task = asyncio.create_task(
+                self._run_scheduled(
+                    entry, sync_func, args, owner or key, priority, cost, album_id
+                )
+            )
+            entry["task"] = task
+            self._inflight[key] = entry
+            task.add_done_callback(
+                lambda _t, k=key, e=entry: self._discard_inflight(k, e)
+            )
+            # 下载结束（含异常/取消）时结束进度流，订阅方随之退出
+            task.add_done_callback(lambda _t, e=entry: e["progress"].close())
+            share_index = 0
+        else:
+            entry["sharers"] += 1
+            share_index = entry["sharers"]
+            if progress_callback is not None:
+                entry["callbacks"].append(progress_callback)
+            self.coalesced_downloads += 1
+            logger.info(f"下载任务 {key} 进行中，共享其结果")
+
+        task = entry["task"]
         if progress_callback is not None:
-            await self._poll_progress(task, progress_holder, progress_callback)
-        return await task
+            await self._forward_progress(entry["progress"], progress_callback)
+        # shield：某个调用方被取消不影响共享同一下载的其它调用方
+        result = await asyncio.shield(task)
+
+        if result.success:
+            path = result.save_path
+            self._save_path_refs[path] = self._save_path_refs.get(path, 0) + 1
+            if album_id:
+                self._save_path_albums[path] = album_id
+        if share_index:
+            result = replace(result, share_index=share_index)
+        return result
+
+    async def _run_scheduled(
+        self,
+        entry: dict,
+        sync_func: Callable[..., DownloadResult],
+        args: tuple,
+        owner: str,
+        priority: int,
+        cost: int,
+        album_id: str = "",
+    ) -> DownloadResult:
+        """取得本子目录锁与调度名额后在线程池中执行同步下载"""
+
+        async def _on_queued(position: int, total: int) -> None:
+            for callback in list(entry["callbacks"]):
+                try:
+                    await callback(position, total, QUEUE_PROGRESS_UNIT)
+                except Exception as e:
+                    logger.debug(f"推送排队位置失败: {e}")
+
+        # 先等目录锁再排队，避免等锁的下载占用调度名额
+        async with (
+            self._album_lock(album_id),
+            self.scheduler.slot(owner, priority, cost, _on_queued),
+        ):
+            return await self._run_sync(sync_func, *args, entry["progress"].publish)
+
+    def _album_lock(self, album_id: str) -> asyncio.Lock | nullcontext:
+        if not album_id:
+            return nullcontext()
+        return self._album_locks.setdefault(album_id, asyncio.Lock())
+
+    def _leave_album(self, album_id: str) -> None:
+        remaining = self._album_users.get(album_id, 0) - 1
+        if remaining > 0:
+            self._album_users[album_id] = remaining
+            return
+        self._album_users.pop(album_id, None)
+        lock = self._album_locks.get(album_id)
+        if lock is not None and not lock.locked():
+            del self._album_locks[album_id]
+
+    def _retry_failures(self, jmcomic, downloader, option: JmOption) -> float:
+        """
+        定向重试首轮失败的章节与图片（在下载线程中执行）
+
+        每轮先按指数退避等待，再轮换域名重下仍失败的条目；全部成功、轮数用尽
+        或超过截止时间即停止。结束后下载器的失败列表只保留最终仍失败的条目。
+
+        Returns:
+            重试阶段耗时（秒），无失败时为 0
+        """
+        rounds = max(0, int(self.config.download_retry_rounds))
+        if not rounds or not downloader.has_download_failures:
+            return 0.0
+
+        started = time.monotonic()
+        deadline = started + max(0, self.config.download_retry_deadline)
+        api_domains = self.config.ordered_client_domain
+        image_domains = list(
+            getattr(jmcomic.JmModuleConfig, "DOMAIN_IMAGE_LIST", None) or []
+        )
+        for attempt in range(1, rounds + 1):
+            failed_photos = [p for p, _ in downloader.download_failed_photo]
+            failed_images = [i for i, _ in downloader.download_failed_image]
+            if not failed_photos and not failed_images:
+                break
+            delay = backoff_delay(attempt)
+            if time.monotonic() + delay >= deadline:
+                break
+            time.sleep(delay)
+            logger.info(
+                f"第 {attempt} 轮重试: {len(failed_photos)} 个章节, "
+                f"{len(failed_images)} 张图片"
+            )
+
+            downloader.download_failed_photo = []
+            downloader.download_failed_image = []
+            if failed_photos and len(api_domains) > 1:
+                # 本轮按轮换后的域名从共享池租用一个客户端，用完归还
+                domains = rotate_domains(api_domains, attempt)
+                with CLIENT_POOL.lease(option, domains) as client:
+                    self._retry_photos(downloader, failed_photos, client)
+            elif failed_photos:
+                self._retry_photos(downloader, failed_photos, downloader.client)
+
+            touched_photos = {}
+            for image in failed_images:
+                image.img_url = rotate_host(image.img_url, image_domains)
+                touched_photos[image.from_photo.photo_id] = image.from_photo
+                try:
+                    downloader.download_by_image_detail(image)
+                except Exception as e:
+                    logger.debug(f"重试图片 {image.img_url} 失败: {e}")
+            # 补齐图片后重新判定章节是否完成
+            if downloader.manifest is not None:
+                for photo_id in touched_photos:
+                    downloader.manifest.complete_photo(photo_id)
+
+        elapsed = time.monotonic() - started
+        remaining = len(downloader.download_failed_photo) + len(
+            downloader.download_failed_image
+        )
+        logger.info(f"失败重试结束，用时 {elapsed:.1f}s，仍失败 {remaining} 项")
+        return elapsed
 
     @staticmethod
-    async def _poll_progress(
-        task: asyncio.Task,
-        progress_holder: dict,
+    def _retry_photos(downloader, photos: list, client) -> None:
+        """用指定客户端重下失败章节，结束后换回下载器原客户端"""
+        original_client = downloader.client
+        downloader.client = client
+        try:
+            for photo in photos:
+                try:
+                    downloader.download_by_photo_detail(photo)
+                except Exception as e:
+                    # catch_exception 已记入失败列表
+                    logger.debug(f"重试章节 {photo.photo_id} 失败: {e}")
+        finally:
+            downloader.client = original_client
+
+    def _concurrency_bounds(self) -> tuple[int, int]:
+        """自适应并发的上下限；上限未配置时取 章节线程数 × 图片线程数"""
+        upper = self.config.adaptive_concurrency_max or (
+            self.config.max_concurrent_photos * self.config.max_concurrent_images
+        )
+        return self.config.adaptive_concurrency_min, upper
+
+    def concurrency_stats(self) -> dict | None:
+        """自适应并发状态，未启用时返回 None"""
+        return self.concurrency.stats() if self.concurrency is not None else None
+
+    def _manifest_root(self) -> Path | None:
+        """断点续传清单目录，关闭续传时返回 None"""
+        if not self.config.download_resume:
+            return None
+        return self.config.download_dir
+
+    def drop_manifest(self, album_id: str) -> None:
+        """本子目录已清理时删除其下载清单"""
+        root = self._manifest_root()
+        if root is None or (root / str(album_id)).exists():
+            return
+        DownloadManifest.for_album(root, album_id).path.unlink(missing_ok=True)
+
+    def _discard_inflight(self, key: str, entry: dict) -> None:
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    def release_save_path(self, save_path: Path) -> bool:
+        """
+        释放对下载目录的使用
+
+        Returns:
+            是否为最后一个使用者（为 True 时才可清理该目录）；同一本子仍有
+            排队或进行中的下载，或本子目录与章节目录互相包含且仍在使用时
+            返回 False，由其调用方最后清理
+        """
+        remaining = self._save_path_refs.get(save_path, 0) - 1
+        if remaining > 0:
+            self._save_path_refs[save_path] = remaining
+            return False
+        self._save_path_refs.pop(save_path, None)
+        album_id = self._save_path_albums.pop(save_path, None)
+        if album_id and self._album_users.get(album_id):
+            return False
+        return not self._overlaps_in_use(save_path)
+
+    def _overlaps_in_use(self, path: Path) -> bool:
+        """是否有使用中的下载目录与 path 相同或互相包含（本子目录与章节目录）"""
+        return any(
+            used == path or path in used.parents or used in path.parents
+            for used in self._save_path_refs
+        )
+
+    @asynccontextmanager
+    async def hold_album_dir(
+        self, album_id: str, save_path: Path
+    ) -> AsyncIterator[bool]:
+        """
+        独占本子目录（用于清理）：等之前的下载结束，期间到达的下载排队
+
+        Yields:
+            目录是否空闲可清理（没有调用方在打包发送，也没有其它下载的调用方
+            尚未返回）
+        """
+        self._album_users[album_id] = self._album_users.get(album_id, 0) + 1
+        try:
+            async with self._album_lock(album_id):
+                yield (
+                    not self._overlaps_in_use(save_path)
+                    and self._album_users.get(album_id, 0) <= 1
+                )
+        finally:
+            self._leave_album(album_id)
+
+    @staticmethod
+    async def _forward_progress(
+        stream: ProgressStream,
         progress_callback: Callable[..., Any],
-        interval: float = 2.0,
     ) -> None:
-        """轮询下载器进度，按 ~10% 步进回调（避免刷屏，又不至于最后一段长时间无反馈）。
+        """订阅进度流，按 ~10% 步进回调（避免刷屏，又不至于最后一段长时间无反馈）。
 
         进度口径由下载器的 progress_view 决定（多章节相册按章节、否则按图片），
-        回调签名为 (done, total, unit)。
+        回调签名为 (done, total, unit)；进度流在下载结束时关闭，本协程随之返回。
         """
-        last_bucket = -1
-        while not task.done():
-            await asyncio.sleep(interval)
-            downloader = progress_holder.get("downloader")
-            view = getattr(downloader, "progress_view", None)
-            if view is None:
-                continue
-            done, total, unit = view()
-            if total <= 0 or done <= 0 or done >= total:
-                continue
-            bucket = int(done * 10 / total)
-            if bucket != last_bucket:
-                last_bucket = bucket
-                try:
-                    await progress_callback(done, total, unit)
-                except Exception:
-                    pass
+        async for event in throttle_progress(stream.subscribe()):
+            try:
+                await progress_callback(event.done, event.total, event.unit)
+            except Exception:
+                pass
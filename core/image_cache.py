@@ -0,0 +1,138 @@
+"""
+压缩图片缓存模块
+
+发送超时回退时需要把图片压缩后重发。CompressedImageCache 以
+“源文件路径 + 修改时间 + 大小 + 质量”为内容键保存压缩结果：同一张图片
+再次回退时直接复用磁盘上的文件，源文件变化后自动换用新键。
+按总字节数做 LRU 淘汰（以缓存文件的修改时间记录最近使用）。
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from astrbot.api import logger
+
+from .cover_cache import COMPRESS_QUALITY, compress_image
+
+
+class CompressedImageCache:
+    """压缩图片缓存 - 内容键 + 字节上限 LRU 淘汰"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总字节上限，<=0 表示不淘汰
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max(0, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        # 缓存总字节数（首次需要时扫描一次，之后增量维护）
+        self._total: int | None = None
+
+    @staticmethod
+    def make_key(source: Path, quality: int) -> str | None:
+        """计算内容键，源文件不存在时返回 None"""
+        try:
+            stat = source.stat()
+        except OSError:
+            return None
+        raw = f"{source.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{quality}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def get(self, source: Path, quality: int = COMPRESS_QUALITY) -> Path | None:
+        """
+        返回源图片的压缩版本，未缓存时压缩并写入缓存（会做 PIL 处理，应在线程中调用）
+
+        Returns:
+            压缩文件路径，源文件不存在或压缩失败返回 None
+        """
+        key = self.make_key(source, quality)
+        if key is None:
+            return None
+        target = self.cache_dir / f"{key}.jpg"
+        try:
+            os.utime(target)
+        except OSError:
+            pass
+        else:
+            self.hits += 1
+            return target
+
+        self.misses += 1
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if not compress_image(source, target, quality):
+            return None
+        logger.debug(
+            f"图片已压缩: {source.stat().st_size} -> {target.stat().st_size} bytes"
+        )
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan()
+            else:
+                self._total += target.stat().st_size
+        self.evict(keep=target)
+        return target
+
+    def _files(self) -> list[tuple[float, int, Path]]:
+        """(最近使用时间, 字节数, 路径) 列表"""
+        files = []
+        try:
+            entries = list(self.cache_dir.glob("*.jpg"))
+        except OSError:
+            return []
+        for path in entries:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _scan(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def evict(self, keep: Path | None = None) -> int:
+        """
+        按最近使用时间淘汰，直到总大小不超过上限
+
+        Args:
+            keep: 不参与淘汰的文件（刚写入的压缩图）
+
+        Returns:
+            淘汰的文件数
+        """
+        if self.max_bytes <= 0:
+            return 0
+        removed = 0
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan()
+            if self._total <= self.max_bytes:
+                return 0
+            for _, size, path in sorted(self._files(), key=lambda f: f[0]):
+                if self._total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                self._total -= size
+                removed += 1
+        self.evicted += removed
+        if removed:
+            logger.debug(f"压缩图片缓存淘汰 {removed} 项")
+        return removed
+
+    def stats(self) -> dict:
+        """返回 {hits, misses, evicted, bytes}（bytes 未统计过时为 None）"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "bytes": self._total,
+        }
@@ -0,0 +1,187 @@
+"""
+断点续传下载清单
+
+按本子记录已完成的章节与图片（大小 + SHA-256），重试或重启后只下载缺失或
+校验失败的文件。清单存放在 download_dir/.manifests/ 下，不进入打包目录。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from astrbot.api import logger
+
+# 清单格式版本，不兼容时丢弃旧清单
+_MANIFEST_VERSION = 1
+
+# 每记录多少张图片落盘一次（章节完成时也会落盘）
+_SAVE_EVERY_IMAGES = 20
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _file_digest(path: Path) -> tuple[int, str] | None:
+    """返回 (大小, sha256)，文件不存在返回 None"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(_HASH_CHUNK):
+                digest.update(chunk)
+        return path.stat().st_size, digest.hexdigest()
+    except OSError:
+        return None
+
+
+class DownloadManifest:
+    """单个本子的下载清单（线程安全，供 jmcomic 下载线程并发记录）"""
+
+    def __init__(self, path: Path, album_id: str):
+        """
+        加载或新建清单
+
+        Args:
+            path: 清单文件路径
+            album_id: 本子ID
+        """
+        self.path = path
+        self.album_id = str(album_id)
+        self._lock = threading.Lock()
+        # 串行化落盘：快照与写入在同一把锁内，后写入的总是更新的快照
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        # 本次运行中已校验通过的图片路径，避免重复计算哈希
+        self._verified: set[str] = set()
+        self._photos: dict[str, dict] = {}
+        self.existed = self._load()
+        # 加载时清单中已有的章节：这些章节目录里未记录的文件可能是中断残留
+        self._prior_photos = set(self._photos)
+
+    @classmethod
+    def for_album(cls, download_dir: Path, album_id: str) -> DownloadManifest:
+        """获取某本子的清单（位于 download_dir/.manifests/<album_id>.json）"""
+        return cls(download_dir / ".manifests" / f"{album_id}.json", album_id)
+
+    # ==================== 记录 ====================
+
+    def begin_photo(self, photo_id: str, index: int, image_total: int) -> None:
+        """章节开始下载：记录序号与图片总数"""
+        with self._lock:
+            photo = self._photos.setdefault(str(photo_id), {"images": {}})
+            photo["index"] = index
+            photo["image_total"] = image_total
+            photo["complete"] = False
+
+    def record_image(self, photo_id: str, path: Path) -> None:
+        """图片落盘后记录大小与哈希"""
+        key = str(path)
+        if key in self._verified:
+            return
+        info = _file_digest(path)
+        if info is None:
+            return
+        with self._lock:
+            photo = self._photos.setdefault(str(photo_id), {"images": {}})
+            photo["images"][key] = list(info)
+            self._verified.add(key)
+            self._unsaved += 1
+            flush = self._unsaved >= _SAVE_EVERY_IMAGES
+        if flush:
+            self.save()
+
+    def complete_photo(self, photo_id: str) -> None:
+        """章节全部图片已记录时标记完成并落盘"""
+        with self._lock:
+            photo = self._photos.get(str(photo_id))
+            if photo is None:
+                return
+            total = photo.get("image_total", -1)
+            photo["complete"] = len(photo["images"]) >= total >= 0
+        self.save()
+
+    # ==================== 校验 ====================
+
+    def verify_image(self, photo_id: str, path: Path) -> bool:
+        """已记录且大小、哈希与磁盘文件一致"""
+        key = str(path)
+        if key in self._verified:
+            return True
+        with self._lock:
+            expected = self._photos.get(str(photo_id), {}).get("images", {}).get(key)
+        if expected is None:
+            return False
+        ok = _file_digest(path) == tuple(expected)
+        if ok:
+            self._verified.add(key)
+        else:
+            with self._lock:
+                self._photos[str(photo_id)]["images"].pop(key, None)
+                self._photos[str(photo_id)]["complete"] = False
+        return ok
+
+    def photo_verified(self, photo_id: str) -> bool:
+        """章节已完成且所有图片校验通过"""
+        with self._lock:
+            photo = self._photos.get(str(photo_id))
+            if not photo or not photo.get("complete"):
+                return False
+            paths = list(photo["images"])
+        return all(self.verify_image(photo_id, Path(p)) for p in paths)
+
+    def had_photo(self, photo_id: str) -> bool:
+        """该章节在此前的下载中是否已开始过"""
+        return str(photo_id) in self._prior_photos
+
+    def missing_images(self, photo_id: str) -> int:
+        """章节尚缺的图片数；章节未开始（图片总数未知）返回 -1"""
+        with self._lock:
+            photo = self._photos.get(str(photo_id))
+            if not photo or "image_total" not in photo:
+                return -1
+            return max(0, photo["image_total"] - len(photo["images"]))
+
+    def image_count(self, photo_ids) -> int:
+        """给定章节已记录的图片总数"""
+        with self._lock:
+            return sum(
+                len(self._photos.get(str(pid), {}).get("images", {}))
+                for pid in photo_ids
+            )
+
+    # ==================== 持久化 ====================
+
+    def save(self) -> None:
+        """原子写入清单文件（多个线程同时保存时依次写入，不阻塞图片记录）"""
+        with self._save_lock:
+            with self._lock:
+                data = {
+                    "version": _MANIFEST_VERSION,
+                    "album_id": self.album_id,
+                    "photos": self._photos,
+                }
+                payload = json.dumps(data, ensure_ascii=False)
+                self._unsaved = 0
+            tmp = self.path.with_name(f".{self.path.name}.{threading.get_ident()}.tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp.write_text(payload, encoding="utf-8")
+                os.replace(tmp, self.path)
+            except OSError as e:
+                logger.debug(f"写入下载清单失败: {e}")
+                tmp.unlink(missing_ok=True)
+
+    def _load(self) -> bool:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.debug(f"下载清单损坏，重新记录: {e}")
+            return False
+        if data.get("version") != _MANIFEST_VERSION:
+            return False
+        self._photos = data.get("photos") or {}
+        return True
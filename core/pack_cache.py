@@ -0,0 +1,364 @@
+"""
+打包产物缓存模块
+
+把打包好的 ZIP/PDF/长图按内容键缓存到下载目录下，热门本子重复请求时
+直接从磁盘发送，跳过下载与打包。索引基于 SQLite，按总字节数做 LRU 淘汰。
+
+查询、写入与淘汰都涉及 SQLite 与文件移动（跨文件系统时是整文件复制），
+事件循环中应使用 get_async / put_async。正在发送的条目需固定（pin），
+淘汰时跳过，发送结束后 unpin。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from astrbot.api import logger
+
+
+class PackCache:
+    """打包产物缓存 - 基于 SQLite 索引 + 磁盘文件"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        """
+        初始化产物缓存
+
+        Args:
+            cache_dir: 缓存目录（通常为 download_dir/pack_cache）
+            max_bytes: 缓存总字节上限，<=0 表示关闭缓存
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max(0, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        # 正在发送的条目：key -> 固定次数（淘汰时跳过）
+        self._pins: dict[str, int] = {}
+        self._pins_lock = threading.Lock()
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._init_db()
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用缓存"""
+        return self.max_bytes > 0
+
+    @property
+    def db_path(self) -> Path:
+        """索引数据库路径"""
+        return self.cache_dir / "index.db"
+
+    def _init_db(self):
+        """初始化数据库表"""
+        try:
+            with self._get_connection() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS pack_cache (
+                        key TEXT PRIMARY KEY,
+                        album_id TEXT NOT NULL,
+                        file_path TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        meta TEXT,
+                        last_used REAL NOT NULL
+                    )
+                """)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"初始化打包缓存数据库失败: {e}")
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取数据库连接"""
+        return sqlite3.connect(self.db_path)
+
+    @staticmethod
+    def chapters_digest(photo_ids) -> str:
+        """章节ID列表摘要：章节被替换或重排时，即使章节数不变缓存键也随之变化"""
+        joined = ",".join(str(photo_id) for photo_id in photo_ids)
+        return hashlib.sha1(joined.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def make_key(
+        album_id: str,
+        chapters: str,
+        pack_format: str,
+        password: str,
+        image_suffix: str,
+        show_password: bool = False,
+    ) -> str:
+        """
+        计算缓存键
+
+        Args:
+            album_id: 本子ID
+            chapters: 章节集合描述（如 all:<章节摘要> / photo:345678 /
+                from:10:<章节摘要>）
+            pack_format: 打包格式
+            password: 打包密码（只参与哈希，不落盘明文）
+            image_suffix: 图片格式
+            show_password: 文件名是否带密码提示（影响产物文件名）
+
+        Returns:
+            十六进制缓存键
+        """
+        password_hash = hashlib.sha256(password.encode("utf-8")).hexdigest()
+        raw = "|".join(
+            [
+                str(album_id),
+                chapters,
+                pack_format.lower(),
+                password_hash,
+                image_suffix.lower(),
+                "1" if show_password else "0",
+            ]
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def pin(self, key: str) -> None:
+        """固定条目，发送期间不被淘汰"""
+        with self._pins_lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, key: str | None) -> None:
+        """解除一次固定（key 为 None 时忽略）"""
+        if key is None:
+            return
+        with self._pins_lock:
+            remaining = self._pins.get(key, 0) - 1
+            if remaining > 0:
+                self._pins[key] = remaining
+            else:
+                self._pins.pop(key, None)
+
+    def _pinned(self, key: str) -> bool:
+        with self._pins_lock:
+            return key in self._pins
+
+    async def get_async(self, key: str, pin: bool = False) -> dict | None:
+        """get 的异步版本：在线程中查询，不阻塞事件循环"""
+        return await asyncio.to_thread(self.get, key, pin)
+
+    async def put_async(
+        self, key: str, album_id: str, file_path: Path, meta: dict, pin: bool = False
+    ) -> Path | None:
+        """put 的异步版本：在线程中移动/复制文件与淘汰，不阻塞事件循环"""
+        return await asyncio.to_thread(self.put, key, album_id, file_path, meta, pin)
+
+    def get(self, key: str, pin: bool = False) -> dict | None:
+        """
+        查询缓存，命中时刷新最近使用时间
+
+        Args:
+            key: 缓存键
+            pin: 命中时固定条目（调用方发送完须 unpin）
+
+        Returns:
+            {"path": Path, "key": key, **meta}，未命中返回 None
+        """
+        if not self.enabled:
+            return None
+        if pin:
+            # 先固定再查询，查询与淘汰并发时不会返回刚被删除的文件
+            self.pin(key)
+        entry = self._lookup(key)
+        if entry is None and pin:
+            self.unpin(key)
+        return entry
+
+    def _lookup(self, key: str) -> dict | None:
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT file_path, meta FROM pack_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                path = Path(row[0])
+                if not path.is_file():
+                    # 文件被外部删除，索引作废
+                    conn.execute("DELETE FROM pack_cache WHERE key = ?", (key,))
+                    conn.commit()
+                    self.misses += 1
+                    return None
+
+                conn.execute(
+                    "UPDATE pack_cache SET last_used = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"查询打包缓存失败: {e}")
+            return None
+
+        self.hits += 1
+        entry = json.loads(row[1]) if row[1] else {}
+        entry["path"] = path
+        entry["key"] = key
+        return entry
+
+    def put(
+        self, key: str, album_id: str, file_path: Path, meta: dict, pin: bool = False
+    ) -> Path | None:
+        """
+        把打包产物移入缓存目录并登记，随后按字节上限淘汰最久未用的条目
+
+        Args:
+            key: 缓存键
+            album_id: 本子ID
+            file_path: 打包产物路径（会被移动到缓存目录）
+            meta: 命中时用于重建结果消息的元数据（标题、作者、章节数等）
+            pin: 写入成功时固定条目（调用方发送完须 unpin）
+
+        Returns:
+            产物在缓存中的新路径；未缓存（关闭、过大、已有同键条目或失败）返回 None，
+            原文件保持不动
+        """
+        if pin:
+            # 先固定，登记后与其它线程的淘汰并发时也不会被删除
+            self.pin(key)
+        target = self._put(key, album_id, file_path, meta)
+        if target is None and pin:
+            self.unpin(key)
+        return target
+
+    def _put(self, key: str, album_id: str, file_path: Path, meta: dict) -> Path | None:
+        if not self.enabled or not file_path.is_file():
+            return None
+
+        # 共享下载的多个调用方会各自打包同一内容，保留先写入的条目，
+        # 避免覆盖其它调用方正在发送的缓存文件
+        if self._has_entry(key):
+            return None
+
+        size = file_path.stat().st_size
+        if size > self.max_bytes:
+            return None
+
+        entry_dir = self.cache_dir / key
+        target = entry_dir / file_path.name
+        try:
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir)
+            entry_dir.mkdir(parents=True)
+            os.replace(file_path, target)
+        except OSError:
+            # 跨文件系统等情况退回复制
+            try:
+                shutil.copy2(file_path, target)
+                file_path.unlink()
+            except Exception as e:
+                logger.warning(f"写入打包缓存失败: {e}")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                return None
+
+        try:
+            with self._get_connection() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO pack_cache (key, album_id, file_path, size, meta, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        file_path = excluded.file_path,
+                        size = excluded.size,
+                        meta = excluded.meta,
+                        last_used = excluded.last_used
+                    """,
+                    (
+                        key,
+                        str(album_id),
+                        str(target),
+                        size,
+                        json.dumps(meta, ensure_ascii=False),
+                        time.time(),
+                    ),
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"登记打包缓存失败: {e}")
+            return target
+
+        self.evict(keep=key)
+        return target
+
+    def _has_entry(self, key: str) -> bool:
+        """索引中是否已有该键且文件仍存在"""
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT file_path FROM pack_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"查询打包缓存失败: {e}")
+            return False
+        return row is not None and Path(row[0]).is_file()
+
+    def evict(self, keep: str | None = None) -> int:
+        """
+        按最近使用时间淘汰，直到总大小不超过上限
+
+        Args:
+            keep: 不参与淘汰的键（刚写入的条目）；固定中的条目同样跳过
+
+        Returns:
+            淘汰的条目数
+        """
+        if not self.enabled:
+            return 0
+        removed = 0
+        try:
+            with self._get_connection() as conn:
+                total = conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM pack_cache"
+                ).fetchone()[0]
+                if total <= self.max_bytes:
+                    return 0
+                rows = conn.execute(
+                    "SELECT key, size FROM pack_cache ORDER BY last_used ASC"
+                ).fetchall()
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    if key == keep or self._pinned(key):
+                        continue
+                    shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+                    conn.execute("DELETE FROM pack_cache WHERE key = ?", (key,))
+                    total -= size
+                    removed += 1
+                conn.commit()
+        except Exception as e:
+            logger.error(f"淘汰打包缓存失败: {e}")
+        if removed:
+            logger.debug(f"打包缓存淘汰 {removed} 项")
+        return removed
+
+    def owns(self, path: Path) -> bool:
+        """判断路径是否位于缓存目录内（缓存产物不应被发送后清理）"""
+        try:
+            return path.resolve().is_relative_to(self.cache_dir.resolve())
+        except Exception:
+            return False
+
+    def stats(self) -> dict:
+        """返回 {entries, bytes, hits, misses}"""
+        entries, total = 0, 0
+        if self.enabled:
+            try:
+                with self._get_connection() as conn:
+                    entries, total = conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pack_cache"
+                    ).fetchone()
+            except Exception as e:
+                logger.error(f"查询打包缓存统计失败: {e}")
+        return {
+            "entries": entries,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
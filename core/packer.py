@@ -2,9 +2,22 @@
 JMComic 打包模块 - 支持加密ZIP和PDF
 """
 
+from __future__ import annotations
+
+import asyncio
+import logging
 import os
+import queue
 import re
 import shutil
+import tempfile
+import threading
+import zipfile
+import zlib
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -29,12 +42,28 @@ try:
 except ImportError:
     PIL_AVAILABLE = False
 
+# 打包在独立进程中执行，不依赖 astrbot，使用标准库 logging
+logger = logging.getLogger(__name__)
+
 # 长图打包参数
 _LONG_IMG_WIDTH = 1200  # 统一宽度，所有图片缩放到此宽度后纵向拼接
 _LONG_IMG_MAX_STRIP_HEIGHT = 12000  # 单段长图最大高度，超出则分段
 _LONG_IMG_MAX_PER_STRIP = 30  # 单段长图最多包含的图片数
 _IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
 
+# ZIP 压缩策略：auto 对已压缩的图片格式直接存储，其余按采样结果决定
+_ZIP_COMPRESSION_POLICIES = ("auto", "store", "deflate")
+_ZIP_STORED_EXTENSIONS = {".jpg", ".jpeg", ".webp", ".gif", ".zip", ".pdf"}
+_ZIP_DEFLATED_EXTENSIONS = {".png", ".txt", ".json", ".html", ".xml"}
+_ZIP_SAMPLE_SIZE = 64 * 1024  # 未知类型读取前 64KB 试压缩
+_ZIP_SAMPLE_MIN_SAVING = 0.05  # 试压缩节省不足 5% 视为不可压缩
+
+# PDF 打包：每插入多少页增量落盘一次，保持内存平稳
+_PDF_FLUSH_PAGES = 50
+
+# 异步打包进程池默认大小（0 表示不用进程池，改在线程中打包）
+_DEFAULT_PACK_WORKERS = 2
+
 
 def _collect_images_sorted(source_dir: Path) -> list[Path]:
     """递归收集图片并按“自然顺序”排序。
@@ -43,6 +72,13 @@ def _collect_images_sorted(source_dir: Path) -> list[Path]:
     字符串排序会得到 1,10,11,…,2,20 的错误顺序；这里把路径中的数字段按整数比较，
     保证按 (章节, 页码) 的真实阅读顺序排列，PDF / 长图才不会乱序。
     """
+    return _collect_files_sorted(source_dir, _IMAGE_EXTENSIONS)
+
+
+def _collect_files_sorted(
+    source_dir: Path, extensions: set[str] | None = None
+) -> list[Path]:
+    """递归收集文件（可按扩展名过滤）并按自然顺序排序"""
 
     def natural_key(path: Path):
         rel = str(path.relative_to(source_dir))
@@ -56,12 +92,245 @@ def _collect_images_sorted(source_dir: Path) -> list[Path]:
         Path(root) / name
         for root, _dirs, names in os.walk(source_dir)
         for name in names
-        if (Path(root) / name).suffix.lower() in _IMAGE_EXTENSIONS
+        if extensions is None or (Path(root) / name).suffix.lower() in extensions
     ]
     files.sort(key=natural_key)
     return files
 
 
+def _zip_compress_type(file_path: Path, policy: str) -> int:
+    """按压缩策略决定单个文件的 ZIP 压缩方式
+
+    JPEG/WebP 等已压缩格式 deflate 几乎没有收益，只会白白消耗 CPU；
+    PNG 与文本仍然压缩；未知类型读取一小段样本试压缩后再决定。
+    """
+    if policy == "store":
+        return zipfile.ZIP_STORED
+    if policy == "deflate":
+        return zipfile.ZIP_DEFLATED
+
+    suffix = file_path.suffix.lower()
+    if suffix in _ZIP_STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    if suffix in _ZIP_DEFLATED_EXTENSIONS:
+        return zipfile.ZIP_DEFLATED
+    try:
+        with open(file_path, "rb") as f:
+            sample = f.read(_ZIP_SAMPLE_SIZE)
+    except OSError:
+        return zipfile.ZIP_DEFLATED
+    if not sample:
+        return zipfile.ZIP_STORED
+    saving = 1 - len(zlib.compress(sample, 1)) / len(sample)
+    if saving < _ZIP_SAMPLE_MIN_SAVING:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _read_image_size(path: Path) -> tuple[int, int]:
+    """只读取图片头部获取 (宽, 高)，不解码像素"""
+    if PIL_AVAILABLE:
+        with Image.open(path) as img:
+            return img.size
+    with fitz.open(path) as img_doc:
+        rect = img_doc[0].rect
+        return int(rect.width), int(rect.height)
+
+
+def _scale_for_long_img(file_path: Path, scaled_height: int):
+    """解码并缩放到长图统一宽度，失败返回 None"""
+    try:
+        with Image.open(file_path) as raw:
+            return raw.convert("RGB").resize((_LONG_IMG_WIDTH, scaled_height))
+    except Exception:
+        return None
+
+
+def _scale_for_long_img_bytes(file_path: Path, scaled_height: int) -> bytes | None:
+    """解码进程池入口：返回缩放后的 RGB 原始像素（跨进程传输比 PIL 对象轻量）"""
+    img = _scale_for_long_img(file_path, scaled_height)
+    if img is None:
+        return None
+    try:
+        return img.tobytes()
+    finally:
+        img.close()
+
+
+def _iter_scaled_images(
+    strip: list[tuple[Path, int]],
+    executor: ProcessPoolExecutor | None,
+    prefetch: int,
+) -> Iterator[tuple]:
+    """按原顺序产出 (缩放后图片或 None, 缩放后高度)。
+
+    有进程池时最多预先提交 prefetch 张，既让各核并行解码，
+    又避免整段图片一次性解码堆积在内存中。
+    """
+    if executor is None:
+        for file_path, scaled_height in strip:
+            yield _scale_for_long_img(file_path, scaled_height), scaled_height
+        return
+
+    def take(entry: tuple) -> tuple:
+        future, scaled_height = entry
+        data = future.result()
+        if data is None:
+            return None, scaled_height
+        size = (_LONG_IMG_WIDTH, scaled_height)
+        return Image.frombytes("RGB", size, data), scaled_height
+
+    window = max(1, prefetch)
+    pending: deque = deque()
+    for file_path, scaled_height in strip:
+        future = executor.submit(_scale_for_long_img_bytes, file_path, scaled_height)
+        pending.append((future, scaled_height))
+        if len(pending) >= window:
+            yield take(pending.popleft())
+    while pending:
+        yield take(pending.popleft())
+
+
+class _PackPool:
+    """异步打包使用的进程池（惰性创建、进程内共享）。
+
+    PDF / 长图打包是纯 CPU 密集操作，放在线程里仍会因 GIL 拖慢事件循环，
+    因此默认交给独立进程执行。进程池大小即打包并发上限，超出部分在池内排队；
+    pending 记录已提交但尚未完成的任务数，用于计算排队深度。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self.max_workers = _DEFAULT_PACK_WORKERS
+        self.pending = 0
+
+    def configure(self, max_workers: int) -> None:
+        """调整进程池大小；已有进程池会在当前任务完成后关闭并按新大小重建"""
+        max_workers = max(0, int(max_workers))
+        with self._lock:
+            if max_workers == self.max_workers:
+                return
+            self.max_workers = max_workers
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def get_executor(self) -> ProcessPoolExecutor | None:
+        """获取进程池；max_workers 为 0 时返回 None（调用方改用线程）"""
+        with self._lock:
+            if self.max_workers <= 0:
+                return None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def discard(self, executor: ProcessPoolExecutor) -> None:
+        """丢弃已损坏的进程池（子进程被杀等），下次使用时重建"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        """关闭进程池（插件卸载时调用）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """返回 {workers, running, queued}，queued 即排队深度"""
+        workers = self.max_workers
+        running = min(self.pending, workers) if workers > 0 else self.pending
+        return {
+            "workers": workers,
+            "running": running,
+            "queued": self.pending - running,
+        }
+
+
+_PACK_POOL = _PackPool()
+
+
+class _PdfWriter:
+    """
+    逐页追加的 PDF 写入器
+
+    每 _PDF_FLUSH_PAGES 页增量落盘到 .part 文件并重新打开文档，释放已落盘页面
+    的图片数据；finish 时加密重写或直接改名为最终文件。
+    """
+
+    def __init__(self, output_path: Path, password: str = ""):
+        self.output_path = output_path
+        self.password = password
+        self.work_path = output_path.with_name(output_path.name + ".part")
+        self.doc = fitz.open()
+        self.page_count = 0
+        self._saved = False
+        self._unsaved_pages = 0
+
+    def add(self, img_path: Path) -> bool:
+        """追加一页，无法处理的图片跳过并返回 False"""
+        if not self._insert_page(img_path):
+            return False
+        self.page_count += 1
+        self._unsaved_pages += 1
+        if self._unsaved_pages >= _PDF_FLUSH_PAGES:
+            self._flush()
+        return True
+
+    def finish(self) -> None:
+        """写出最终文件"""
+        if self.password:
+            # 加密需完整重写：从已落盘的文档按需读取对象，不会整本驻留内存
+            self.doc.save(
+                self.output_path,
+                encryption=fitz.PDF_ENCRYPT_AES_256,
+                owner_pw=self.password,
+                user_pw=self.password,
+                permissions=fitz.PDF_PERM_ACCESSIBILITY,
+            )
+        else:
+            if self._unsaved_pages:
+                self._flush()
+            self.doc.close()
+            os.replace(self.work_path, self.output_path)
+
+    def discard(self) -> None:
+        """关闭文档并删除临时文件（finish 之后调用只做清理）"""
+        if not self.doc.is_closed:
+            self.doc.close()
+        if self.work_path.exists():
+            self.work_path.unlink()
+
+    def _insert_page(self, img_path: Path) -> bool:
+        """按图片头部尺寸新建页面并直接插入图片，失败时撤销该页"""
+        try:
+            width, height = _read_image_size(img_path)
+            page = self.doc.new_page(width=width, height=height)
+        except Exception:
+            return False
+        try:
+            page.insert_image(page.rect, filename=str(img_path))
+            return True
+        except Exception:
+            self.doc.delete_page(-1)
+            return False
+
+    def _flush(self) -> None:
+        """把已插入的页面写入 work_path（首次完整保存，之后增量保存），
+        然后关闭并重新打开文档"""
+        if self._saved:
+            self.doc.saveIncr()
+        else:
+            self.doc.save(self.work_path)
+        self.doc.close()
+        self.doc = fitz.open(self.work_path)
+        self._saved = True
+        self._unsaved_pages = 0
+
+
 @dataclass
 class PackResult:
     """打包结果"""
@@ -71,21 +340,40 @@ class PackResult:
     format: str
     encrypted: bool
     error_message: str | None = None
+    # 分卷打包时的卷序号（从 1 开始）与总卷数，非分卷为 0
+    volume_index: int = 0
+    volume_total: int = 0
 
 
 class JMPacker:
     """JMComic 打包器"""
 
-    def __init__(self, pack_format: str = "zip", password: str = ""):
+    def __init__(
+        self,
+        pack_format: str = "zip",
+        password: str = "",
+        decode_workers: int = 0,
+        zip_compression: str = "auto",
+        zip_level: int | None = None,
+    ):
         """
         初始化打包器
 
         Args:
-            pack_format: 打包格式 (zip/pdf/none)
+            pack_format: 打包格式 (zip/pdf/long_img/none)
             password: 加密密码，为空则不加密
+            decode_workers: 长图解码/缩放并行进程数，<=1 表示逐张处理
+            zip_compression: ZIP 压缩策略 (auto/store/deflate)，未知值按 auto 处理
+            zip_level: deflate 压缩等级 1-9，None 为 zlib 默认等级
         """
         self.pack_format = pack_format.lower()
         self.password = password
+        self.decode_workers = max(0, int(decode_workers))
+        zip_compression = (zip_compression or "auto").lower()
+        if zip_compression not in _ZIP_COMPRESSION_POLICIES:
+            zip_compression = "auto"
+        self.zip_compression = zip_compression
+        self.zip_level = zip_level if zip_level and 1 <= zip_level <= 9 else None
 
     def pack(
         self, source_dir: Path, output_name: str, output_dir: Path | None = None
@@ -134,6 +422,227 @@ class JMPacker:
                 error_message=f"不支持的打包格式: {self.pack_format}",
             )
 
+    async def pack_async(
+        self, source_dir: Path, output_name: str, output_dir: Path | None = None
+    ) -> PackResult:
+        """
+        异步打包：在打包进程池中执行 pack，避免大 PDF / 长图阻塞事件循环
+
+        进程池大小由 configure_pool 设置；为 0 或进程池损坏时退回线程执行。
+
+        Args:
+            source_dir: 源目录
+            output_name: 输出文件名（不含扩展名）
+            output_dir: 输出目录，默认为源目录的父目录
+
+        Returns:
+            PackResult 打包结果
+        """
+        _PACK_POOL.pending += 1
+        try:
+            executor = _PACK_POOL.get_executor()
+            if executor is not None:
+                loop = asyncio.get_running_loop()
+                try:
+                    return await loop.run_in_executor(
+                        executor, self.pack, source_dir, output_name, output_dir
+                    )
+                except BrokenProcessPool:
+                    _PACK_POOL.discard(executor)
+            return await asyncio.to_thread(
+                self.pack, source_dir, output_name, output_dir
+            )
+        finally:
+            _PACK_POOL.pending -= 1
+
+    def open_pipeline(
+        self, output_name: str, output_dir: Path | None = None
+    ) -> PackPipeline | None:
+        """
+        创建流水线打包：下载过程中按章节顺序边下边写
+
+        仅 ZIP 与 PDF 支持（长图需全局规划分段）；格式不支持或缺少依赖时返回
+        None，调用方应回退到下载完成后的 pack_async。
+
+        Args:
+            output_name: 输出文件名（不含扩展名）
+            output_dir: 输出目录，默认为本子目录的父目录
+        """
+        if self.pack_format == "zip":
+            if self.password and not PYZIPPER_AVAILABLE:
+                return None
+        elif self.pack_format == "pdf":
+            if not PYMUPDF_AVAILABLE:
+                return None
+        else:
+            return None
+        return PackPipeline(self, output_name, output_dir)
+
+    @staticmethod
+    def plan_volumes(source_dir: Path, volume_bytes: int) -> list[list[Path]]:
+        """
+        按原始文件大小把目录划分为若干卷（自然顺序，每卷不超过 volume_bytes）
+
+        单个文件超过卷大小时独占一卷。ZIP 中 JPEG 等仅存储、其余 deflate 后
+        只会更小，因此按原始大小划分即可保证每卷不超限（不计少量头部开销）。
+        """
+        volumes: list[list[Path]] = []
+        current: list[Path] = []
+        current_size = 0
+        for file_path in _collect_files_sorted(source_dir):
+            size = file_path.stat().st_size
+            if current and current_size + size > volume_bytes:
+                volumes.append(current)
+                current, current_size = [], 0
+            current.append(file_path)
+            current_size += size
+        if current:
+            volumes.append(current)
+        return volumes
+
+    def pack_volumes(
+        self,
+        source_dir: Path,
+        output_name: str,
+        volumes: list[list[Path]],
+        output_dir: Path | None = None,
+    ) -> Iterator[PackResult]:
+        """
+        逐卷写出独立的 ZIP（各卷可单独解压，设置密码时每卷各自加密）
+
+        每写完一卷即产出其结果；调用方发送后可立即删除，不必等整本写完。
+
+        Args:
+            source_dir: 源目录（包内路径的基准）
+            output_name: 输出文件名（不含扩展名），卷文件名追加 _volNN
+            volumes: plan_volumes 的划分结果
+            output_dir: 输出目录，默认为源目录的父目录
+        """
+        output_dir = output_dir or source_dir.parent
+        output_dir.mkdir(parents=True, exist_ok=True)
+        total = len(volumes)
+        for index, files in enumerate(volumes, 1):
+            output_path = output_dir / f"{output_name}_vol{index:02d}.zip"
+            try:
+                if self.password and not PYZIPPER_AVAILABLE:
+                    raise RuntimeError(
+                        "已设置打包密码但未安装 pyzipper，无法生成加密 ZIP；"
+                        "请安装 pyzipper 或清空打包密码"
+                    )
+                with self._open_zip(output_path) as zf:
+                    for file_path in files:
+                        zf.write(
+                            file_path,
+                            file_path.relative_to(source_dir),
+                            compress_type=_zip_compress_type(
+                                file_path, self.zip_compression
+                            ),
+                        )
+            except Exception as e:
+                if output_path.exists():
+                    output_path.unlink()
+                yield PackResult(
+                    success=False,
+                    output_path=None,
+                    format="zip",
+                    encrypted=False,
+                    error_message=str(e),
+                    volume_index=index,
+                    volume_total=total,
+                )
+                return
+            yield PackResult(
+                success=True,
+                output_path=output_path,
+                format="zip",
+                encrypted=bool(self.password),
+                volume_index=index,
+                volume_total=total,
+            )
+
+    async def pack_volumes_async(
+        self,
+        source_dir: Path,
+        output_name: str,
+        volumes: list[list[Path]],
+        output_dir: Path | None = None,
+    ) -> AsyncIterator[PackResult]:
+        """
+        在线程中逐卷打包并异步产出
+
+        写入线程最多领先消费方一卷：前一卷被取走（发送中）时写下一卷，写完后
+        等待取走，磁盘上同时存在的卷数有上限。提前结束迭代时停止写入并删除
+        尚未交付的卷。
+        """
+        handoff: queue.Queue = queue.Queue(maxsize=1)
+        stop = threading.Event()
+        done = object()
+
+        def produce() -> None:
+            try:
+                for part in self.pack_volumes(
+                    source_dir, output_name, volumes, output_dir
+                ):
+                    while not stop.is_set():
+                        try:
+                            handoff.put(part, timeout=0.2)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        if part.output_path is not None:
+                            JMPacker.cleanup(part.output_path)
+                        return
+            finally:
+                while not stop.is_set():
+                    try:
+                        handoff.put(done, timeout=0.2)
+                        break
+                    except queue.Full:
+                        continue
+
+        def take():
+            while True:
+                try:
+                    return handoff.get(timeout=0.2)
+                except queue.Empty:
+                    if stop.is_set():
+                        return done
+
+        producer = asyncio.get_running_loop().run_in_executor(None, produce)
+        try:
+            while True:
+                part = await asyncio.to_thread(take)
+                if part is done:
+                    break
+                yield part
+        finally:
+            stop.set()
+            await producer
+            # 清理已写好但未交付的卷
+            try:
+                while True:
+                    part = handoff.get_nowait()
+                    if part is not done and part.output_path is not None:
+                        JMPacker.cleanup(part.output_path)
+            except queue.Empty:
+                pass
+
+    @staticmethod
+    def configure_pool(max_workers: int) -> None:
+        """设置打包进程池大小（即打包并发上限），0 表示改在线程中打包"""
+        _PACK_POOL.configure(max_workers)
+
+    @staticmethod
+    def pool_stats() -> dict:
+        """打包进程池状态：{workers, running, queued}"""
+        return _PACK_POOL.stats()
+
+    @staticmethod
+    def shutdown_pool() -> None:
+        """关闭打包进程池"""
+        _PACK_POOL.shutdown()
+
     def _pack_zip(
         self, source_dir: Path, output_name: str, output_dir: Path
     ) -> PackResult:
@@ -154,30 +663,8 @@ class JMPacker:
             )
 
         try:
-            if self.password:
-                # 使用pyzipper创建加密ZIP
-                with pyzipper.AESZipFile(
-                    output_path,
-                    "w",
-                    compression=pyzipper.ZIP_DEFLATED,
-                    encryption=pyzipper.WZ_AES,
-                ) as zf:
-                    zf.setpassword(self.password.encode("utf-8"))
-                    for root, dirs, files in os.walk(source_dir):
-                        for file in files:
-                            file_path = Path(root) / file
-                            arcname = file_path.relative_to(source_dir)
-                            zf.write(file_path, arcname)
-            else:
-                # 使用标准库创建普通ZIP
-                import zipfile
-
-                with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
-                    for root, dirs, files in os.walk(source_dir):
-                        for file in files:
-                            file_path = Path(root) / file
-                            arcname = file_path.relative_to(source_dir)
-                            zf.write(file_path, arcname)
+            with self._open_zip(output_path) as zf:
+                self._write_zip_tree(zf, source_dir)
 
             return PackResult(
                 success=True,
@@ -195,6 +682,59 @@ class JMPacker:
                 error_message=str(e),
             )
 
+    def _open_zip(self, output_path: Path):
+        """按是否设置密码打开 ZIP 写入句柄（加密用 pyzipper，否则用标准库）"""
+        if self.password:
+            zf = pyzipper.AESZipFile(
+                output_path,
+                "w",
+                compression=pyzipper.ZIP_DEFLATED,
+                compresslevel=self.zip_level,
+                encryption=pyzipper.WZ_AES,
+            )
+            zf.setpassword(self.password.encode("utf-8"))
+            return zf
+        return zipfile.ZipFile(
+            output_path,
+            "w",
+            zipfile.ZIP_DEFLATED,
+            compresslevel=self.zip_level,
+        )
+
+    def _write_zip_tree(
+        self,
+        zf,
+        source_dir: Path,
+        base_dir: Path | None = None,
+        skip: set[Path] | None = None,
+    ) -> list[Path]:
+        """
+        把目录下所有文件写入 ZIP，逐个文件按压缩策略选择存储或压缩
+
+        Args:
+            zf: ZIP 写入句柄
+            source_dir: 要写入的目录
+            base_dir: 计算包内路径的基准目录，默认为 source_dir
+            skip: 已写入、需跳过的文件
+
+        Returns:
+            本次写入的文件列表
+        """
+        base_dir = base_dir or source_dir
+        written = []
+        for root, _dirs, files in os.walk(source_dir):
+            for file in files:
+                file_path = Path(root) / file
+                if skip and file_path in skip:
+                    continue
+                zf.write(
+                    file_path,
+                    file_path.relative_to(base_dir),
+                    compress_type=_zip_compress_type(file_path, self.zip_compression),
+                )
+                written.append(file_path)
+        return written
+
     def _pack_pdf(
         self, source_dir: Path, output_name: str, output_dir: Path
     ) -> PackResult:
@@ -223,47 +763,25 @@ class JMPacker:
                     error_message="未找到图片文件",
                 )
 
-            # 创建PDF
-            doc = fitz.open()
-
-            for img_path in image_files:
-                try:
-                    # 打开图片
-                    img = fitz.open(img_path)
-                    # 将图片转换为PDF页面
-                    pdfbytes = img.convert_to_pdf()
-                    img.close()
-
-                    # 插入页面
-                    imgpdf = fitz.open("pdf", pdfbytes)
-                    doc.insert_pdf(imgpdf)
-                    imgpdf.close()
-                except Exception:
-                    continue  # 跳过无法处理的图片
-
-            if doc.page_count == 0:
-                doc.close()
-                return PackResult(
-                    success=False,
-                    output_path=None,
-                    format="pdf",
-                    encrypted=False,
-                    error_message="无法创建PDF页面",
-                )
+            # 逐张把图片作为页面 XObject 插入（JPEG 原样透传不重新编码），
+            # 每 _PDF_FLUSH_PAGES 页增量落盘并重新打开，内存占用不随页数增长
+            writer = _PdfWriter(output_path, self.password)
+            try:
+                for img_path in image_files:
+                    writer.add(img_path)
 
-            # 保存PDF（可选加密）
-            if self.password:
-                doc.save(
-                    output_path,
-                    encryption=fitz.PDF_ENCRYPT_AES_256,
-                    owner_pw=self.password,
-                    user_pw=self.password,
-                    permissions=fitz.PDF_PERM_ACCESSIBILITY,
-                )
-            else:
-                doc.save(output_path)
+                if writer.page_count == 0:
+                    return PackResult(
+                        success=False,
+                        output_path=None,
+                        format="pdf",
+                        encrypted=False,
+                        error_message="无法创建PDF页面",
+                    )
 
-            doc.close()
+                writer.finish()
+            finally:
+                writer.discard()
 
             return PackResult(
                 success=True,
@@ -307,7 +825,8 @@ class JMPacker:
             )
 
         try:
-            strips = self._build_long_strips(image_files)
+            # 先只读图片头部规划分段，渲染时逐段落盘，峰值内存约为单段长图
+            plan = self._plan_long_strips(image_files)
         except Exception as e:
             return PackResult(
                 success=False,
@@ -317,7 +836,7 @@ class JMPacker:
                 error_message=str(e),
             )
 
-        if not strips:
+        if not plan:
             return PackResult(
                 success=False,
                 output_path=None,
@@ -326,12 +845,26 @@ class JMPacker:
                 error_message="无法生成长图",
             )
 
+        # 解码/缩放是逐张独立的 CPU 密集操作，按配置交给进程池并行
+        executor = None
+        prefetch = self.decode_workers * 2
+        if self.decode_workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.decode_workers)
+
         try:
             # 单段：直接输出一张长图
-            if len(strips) == 1:
+            if len(plan) == 1:
                 output_path = output_dir / f"{output_name}.png"
-                strips[0].save(output_path)
-                strips[0].close()
+                if not self._render_long_strip(
+                    plan[0], output_path, executor, prefetch
+                ):
+                    return PackResult(
+                        success=False,
+                        output_path=None,
+                        format="long_img",
+                        encrypted=False,
+                        error_message="无法生成长图",
+                    )
                 return PackResult(
                     success=True,
                     output_path=output_path,
@@ -339,14 +872,24 @@ class JMPacker:
                     encrypted=False,
                 )
 
-            # 多段：先落地为多张 png，再复用 ZIP 打包逻辑（支持加密）
-            import tempfile
-
+            # 多段：逐段落地为 png，再复用 ZIP 打包逻辑（支持加密）
             tmp_dir = Path(tempfile.mkdtemp(prefix="jm_longimg_"))
             try:
-                for index, strip in enumerate(strips, 1):
-                    strip.save(tmp_dir / f"{output_name}_{index:03d}.png")
-                    strip.close()
+                for index, strip in enumerate(plan, 1):
+                    if not self._render_long_strip(
+                        strip,
+                        tmp_dir / f"{output_name}_{index:03d}.png",
+                        executor,
+                        prefetch,
+                    ):
+                        # 缺段时不发送不完整的长图集合
+                        return PackResult(
+                            success=False,
+                            output_path=None,
+                            format="long_img",
+                            encrypted=False,
+                            error_message=(f"无法生成第 {index}/{len(plan)} 段长图"),
+                        )
                 zip_result = self._pack_zip(tmp_dir, output_name, output_dir)
                 return PackResult(
                     success=zip_result.success,
@@ -365,53 +908,76 @@ class JMPacker:
                 encrypted=False,
                 error_message=str(e),
             )
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
 
-    def _build_long_strips(self, image_files: list[Path]) -> list:
-        """把图片缩放到统一宽度并按高度/数量上限分段，返回拼接后的 PIL 图片列表"""
-        strips = []
-        batch: list = []
-        batch_height = 0
+    @staticmethod
+    def _plan_long_strips(image_files: list[Path]) -> list[list[tuple[Path, int]]]:
+        """只读取图片头部尺寸，按统一宽度下的高度/数量上限规划分段。
 
-        def flush_batch() -> None:
-            nonlocal batch, batch_height
-            if batch:
-                strips.append(self._merge_vertical(batch))
-                batch = []
-                batch_height = 0
+        返回每段的 [(图片路径, 缩放后高度), ...]；无法读取头部的图片直接跳过。
+        """
+        plan: list[list[tuple[Path, int]]] = []
+        batch: list[tuple[Path, int]] = []
+        batch_height = 0
 
         for file_path in image_files:
             try:
-                with Image.open(file_path) as raw:
-                    scaled_height = max(
-                        1, int(raw.height * _LONG_IMG_WIDTH / raw.width)
-                    )
-                    img = raw.convert("RGB").resize((_LONG_IMG_WIDTH, scaled_height))
+                width, height = _read_image_size(file_path)
             except Exception:
                 continue  # 跳过无法读取的图片
+            scaled_height = max(1, int(height * _LONG_IMG_WIDTH / width))
 
             if batch and (
-                batch_height + img.height > _LONG_IMG_MAX_STRIP_HEIGHT
+                batch_height + scaled_height > _LONG_IMG_MAX_STRIP_HEIGHT
                 or len(batch) >= _LONG_IMG_MAX_PER_STRIP
             ):
-                flush_batch()
+                plan.append(batch)
+                batch = []
+                batch_height = 0
 
-            batch.append(img)
-            batch_height += img.height
+            batch.append((file_path, scaled_height))
+            batch_height += scaled_height
 
-        flush_batch()
-        return strips
+        if batch:
+            plan.append(batch)
+        return plan
 
     @staticmethod
-    def _merge_vertical(images: list):
-        """把同宽度的图片纵向拼成一张，并释放分块图片占用的内存"""
-        total_height = sum(im.height for im in images)
+    def _render_long_strip(
+        strip: list[tuple[Path, int]],
+        output_path: Path,
+        executor: ProcessPoolExecutor | None = None,
+        prefetch: int = 0,
+    ) -> bool:
+        """按规划预分配画布，逐张贴入缩放后的图片并立即释放，写盘后释放画布。
+
+        传入 executor 时解码/缩放在进程池中并行进行（按顺序取回）。
+        头部可读但解码失败的图片会被跳过，画布按实际贴入高度裁剪；
+        一张都没贴入时不写文件并返回 False。
+        """
+        total_height = sum(height for _, height in strip)
         canvas = Image.new("RGB", (_LONG_IMG_WIDTH, total_height), (255, 255, 255))
-        offset_y = 0
-        for im in images:
-            canvas.paste(im, (0, offset_y))
-            offset_y += im.height
-            im.close()
-        return canvas
+        try:
+            offset_y = 0
+            for img, scaled_height in _iter_scaled_images(strip, executor, prefetch):
+                if img is None:
+                    continue  # 跳过无法解码的图片
+                canvas.paste(img, (0, offset_y))
+                offset_y += scaled_height
+                img.close()
+
+            if offset_y == 0:
+                return False
+            if offset_y < total_height:
+                cropped = canvas.crop((0, 0, _LONG_IMG_WIDTH, offset_y))
+                canvas.close()
+                canvas = cropped
+            canvas.save(output_path)
+            return True
+        finally:
+            canvas.close()
 
     @staticmethod
     def cleanup(path: Path) -> bool:
@@ -432,3 +998,186 @@ class JMPacker:
             return True
         except Exception:
             return False
+
+
+class PackPipeline:
+    """
+    流水线打包
+
+    下载线程在章节完成时调用 ready，后台写入线程按章节顺序把已完成的章节写入
+    ZIP/PDF，总耗时约为 max(下载, 打包) 而非两者之和。乱序完成的章节先缓存，
+    等前面的章节就绪后再写，保证与整目录打包相同的顺序。
+    """
+
+    def __init__(
+        self, packer: JMPacker, output_name: str, output_dir: Path | None = None
+    ):
+        self.packer = packer
+        self.output_name = output_name
+        self.output_dir = output_dir
+        self.source_dir: Path | None = None
+        self.output_path: Path | None = None
+        self._cond = threading.Condition()
+        self._chapters: list[tuple[str, Path]] = []
+        self._ready: set[str] = set()
+        self._sealed = False
+        self._aborted = False
+        self._writer = None
+        self._thread: threading.Thread | None = None
+        self._written: set[Path] = set()
+        self._error: BaseException | None = None
+        self.chapters_written = 0
+
+    @property
+    def started(self) -> bool:
+        """是否已被某次下载启用（expect 已调用）"""
+        return self._thread is not None
+
+    def expect(self, source_dir: Path, chapters: list[tuple[str, Path]]) -> None:
+        """
+        登记本子目录与待写入章节（按阅读顺序），并启动写入线程
+
+        重复调用只有第一次生效。
+
+        Args:
+            source_dir: 本子目录（包内路径的基准）
+            chapters: [(章节ID, 章节目录)]
+        """
+        with self._cond:
+            if self._thread is not None or self._aborted:
+                return
+            self.source_dir = Path(source_dir)
+            self._chapters = [(str(pid), Path(d)) for pid, d in chapters]
+            output_dir = self.output_dir or self.source_dir.parent
+            output_dir.mkdir(parents=True, exist_ok=True)
+            suffix = "zip" if self.packer.pack_format == "zip" else "pdf"
+            self.output_path = output_dir / f"{self.output_name}.{suffix}"
+            self._thread = threading.Thread(
+                target=self._run, name="jm-pack-pipeline", daemon=True
+            )
+            self._thread.start()
+
+    def ready(self, photo_id: str) -> None:
+        """章节已下载完整，可以写入（可在任意线程调用）"""
+        with self._cond:
+            self._ready.add(str(photo_id))
+            self._cond.notify_all()
+
+    def seal(self) -> None:
+        """下载（含重试）已结束：其余章节按现状全部视为就绪"""
+        with self._cond:
+            self._sealed = True
+            self._cond.notify_all()
+
+    def close(self) -> PackResult:
+        """
+        等待写入完成并生成最终文件（阻塞，需在线程中调用）
+
+        写入线程结束后补写本子目录中不属于任何已登记章节的文件。
+        """
+        fmt = self.packer.pack_format
+        encrypted = bool(self.packer.password)
+        if not self.started:
+            return PackResult(
+                success=False,
+                output_path=None,
+                format=fmt,
+                encrypted=False,
+                error_message="流水线打包未启动",
+            )
+        self.seal()
+        self._thread.join()
+        try:
+            if self._error is not None:
+                raise self._error
+            self._write_leftovers()
+            if fmt == "pdf":
+                if self._writer.page_count == 0:
+                    return PackResult(
+                        success=False,
+                        output_path=None,
+                        format="pdf",
+                        encrypted=False,
+                        error_message="无法创建PDF页面",
+                    )
+                self._writer.finish()
+                self._writer.discard()
+            else:
+                self._writer.close()
+            self._writer = None
+            return PackResult(
+                success=True,
+                output_path=self.output_path,
+                format=fmt,
+                encrypted=encrypted,
+            )
+        except Exception as e:
+            return PackResult(
+                success=False,
+                output_path=None,
+                format=fmt,
+                encrypted=False,
+                error_message=str(e),
+            )
+        finally:
+            self._discard()
+
+    def abort(self) -> None:
+        """放弃打包：停止写入线程并删除未完成的产物"""
+        with self._cond:
+            self._aborted = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._discard()
+
+    def _run(self) -> None:
+        try:
+            if self.packer.pack_format == "pdf":
+                self._writer = _PdfWriter(self.output_path, self.packer.password)
+            else:
+                self._writer = self.packer._open_zip(self.output_path)
+            for photo_id, chapter_dir in self._chapters:
+                with self._cond:
+                    while not (
+                        self._aborted or self._sealed or photo_id in self._ready
+                    ):
+                        self._cond.wait()
+                    if self._aborted:
+                        return
+                self._write_dir(chapter_dir)
+                self.chapters_written += 1
+        except BaseException as e:
+            self._error = e
+
+    def _write_dir(self, directory: Path) -> None:
+        if not directory.is_dir():
+            return
+        if self.packer.pack_format == "pdf":
+            for img_path in _collect_images_sorted(directory):
+                if img_path not in self._written:
+                    self._writer.add(img_path)
+                    self._written.add(img_path)
+        else:
+            self._written.update(
+                self.packer._write_zip_tree(
+                    self._writer, directory, self.source_dir, self._written
+                )
+            )
+
+    def _write_leftovers(self) -> None:
+        self._write_dir(self.source_dir)
+
+    def _discard(self) -> None:
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        if isinstance(writer, _PdfWriter):
+            writer.discard()
+            return
+        try:
+            writer.close()
+        except Exception as e:
+            logger.debug(f"关闭未完成的流水线打包文件失败: {e}")
+        if self.output_path is not None and self.output_path.exists():
+            self.output_path.unlink()
@@ -0,0 +1,276 @@
+"""
+订阅更新预取模块
+
+订阅检查发现新章节后，可选地在后台以最低优先级预先下载新增章节，
+用户随后执行 /jmupdate 时章节多半已在磁盘上（断点续传清单会跳过已校验的
+章节），只需打包发送。
+
+预取不扣配额（配额仍在用户真正下载时计入），但只为至少一位订阅者还有
+剩余额度（或为管理员）的本子预取；下载目录超过磁盘预算时暂停预取。
+预取的目录记录在 下载目录/.prefetch.json，超过保留时长仍未被下载命令取用的
+目录会被删除，磁盘预算不会被长期占满。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from astrbot.api import logger
+
+from .downloader import PRIORITY_BACKGROUND
+
+if TYPE_CHECKING:
+    from .base import JMConfigManager
+    from .downloader import JMDownloadManager
+    from .quota import DownloadQuotaManager
+
+# 预取任务在下载调度中的归属（与各群/用户的任务公平轮转）
+PREFETCH_OWNER = "prefetch"
+
+# 预取目录记录文件（位于下载目录下）
+_STATE_FILE = ".prefetch.json"
+
+# 磁盘预算只统计下载内容，跳过这些顶层条目：缓存目录由各自的缓存预算管理，
+# 断点续传清单与预取记录属于元数据
+_EXCLUDED_ENTRIES = (
+    "pack_cache",
+    "covers",
+    "compressed_cache",
+    ".manifests",
+    _STATE_FILE,
+)
+
+
+def directory_size(root: Path, exclude: tuple[str, ...] = ()) -> int:
+    """统计目录下文件总字节数（跳过 exclude 中的顶层子目录与文件）"""
+    total = 0
+    if not root.exists():
+        return 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        if dirpath == str(root):
+            dirnames[:] = [d for d in dirnames if d not in exclude]
+            filenames = [f for f in filenames if f not in exclude]
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                continue
+    return total
+
+
+class SubscriptionPrefetcher:
+    """订阅新章节后台预取器"""
+
+    def __init__(
+        self,
+        download_manager: JMDownloadManager,
+        quota_manager: DownloadQuotaManager,
+        config: JMConfigManager,
+    ):
+        """
+        Args:
+            download_manager: 下载管理器
+            quota_manager: 配额管理器（只读查询剩余额度）
+            config: 配置管理器
+        """
+        self.download_manager = download_manager
+        self.quota_manager = quota_manager
+        self.config = config
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.state_path = config.download_dir / _STATE_FILE
+        # 未被取用的预取目录：save_path -> {"album_id", "at"}
+        self._prefetched: dict[str, dict] = self._load()
+        self._dirty = False
+        self._save_lock = asyncio.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.skipped_quota = 0
+        self.skipped_disk = 0
+        self.expired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.subscribe_prefetch
+
+    def schedule(self, album_id: str, last: int, current: int, rows: list[dict]):
+        """
+        订阅检查发现更新时调用：按需创建后台预取任务
+
+        Args:
+            album_id: 本子ID
+            last: 各订阅者中最小的已知章节数（预取从这里开始）
+            current: 最新章节数
+            rows: 有更新的订阅记录
+        """
+        if not self.enabled or current <= last:
+            return
+        task = self._tasks.get(album_id)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._prefetch(album_id, last, rows))
+        self._tasks[album_id] = task
+        task.add_done_callback(lambda t: self._forget(album_id, t))
+
+    def _forget(self, album_id: str, task: asyncio.Task) -> None:
+        if self._tasks.get(album_id) is task:
+            del self._tasks[album_id]
+
+    async def _has_quota(self, rows: list[dict]) -> bool:
+        """至少一位订阅者是管理员或今日还有剩余额度"""
+        limit = self.config.daily_download_limit
+        if limit <= 0:
+            return True
+        admins = self.config.admin_list
+        for row in rows:
+            user_id = str(row.get("user_id") or "")
+            if not user_id:
+                continue
+            if user_id in admins:
+                return True
+            if await self.quota_manager.get_used_count_async(user_id) < limit:
+                return True
+        return False
+
+    async def _within_budget(self) -> bool:
+        budget = self.config.subscribe_prefetch_max_mb * 1024 * 1024
+        if budget <= 0:
+            return True
+        used = await asyncio.to_thread(
+            directory_size, self.config.download_dir, _EXCLUDED_ENTRIES
+        )
+        return used < budget
+
+    def claim(self, save_path: Path) -> None:
+        """下载命令取用了该目录：不再按预取过期清理，之后由下载命令的清理策略管理"""
+        if self._prefetched.pop(str(save_path), None) is not None:
+            self._dirty = True
+
+    async def expire(self) -> int:
+        """删除超过保留时长仍未被取用、且没有下载命令在使用的预取目录，返回删除数"""
+        ttl = self.config.subscribe_prefetch_ttl_hours * 3600
+        removed = 0
+        if ttl > 0:
+            now = time.time()
+            for key, entry in list(self._prefetched.items()):
+                if now - float(entry.get("at") or 0) <= ttl:
+                    continue
+                path = Path(key)
+                album_id = str(entry.get("album_id") or "")
+                # 独占目录期间不会有新下载写入；仍在使用的目录留到下次
+                async with self.download_manager.hold_album_dir(album_id, path) as idle:
+                    if not idle:
+                        continue
+                    if self._prefetched.pop(key, None) is None:
+                        continue  # 等待期间已被下载命令取用
+                    await asyncio.to_thread(shutil.rmtree, path, True)
+                    self.download_manager.drop_manifest(album_id)
+                self._dirty = True
+                removed += 1
+                logger.info(f"预取目录 {path} 超过保留时长未被取用，已删除")
+        self.expired += removed
+        await self._save()
+        return removed
+
+    async def _prefetch(self, album_id: str, skip: int, rows: list[dict]) -> None:
+        if not await self._has_quota(rows):
+            self.skipped_quota += 1
+            logger.debug(f"预取 {album_id} 跳过：订阅者今日配额已用完")
+            return
+        await self.expire()
+        if not await self._within_budget():
+            self.skipped_disk += 1
+            logger.debug(f"预取 {album_id} 跳过：下载目录超过预取磁盘预算")
+            return
+
+        try:
+            result = await self.download_manager.download_album(
+                album_id,
+                None,
+                skip,
+                owner=PREFETCH_OWNER,
+                priority=PRIORITY_BACKGROUND,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.debug(f"预取 {album_id} 出错: {e}")
+            return
+
+        if not result.success:
+            self.failed += 1
+            logger.debug(f"预取 {album_id} 失败: {result.error_message}")
+            return
+        # 只释放本任务对目录的引用，文件留给之后的 /jmupdate 直接使用
+        self.download_manager.release_save_path(result.save_path)
+        self._prefetched[str(result.save_path)] = {
+            "album_id": album_id,
+            "at": time.time(),
+        }
+        self._dirty = True
+        await self._save()
+        self.completed += 1
+        logger.info(f"已预取本子 {album_id} 的新章节（从第 {skip + 1} 章起）")
+
+    @property
+    def running(self) -> int:
+        return sum(1 for task in self._tasks.values() if not task.done())
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped_quota": self.skipped_quota,
+            "skipped_disk": self.skipped_disk,
+            "expired": self.expired,
+            "pending": len(self._prefetched),
+        }
+
+    # ==================== 持久化 ====================
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.debug(f"预取记录损坏，重新记录: {e}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {k: v for k, v in data.items() if isinstance(v, dict)}
+
+    async def _save(self) -> None:
+        """有变化时在线程中原子写入预取记录（串行写入，后写的总是最新快照）"""
+        async with self._save_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            payload = json.dumps(self._prefetched, ensure_ascii=False)
+            await asyncio.to_thread(self._write_state, payload)
+
+    def _write_state(self, payload: str) -> None:
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_suffix(".json.tmp")
+            tmp.write_text(payload, encoding="utf-8")
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.debug(f"保存预取记录失败: {e}")
+
+    async def shutdown(self) -> None:
+        """取消进行中的预取任务"""
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self._save()
@@ -0,0 +1,108 @@
+"""
+下载进度事件流
+
+下载器在工作线程中通过 publish 推送进度，事件经 loop.call_soon_threadsafe
+投递回事件循环；消费方以异步迭代器接收，无需定时轮询。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """一次进度变化"""
+
+    done: int
+    total: int
+    unit: str  # 进度单位（“图片”/“章节”）
+
+
+class ProgressStream:
+    """
+    进度事件流（单生产者、多订阅者）
+
+    每个订阅者只保留最新一条未读事件：消费慢时中间的事件被合并，不会积压。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None):
+        self._loop = loop or asyncio.get_running_loop()
+        self._subscribers: list[_Subscriber] = []
+        self._latest: ProgressEvent | None = None
+        self._closed = False
+        self.published = 0
+
+    @property
+    def latest(self) -> ProgressEvent | None:
+        """最近一次事件"""
+        return self._latest
+
+    def publish(self, done: int, total: int, unit: str) -> None:
+        """推送进度（可在任意线程调用）"""
+        event = ProgressEvent(done, total, unit)
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, event)
+        except RuntimeError:
+            # 事件循环已关闭（插件卸载中），丢弃进度
+            pass
+
+    def close(self) -> None:
+        """结束事件流，订阅者的迭代随之结束（需在事件循环线程调用）"""
+        self._closed = True
+        for subscriber in self._subscribers:
+            subscriber.wake.set()
+
+    async def subscribe(self) -> AsyncIterator[ProgressEvent]:
+        """订阅事件；中途订阅会先收到最近一次事件"""
+        subscriber = _Subscriber(self._latest)
+        self._subscribers.append(subscriber)
+        try:
+            while True:
+                if subscriber.pending is None:
+                    if self._closed:
+                        return
+                    await subscriber.wake.wait()
+                    subscriber.wake.clear()
+                    continue
+                event, subscriber.pending = subscriber.pending, None
+                yield event
+        finally:
+            self._subscribers.remove(subscriber)
+
+    def _deliver(self, event: ProgressEvent) -> None:
+        if self._closed:
+            return
+        self._latest = event
+        self.published += 1
+        for subscriber in self._subscribers:
+            subscriber.pending = event
+            subscriber.wake.set()
+
+
+class _Subscriber:
+    def __init__(self, pending: ProgressEvent | None):
+        self.pending = pending
+        self.wake = asyncio.Event()
+        if pending is not None:
+            self.wake.set()
+
+
+async def throttle_progress(
+    events: AsyncIterator[ProgressEvent], steps: int = 10
+) -> AsyncIterator[ProgressEvent]:
+    """
+    按百分比步进节流：每跨过一个 1/steps 区间才放行一次
+
+    未开始（done<=0）与已完成（done>=total）的事件不放行，完成由下载结果告知。
+    """
+    last_bucket = -1
+    async for event in events:
+        if event.total <= 0 or event.done <= 0 or event.done >= event.total:
+            continue
+        bucket = int(event.done * steps / event.total)
+        if bucket != last_bucket:
+            last_bucket = bucket
+            yield event
@@ -3,14 +3,18 @@
 
 基于 SQLite 实现每用户每日下载次数限制。
 用户标识使用 QQ 号（或其他平台的 user_id）。
+数据库由 SQLiteWorker 在专用线程上以长连接（WAL）访问。
 """
 
+import asyncio
 import sqlite3
 from datetime import date
 from pathlib import Path
 
 from astrbot.api import logger
 
+from .db import SQLiteWorker
+
 
 class DownloadQuotaManager:
     """下载配额管理器 - 基于 SQLite"""
@@ -23,27 +27,30 @@ class DownloadQuotaManager:
             db_path: SQLite 数据库文件路径
         """
         self.db_path = db_path
+        self._db = SQLiteWorker(db_path, name="jm-quota-db")
         self._init_db()
 
     def _init_db(self):
         """初始化数据库表"""
+
+        def create(conn: sqlite3.Connection) -> None:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS download_quota (
+                    user_id TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY (user_id, date)
+                )
+            """)
+
         try:
-            with self._get_connection() as conn:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS download_quota (
-                        user_id TEXT NOT NULL,
-                        date TEXT NOT NULL,
-                        count INTEGER DEFAULT 0,
-                        PRIMARY KEY (user_id, date)
-                    )
-                """)
-                conn.commit()
+            self._db.run(create)
         except Exception as e:
             logger.error(f"初始化配额数据库失败: {e}")
 
-    def _get_connection(self) -> sqlite3.Connection:
-        """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
+    def close(self) -> None:
+        """关闭数据库连接与工作线程"""
+        self._db.close()
 
     def _get_today(self) -> str:
         """获取今天的日期字符串"""
@@ -60,13 +67,15 @@ class DownloadQuotaManager:
             今日已使用次数
         """
         try:
-            with self._get_connection() as conn:
-                cursor = conn.execute(
-                    "SELECT count FROM download_quota WHERE user_id = ? AND date = ?",
-                    (str(user_id), self._get_today()),
-                )
-                row = cursor.fetchone()
-                return row[0] if row else 0
+            return self._db.run(_select_count, str(user_id), self._get_today())
+        except Exception as e:
+            logger.error(f"查询配额失败: {e}")
+            return 0
+
+    async def get_used_count_async(self, user_id: str) -> int:
+        """get_used_count 的异步版本"""
+        try:
+            return await self._db.call(_select_count, str(user_id), self._get_today())
         except Exception as e:
             logger.error(f"查询配额失败: {e}")
             return 0
@@ -85,54 +94,40 @@ class DownloadQuotaManager:
         if limit <= 0:
             return True, 0, 0  # 不限制
 
-        today = self._get_today()
-        conn = self._get_connection()
         try:
-            conn.isolation_level = None  # 手动管理事务
-            conn.execute("BEGIN IMMEDIATE")  # 立即获取写锁，串行化并发预留
-            row = conn.execute(
-                "SELECT count FROM download_quota WHERE user_id = ? AND date = ?",
-                (str(user_id), today),
-            ).fetchone()
-            used = row[0] if row else 0
-            if used >= limit:
-                conn.execute("ROLLBACK")
-                return False, used, limit
-            conn.execute(
-                """
-                INSERT INTO download_quota (user_id, date, count)
-                VALUES (?, ?, 1)
-                ON CONFLICT(user_id, date) DO UPDATE SET count = count + 1
-                """,
-                (str(user_id), today),
-            )
-            conn.execute("COMMIT")
-            return True, used + 1, limit
+            return self._db.run(_reserve, str(user_id), self._get_today(), limit)
+        except Exception as e:
+            return self._reserve_failed(e, limit)
+
+    async def reserve_async(self, user_id: str, limit: int) -> tuple[bool, int, int]:
+        """reserve 的异步版本：在数据库线程中执行，不阻塞事件循环"""
+        if limit <= 0:
+            return True, 0, 0
+        try:
+            return await self._db.call(_reserve, str(user_id), self._get_today(), limit)
         except Exception as e:
-            # 配额是防滥用的软限制：数据库异常时采取 fail-open（放行本次下载），
-            # 以可用性优先。此处显式告警，便于运维察觉降级。
-            logger.warning(f"配额预留失败，本次降级为放行 (fail-open): {e}")
-            try:
-                conn.execute("ROLLBACK")
-            except Exception:
-                pass
-            return True, 0, limit
-        finally:
-            conn.close()
+            return self._reserve_failed(e, limit)
+
+    @staticmethod
+    def _reserve_failed(error: Exception, limit: int) -> tuple[bool, int, int]:
+        # 配额是防滥用的软限制：数据库异常时采取 fail-open（放行本次下载），
+        # 以可用性优先。此处显式告警，便于运维察觉降级。
+        logger.warning(f"配额预留失败，本次降级为放行 (fail-open): {error}")
+        return True, 0, limit
 
     def refund(self, user_id: str) -> None:
         """返还一次配额（下载失败时回滚预留），不会低于 0"""
-        today = self._get_today()
         try:
-            with self._get_connection() as conn:
-                conn.execute(
-                    """
-                    UPDATE download_quota SET count = MAX(0, count - 1)
-                    WHERE user_id = ? AND date = ?
-                    """,
-                    (str(user_id), today),
-                )
-                conn.commit()
+            self._db.run(_refund, str(user_id), self._get_today())
+        except Exception as e:
+            logger.error(f"返还配额失败: {e}")
+
+    async def refund_async(self, user_id: str) -> None:
+        """refund 的异步版本：与其它待执行的写入合并提交，不阻塞事件循环"""
+        try:
+            await asyncio.wrap_future(
+                self._db.write(_REFUND_SQL, (str(user_id), self._get_today()))
+            )
         except Exception as e:
             logger.error(f"返还配额失败: {e}")
 
@@ -144,12 +139,59 @@ class DownloadQuotaManager:
             days: 保留最近多少天的数据
         """
         try:
-            with self._get_connection() as conn:
-                conn.execute(
+            self._db.run(
+                lambda conn: conn.execute(
                     "DELETE FROM download_quota WHERE date < date('now', ?)",
                     (f"-{days} days",),
                 )
-                conn.commit()
-                logger.debug(f"已清理 {days} 天前的配额数据")
+            )
+            logger.debug(f"已清理 {days} 天前的配额数据")
         except Exception as e:
             logger.error(f"清理配额数据失败: {e}")
+
+
+# ==================== 数据库线程中执行的语句 ====================
+
+
+def _select_count(conn: sqlite3.Connection, user_id: str, today: str) -> int:
+    row = conn.execute(
+        "SELECT count FROM download_quota WHERE user_id = ? AND date = ?",
+        (user_id, today),
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def _reserve(
+    conn: sqlite3.Connection, user_id: str, today: str, limit: int
+) -> tuple[bool, int, int]:
+    """单个事务内检查并自增（BEGIN IMMEDIATE 同时挡住其它进程的并发写）"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        used = _select_count(conn, user_id, today)
+        if used >= limit:
+            conn.execute("ROLLBACK")
+            return False, used, limit
+        conn.execute(
+            """
+            INSERT INTO download_quota (user_id, date, count)
+            VALUES (?, ?, 1)
+            ON CONFLICT(user_id, date) DO UPDATE SET count = count + 1
+            """,
+            (user_id, today),
+        )
+        conn.execute("COMMIT")
+        return True, used + 1, limit
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+_REFUND_SQL = """
+    UPDATE download_quota SET count = MAX(0, count - 1)
+    WHERE user_id = ? AND date = ?
+"""
+
+
+def _refund(conn: sqlite3.Connection, user_id: str, today: str) -> None:
+    conn.execute(_REFUND_SQL, (user_id, today))
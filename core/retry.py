@@ -0,0 +1,48 @@
+"""
+下载失败重试工具
+
+部分下载完成后，只针对失败的图片/章节按指数退避重试，并在每轮轮换域名：
+章节详情请求轮换 API 域名（client_domain），图片请求轮换图片 CDN 域名。
+"""
+
+from __future__ import annotations
+
+from urllib.parse import urlsplit, urlunsplit
+
+# 首轮重试前的等待（秒），之后每轮翻倍
+RETRY_BACKOFF_BASE = 2.0
+# 单次等待上限（秒）
+RETRY_BACKOFF_CAP = 30.0
+
+
+def backoff_delay(
+    attempt: int, base: float = RETRY_BACKOFF_BASE, cap: float = RETRY_BACKOFF_CAP
+) -> float:
+    """第 attempt 轮（从 1 开始）重试前的等待秒数"""
+    if attempt <= 0:
+        return 0.0
+    return min(cap, base * (2 ** (attempt - 1)))
+
+
+def rotate_domains(domains: list[str], attempt: int) -> list[str]:
+    """把域名列表循环左移 attempt 位，使每轮优先尝试不同域名"""
+    if not domains:
+        return []
+    shift = attempt % len(domains)
+    return domains[shift:] + domains[:shift]
+
+
+def rotate_host(url: str, domains: list[str]) -> str:
+    """
+    把 URL 的主机名换成候选域名中的下一个
+
+    当前主机不在候选列表中时换成列表第一个；候选为空或 URL 无主机时原样返回。
+    """
+    parts = urlsplit(url)
+    if not domains or not parts.netloc:
+        return url
+    try:
+        host = domains[(domains.index(parts.netloc) + 1) % len(domains)]
+    except ValueError:
+        host = domains[0]
+    return urlunsplit(parts._replace(netloc=host))
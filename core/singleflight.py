@@ -0,0 +1,57 @@
+"""
+并发请求合并（single-flight）
+
+同一键的并发异步调用只真正执行一次，其余调用方等待并共享同一结果/异常。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """按键合并并发的异步调用"""
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.coalesced = 0  # 被合并（未实际执行）的调用次数
+
+    def in_flight(self, key: str) -> bool:
+        """该键当前是否有进行中的调用"""
+        return key in self._inflight
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行或加入同键的进行中调用
+
+        Args:
+            key: 合并键
+            factory: 无参协程工厂，仅在没有进行中的调用时被调用
+
+        Returns:
+            调用结果（异常会传播给所有等待者）
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, k=key: self._discard(k, done))
+        else:
+            self.coalesced += 1
+        # shield：某个调用方被取消不影响其余等待者
+        return await asyncio.shield(task)
+
+    def _discard(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 标记异常已读取，避免所有调用方都被取消时出现“未读取异常”告警
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict[str, Any]:
+        """返回 {in_flight, coalesced}"""
+        return {"in_flight": len(self._inflight), "coalesced": self.coalesced}
@@ -3,13 +3,60 @@
 
 基于 SQLite 记录用户对本子的更新订阅，供后台定时检查章节更新使用。
 按 (会话, 本子) 维度去重，会话使用 AstrBot 的 unified_msg_origin。
+另按本子保存详情指纹（更新日期、章节列表哈希、章节数），供检查时判断是否变化，
+以及分片检查的下次到期时间。
+last_count 为会话已下载到的章节数（/jmupdate 从这里开始），notified_count 为
+已通知到的章节数（避免重复通知），两者分开记录，通知后 /jmupdate 仍能下载新章节。
+数据库由 SQLiteWorker 在专用线程上访问：事件循环中请使用 *_async 方法，
+写入会与其它待执行的写入合并提交。
 """
 
+import asyncio
 import sqlite3
 from pathlib import Path
 
 from astrbot.api import logger
 
+from .db import SQLiteWorker
+
+_UPSERT_SQL = """
+    INSERT INTO subscriptions
+        (umo, album_id, user_id, title, last_count, notified_count)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(umo, album_id) DO UPDATE SET
+        user_id = excluded.user_id,
+        title = excluded.title,
+        last_count = excluded.last_count,
+        notified_count = excluded.notified_count
+"""
+_DELETE_SQL = "DELETE FROM subscriptions WHERE umo = ? AND album_id = ?"
+_UPDATE_COUNT_SQL = """
+    UPDATE subscriptions
+    SET last_count = ?1, notified_count = MAX(COALESCE(notified_count, 0), ?1)
+    WHERE umo = ?2 AND album_id = ?3
+"""
+_MARK_NOTIFIED_SQL = (
+    "UPDATE subscriptions SET notified_count = ? WHERE umo = ? AND album_id = ?"
+)
+_FINGERPRINT_SQL = """
+    INSERT INTO album_fingerprints
+        (album_id, update_date, chapters_hash, photo_count, checked_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(album_id) DO UPDATE SET
+        update_date = excluded.update_date,
+        chapters_hash = excluded.chapters_hash,
+        photo_count = excluded.photo_count,
+        checked_at = excluded.checked_at
+"""
+_SET_SCHEDULE_SQL = """
+    INSERT INTO album_schedule (album_id, next_due) VALUES (?, ?)
+    ON CONFLICT(album_id) DO UPDATE SET next_due = excluded.next_due
+"""
+_SET_META_SQL = """
+    INSERT INTO meta (key, value) VALUES (?, ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+
 
 class SubscriptionManager:
     """本子更新订阅管理器 - 基于 SQLite"""
@@ -22,139 +69,329 @@ class SubscriptionManager:
             db_path: SQLite 数据库文件路径
         """
         self.db_path = db_path
+        self._db = SQLiteWorker(db_path, name="jm-subscribe-db")
         self._init_db()
 
     def _init_db(self):
         """初始化数据库表"""
+
+        def create(conn: sqlite3.Connection) -> None:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    umo TEXT NOT NULL,
+                    album_id TEXT NOT NULL,
+                    user_id TEXT,
+                    title TEXT,
+                    last_count INTEGER DEFAULT 0,
+                    notified_count INTEGER DEFAULT 0,
+                    PRIMARY KEY (umo, album_id)
+                )
+            """)
+            # 旧库补列：默认 0 时按 last_count 判断是否已通知，行为与之前一致
+            columns = {
+                row[1] for row in conn.execute("PRAGMA table_info(subscriptions)")
+            }
+            if "notified_count" not in columns:
+                conn.execute(
+                    "ALTER TABLE subscriptions "
+                    "ADD COLUMN notified_count INTEGER DEFAULT 0"
+                )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS album_fingerprints (
+                    album_id TEXT PRIMARY KEY,
+                    update_date TEXT,
+                    chapters_hash TEXT,
+                    photo_count INTEGER,
+                    checked_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS album_schedule (
+                    album_id TEXT PRIMARY KEY,
+                    next_due REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
         try:
-            with self._get_connection() as conn:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS subscriptions (
-                        umo TEXT NOT NULL,
-                        album_id TEXT NOT NULL,
-                        user_id TEXT,
-                        title TEXT,
-                        last_count INTEGER DEFAULT 0,
-                        PRIMARY KEY (umo, album_id)
-                    )
-                """)
-                conn.commit()
+            self._db.run(create)
         except Exception as e:
             logger.error(f"初始化订阅数据库失败: {e}")
 
-    def _get_connection(self) -> sqlite3.Connection:
-        """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
+    def close(self) -> None:
+        """提交剩余写入并关闭数据库连接"""
+        self._db.close()
+
+    # ==================== 写入 ====================
 
     def add(
         self, umo: str, album_id: str, user_id: str, title: str, last_count: int
     ) -> bool:
         """新增或更新一条订阅"""
-        try:
-            with self._get_connection() as conn:
-                conn.execute(
-                    """
-                    INSERT INTO subscriptions (umo, album_id, user_id, title, last_count)
-                    VALUES (?, ?, ?, ?, ?)
-                    ON CONFLICT(umo, album_id) DO UPDATE SET
-                        user_id = excluded.user_id,
-                        title = excluded.title,
-                        last_count = excluded.last_count
-                    """,
-                    (str(umo), str(album_id), str(user_id), title, int(last_count)),
-                )
-                conn.commit()
-            return True
-        except Exception as e:
-            logger.error(f"添加订阅失败: {e}")
-            return False
+        params = _upsert_params(umo, album_id, user_id, title, last_count)
+        return self._write_sync(_UPSERT_SQL, params, "添加订阅失败") is not None
+
+    async def add_async(
+        self, umo: str, album_id: str, user_id: str, title: str, last_count: int
+    ) -> bool:
+        """add 的异步版本"""
+        params = _upsert_params(umo, album_id, user_id, title, last_count)
+        return await self._write(_UPSERT_SQL, params, "添加订阅失败") is not None
 
     def remove(self, umo: str, album_id: str) -> bool:
         """取消一条订阅，返回是否确实删除了记录"""
-        try:
-            with self._get_connection() as conn:
-                cursor = conn.execute(
-                    "DELETE FROM subscriptions WHERE umo = ? AND album_id = ?",
-                    (str(umo), str(album_id)),
-                )
-                conn.commit()
-                return cursor.rowcount > 0
-        except Exception as e:
-            logger.error(f"取消订阅失败: {e}")
-            return False
+        count = self._write_sync(_DELETE_SQL, (str(umo), str(album_id)), "取消订阅失败")
+        return bool(count)
+
+    async def remove_async(self, umo: str, album_id: str) -> bool:
+        """remove 的异步版本"""
+        count = await self._write(
+            _DELETE_SQL, (str(umo), str(album_id)), "取消订阅失败"
+        )
+        return bool(count)
+
+    def update_count(self, umo: str, album_id: str, count: int) -> None:
+        """更新某订阅记录已下载到的章节数（同时视为已通知）"""
+        self._write_sync(
+            _UPDATE_COUNT_SQL,
+            (int(count), str(umo), str(album_id)),
+            "更新订阅章节数失败",
+        )
+
+    async def update_count_async(self, umo: str, album_id: str, count: int) -> None:
+        """update_count 的异步版本"""
+        await self._write(
+            _UPDATE_COUNT_SQL,
+            (int(count), str(umo), str(album_id)),
+            "更新订阅章节数失败",
+        )
+
+    async def mark_notified_async(self, umo: str, album_id: str, count: int) -> None:
+        """记录已通知到的章节数（不影响 /jmupdate 的起点）"""
+        await self._write(
+            _MARK_NOTIFIED_SQL,
+            (int(count), str(umo), str(album_id)),
+            "更新订阅通知章节数失败",
+        )
+
+    # ==================== 查询 ====================
 
     def exists(self, umo: str, album_id: str) -> bool:
         """判断某会话是否已订阅某本子"""
-        try:
-            with self._get_connection() as conn:
-                cursor = conn.execute(
-                    "SELECT 1 FROM subscriptions WHERE umo = ? AND album_id = ?",
-                    (str(umo), str(album_id)),
-                )
-                return cursor.fetchone() is not None
-        except Exception as e:
-            logger.error(f"查询订阅失败: {e}")
-            return False
+        return self._read_sync(_exists, (umo, album_id), False, "查询订阅失败")
+
+    async def exists_async(self, umo: str, album_id: str) -> bool:
+        """exists 的异步版本"""
+        return await self._read(_exists, (umo, album_id), False, "查询订阅失败")
 
     def get_last_count(self, umo: str, album_id: str) -> int | None:
         """获取某订阅记录的已知章节数，未订阅返回 None"""
+        return self._read_sync(_last_count, (umo, album_id), None, "查询订阅章节数失败")
+
+    async def get_last_count_async(self, umo: str, album_id: str) -> int | None:
+        """get_last_count 的异步版本"""
+        return await self._read(
+            _last_count, (umo, album_id), None, "查询订阅章节数失败"
+        )
+
+    def list_for(self, umo: str) -> list[dict]:
+        """列出某会话的全部订阅"""
+        return self._read_sync(_list_for, (umo,), [], "列出订阅失败")
+
+    async def list_for_async(self, umo: str) -> list[dict]:
+        """list_for 的异步版本"""
+        return await self._read(_list_for, (umo,), [], "列出订阅失败")
+
+    def list_all(self) -> list[dict]:
+        """列出全部订阅（供后台检查使用）"""
+        return self._read_sync(_list_all, (), [], "列出全部订阅失败")
+
+    async def list_all_async(self) -> list[dict]:
+        """list_all 的异步版本"""
+        return await self._read(_list_all, (), [], "列出全部订阅失败")
+
+    # ==================== 指纹与元数据 ====================
+
+    async def get_fingerprints_async(self, album_ids) -> dict[str, dict]:
+        """批量读取本子指纹：{album_id: {update_date, chapters_hash, photo_count, checked_at}}"""
+        return await self._read(
+            _fingerprints, (list(album_ids),), {}, "查询本子指纹失败"
+        )
+
+    async def put_fingerprint_async(self, album_id: str, fingerprint: dict) -> None:
+        """保存本子指纹（与其它写入合并提交）"""
+        await self._write(
+            _FINGERPRINT_SQL,
+            (
+                str(album_id),
+                fingerprint.get("update_date", ""),
+                fingerprint.get("chapters_hash", ""),
+                int(fingerprint.get("photo_count", 0)),
+                float(fingerprint.get("checked_at", 0)),
+            ),
+            "保存本子指纹失败",
+        )
+
+    async def get_schedule_async(self, album_ids) -> dict[str, float]:
+        """批量读取本子的下次检查到期时间：{album_id: next_due}"""
+        return await self._read(
+            _schedule, (list(album_ids),), {}, "查询订阅检查计划失败"
+        )
+
+    async def set_schedule_async(self, album_id: str, next_due: float) -> None:
+        """保存本子的下次检查到期时间（与其它写入合并提交）"""
+        await self._write(
+            _SET_SCHEDULE_SQL, (str(album_id), float(next_due)), "保存订阅检查计划失败"
+        )
+
+    async def set_schedules_async(self, schedules: dict[str, float]) -> None:
+        """批量保存下次检查到期时间 {album_id: next_due}（一次 executemany）"""
+        if not schedules:
+            return
+        rows = [(str(a), float(due)) for a, due in schedules.items()]
         try:
-            with self._get_connection() as conn:
-                cursor = conn.execute(
-                    "SELECT last_count FROM subscriptions WHERE umo = ? AND album_id = ?",
-                    (str(umo), str(album_id)),
-                )
-                row = cursor.fetchone()
-                return row[0] if row else None
+            await asyncio.wrap_future(self._db.write_many(_SET_SCHEDULE_SQL, rows))
         except Exception as e:
-            logger.error(f"查询订阅章节数失败: {e}")
-            return None
+            logger.error(f"保存订阅检查计划失败: {e}")
 
-    def update_count(self, umo: str, album_id: str, count: int) -> None:
-        """更新某订阅记录的已知章节数"""
+    async def get_meta_async(self, key: str) -> str | None:
+        """读取元数据"""
+        return await self._read(_get_meta, (key,), None, "查询订阅元数据失败")
+
+    async def set_meta_async(self, key: str, value: str) -> None:
+        """写入元数据"""
+        await self._write(_SET_META_SQL, (key, value), "保存订阅元数据失败")
+
+    # ==================== 内部 ====================
+
+    def _read_sync(self, func, args: tuple, default, error: str):
         try:
-            with self._get_connection() as conn:
-                conn.execute(
-                    "UPDATE subscriptions SET last_count = ? WHERE umo = ? AND album_id = ?",
-                    (int(count), str(umo), str(album_id)),
-                )
-                conn.commit()
+            return self._db.run(func, *args)
         except Exception as e:
-            logger.error(f"更新订阅章节数失败: {e}")
+            logger.error(f"{error}: {e}")
+            return default
 
-    def list_for(self, umo: str) -> list[dict]:
-        """列出某会话的全部订阅"""
+    async def _read(self, func, args: tuple, default, error: str):
         try:
-            with self._get_connection() as conn:
-                cursor = conn.execute(
-                    "SELECT album_id, title, last_count FROM subscriptions WHERE umo = ?",
-                    (str(umo),),
-                )
-                return [
-                    {"album_id": row[0], "title": row[1], "last_count": row[2]}
-                    for row in cursor.fetchall()
-                ]
+            return await self._db.call(func, *args)
         except Exception as e:
-            logger.error(f"列出订阅失败: {e}")
-            return []
+            logger.error(f"{error}: {e}")
+            return default
 
-    def list_all(self) -> list[dict]:
-        """列出全部订阅（供后台检查使用）"""
+    def _write_sync(self, sql: str, params: tuple, error: str) -> int | None:
+        """执行写入，返回影响行数；失败返回 None"""
         try:
-            with self._get_connection() as conn:
-                cursor = conn.execute(
-                    "SELECT umo, album_id, user_id, title, last_count FROM subscriptions"
-                )
-                return [
-                    {
-                        "umo": row[0],
-                        "album_id": row[1],
-                        "user_id": row[2],
-                        "title": row[3],
-                        "last_count": row[4],
-                    }
-                    for row in cursor.fetchall()
-                ]
+            return self._db.write(sql, params).result()
         except Exception as e:
-            logger.error(f"列出全部订阅失败: {e}")
-            return []
+            logger.error(f"{error}: {e}")
+            return None
+
+    async def _write(self, sql: str, params: tuple, error: str) -> int | None:
+        try:
+            return await asyncio.wrap_future(self._db.write(sql, params))
+        except Exception as e:
+            logger.error(f"{error}: {e}")
+            return None
+
+
+# ==================== 数据库线程中执行的语句 ====================
+
+
+def _upsert_params(
+    umo: str, album_id: str, user_id: str, title: str, last_count: int
+) -> tuple:
+    count = int(last_count)
+    return str(umo), str(album_id), str(user_id), title, count, count
+
+
+def _exists(conn: sqlite3.Connection, umo: str, album_id: str) -> bool:
+    cursor = conn.execute(
+        "SELECT 1 FROM subscriptions WHERE umo = ? AND album_id = ?",
+        (str(umo), str(album_id)),
+    )
+    return cursor.fetchone() is not None
+
+
+def _last_count(conn: sqlite3.Connection, umo: str, album_id: str) -> int | None:
+    cursor = conn.execute(
+        "SELECT last_count FROM subscriptions WHERE umo = ? AND album_id = ?",
+        (str(umo), str(album_id)),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _list_for(conn: sqlite3.Connection, umo: str) -> list[dict]:
+    cursor = conn.execute(
+        "SELECT album_id, title, last_count FROM subscriptions WHERE umo = ?",
+        (str(umo),),
+    )
+    return [
+        {"album_id": row[0], "title": row[1], "last_count": row[2]}
+        for row in cursor.fetchall()
+    ]
+
+
+def _list_all(conn: sqlite3.Connection) -> list[dict]:
+    cursor = conn.execute(
+        "SELECT umo, album_id, user_id, title, last_count, notified_count "
+        "FROM subscriptions"
+    )
+    return [
+        {
+            "umo": row[0],
+            "album_id": row[1],
+            "user_id": row[2],
+            "title": row[3],
+            "last_count": row[4],
+            "notified_count": row[5],
+        }
+        for row in cursor.fetchall()
+    ]
+
+
+def _select_in(conn: sqlite3.Connection, sql: str, album_ids: list[str]) -> list:
+    """按本子ID批量查询（分批，避免超过 SQLite 的参数数量上限）"""
+    rows = []
+    for start in range(0, len(album_ids), 500):
+        chunk = [str(a) for a in album_ids[start : start + 500]]
+        placeholders = ",".join("?" * len(chunk))
+        rows += conn.execute(sql.format(placeholders), chunk).fetchall()
+    return rows
+
+
+def _fingerprints(conn: sqlite3.Connection, album_ids: list[str]) -> dict[str, dict]:
+    rows = _select_in(
+        conn,
+        "SELECT album_id, update_date, chapters_hash, photo_count, checked_at "
+        "FROM album_fingerprints WHERE album_id IN ({})",
+        album_ids,
+    )
+    return {
+        row[0]: {
+            "update_date": row[1],
+            "chapters_hash": row[2],
+            "photo_count": row[3],
+            "checked_at": row[4],
+        }
+        for row in rows
+    }
+
+
+def _schedule(conn: sqlite3.Connection, album_ids: list[str]) -> dict[str, float]:
+    rows = _select_in(
+        conn,
+        "SELECT album_id, next_due FROM album_schedule WHERE album_id IN ({})",
+        album_ids,
+    )
+    return {row[0]: row[1] for row in rows}
+
+
+def _get_meta(conn: sqlite3.Connection, key: str) -> str | None:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
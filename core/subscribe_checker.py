@@ -0,0 +1,486 @@
+"""
+订阅更新检查
+
+后台检查按本子去重：同一本子无论被多少会话订阅，每轮只拉取一次详情，
+再把结果分发给各订阅会话。详情请求以有限并发执行，并经令牌桶限速，
+保持平稳的请求速率以降低风控风险。每轮记录耗时等指标，便于对照检查间隔。
+
+变化检测：翻“最新”排序列表（按更新先后排列），直到遇到上一次列表顶部的
+本子（水位线）——在它之前出现的就是这段时间内有更新的本子。连续找到水位线
+期间的列表构成一段“已覆盖”时间窗：自窗口起点以来检查过、且之后未被列表标记
+的本子无需再拉取详情。列表翻到页数上限仍未遇到水位线（更新太多或首次运行）时
+覆盖中断，本子按全量检查处理。每个本子拉取详情后保存指纹（更新日期、章节列表
+哈希、章节数），指纹缺失或超过 _FINGERPRINT_MAX_AGE 未刷新的本子始终拉取详情。
+
+分片调度：run_due() 由后台按短周期调用，每个本子按 ID 哈希在检查间隔内分到
+固定相位，只检查到期的本子，检查后按间隔加少量随机抖动排到下一次；到期时间
+持久化在数据库中，重启后沿用，不会在启动后集中全量检查。列表每个间隔翻一次，
+标记为有更新的本子提前到期，尽快通知。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from astrbot.api import logger
+
+from .subscribe import SubscriptionManager
+
+# fetch_detail(album_id) -> 详情字典或 None
+FetchDetail = Callable[[str], Awaitable[dict | None]]
+# notify(umo, album_id, title, last, current)
+Notify = Callable[[str, str, str, int, int], Awaitable[None]]
+# fetch_latest(page) -> “最新”列表该页的本子ID（按更新先后）
+FetchLatest = Callable[[int], Awaitable[list[str]]]
+# (album_id, 最小已知章节数, 最新章节数, 有更新的订阅记录)
+OnUpdate = Callable[[str, int, int, list[dict]], None]
+
+# 指纹超过该时长（秒）未刷新的本子无论列表结果如何都拉取详情
+_FINGERPRINT_MAX_AGE = 24 * 3600
+# 水位线：保存上一轮列表顶部的本子数
+_WATERMARK_SIZE = 20
+# 连续遇到多少个水位线本子（保持原有先后）才认定已翻到上一轮的位置；
+# 上一轮之后更新过的水位线本子会单独跳到列表前部，不能只凭一个命中判断
+_WATERMARK_RUN = 3
+_WATERMARK_KEY = "latest_watermark"
+# 下次到期时间的随机抖动（占检查间隔的比例）
+_SCHEDULE_JITTER = 0.05
+# 单个 tick 最多检查的本子数：按间隔平摊的期望值的倍数
+_TICK_HEADROOM = 2
+
+
+def schedule_phase(album_id: str, interval: float) -> float:
+    """本子在检查间隔内的固定相位（秒），按 ID 哈希均匀分布"""
+    digest = hashlib.sha1(str(album_id).encode()).hexdigest()
+    return int(digest[:8], 16) / 0x100000000 * interval
+
+
+def next_due_time(
+    album_id: str, due: float, now: float, interval: float, jitter: float = 0.0
+) -> float:
+    """
+    本子检查后的下次到期时间
+
+    提前检查（due 仍在未来）的本子保留原到期时间；正常到期的本子顺延一个间隔，
+    若顺延后仍已过期（停机较久）则按相位重新分布到下一个间隔内。
+    """
+    if due > now:
+        return due
+    nxt = due + interval
+    if nxt <= now:
+        nxt = now + schedule_phase(album_id, interval)
+    return nxt + jitter * interval
+
+
+def album_fingerprint(detail: dict) -> dict:
+    """由本子详情计算指纹：{update_date, chapters_hash, photo_count}"""
+    photo_ids = detail.get("photo_ids") or []
+    return {
+        "update_date": str(detail.get("update_date") or ""),
+        "chapters_hash": hashlib.sha1(",".join(photo_ids).encode()).hexdigest()[:16],
+        "photo_count": int(detail.get("photo_count", 0) or 0),
+    }
+
+
+def changed_before_watermark(
+    listing: list[str], watermark: list[str]
+) -> list[str] | None:
+    """
+    在“最新”列表中定位上一轮的水位线
+
+    Returns:
+        水位线之前（即上一轮之后有更新）的本子ID；未找到水位线返回 None
+    """
+    if not watermark:
+        return None
+    position = {album_id: index for index, album_id in enumerate(watermark)}
+    need = min(_WATERMARK_RUN, len(watermark))
+    for start in range(len(listing) - need + 1):
+        indexes = [position.get(album_id) for album_id in listing[start : start + need]]
+        if None not in indexes and indexes == sorted(set(indexes)):
+            return listing[:start]
+    return None
+
+
+def _notified(row: dict) -> int:
+    """订阅记录已通知到的章节数（旧记录没有 notified_count 时取 last_count）"""
+    return max(
+        int(row.get("last_count", 0) or 0), int(row.get("notified_count", 0) or 0)
+    )
+
+
+class TokenBucket:
+    """异步令牌桶：平均每秒 rate 个令牌，最多积攒 burst 个"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: 每秒补充的令牌数，<=0 表示不限速
+            burst: 桶容量（允许的瞬时突发数）
+        """
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """取走一个令牌，不足时等待补充"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class CheckCycle:
+    """一轮订阅检查的统计"""
+
+    started_at: float
+    duration: float = 0.0
+    subscriptions: int = 0
+    albums: int = 0
+    fetched: int = 0
+    failed: int = 0
+    updated: int = 0
+    notified: int = 0
+    # 由“最新”列表判定无更新而跳过详情请求的本子数
+    skipped: int = 0
+    listing_requests: int = 0
+    # 本轮到期（含被列表标记而提前）的本子数
+    due: int = 0
+    # 到期但超出单轮上限、顺延到之后 tick 的本子数
+    deferred: int = 0
+    # 停机等原因过期超过一个间隔、重新按相位分布的本子数
+    rephased: int = 0
+
+
+class SubscriptionChecker:
+    """订阅更新检查器"""
+
+    def __init__(
+        self,
+        manager: SubscriptionManager,
+        fetch_detail: FetchDetail,
+        notify: Notify,
+        concurrency: int = 4,
+        rate_per_minute: int = 30,
+        fetch_latest: FetchLatest | None = None,
+        latest_pages: int = 3,
+        on_update: OnUpdate | None = None,
+    ):
+        """
+        Args:
+            manager: 订阅管理器
+            fetch_detail: 拉取本子最新详情的协程函数
+            notify: 向某会话推送更新通知的协程函数
+            concurrency: 同时进行的详情请求数
+            rate_per_minute: 每分钟最多发起的请求数（详情与列表），0 表示不限速
+            fetch_latest: 获取“最新”列表某页本子ID的协程函数，None 表示每轮全量检查
+            latest_pages: 每轮最多翻的“最新”列表页数，0 表示每轮全量检查
+            on_update: 发现更新时的同步回调（如安排后台预取），在通知前调用
+        """
+        self.manager = manager
+        self.fetch_detail = fetch_detail
+        self.notify = notify
+        self.on_update = on_update
+        self.fetch_latest = fetch_latest
+        self.latest_pages = max(0, int(latest_pages))
+        self.concurrency = max(1, int(concurrency))
+        self.bucket = TokenBucket(max(0, rate_per_minute) / 60, burst=self.concurrency)
+        self.cycles = 0
+        self.last_cycle: CheckCycle | None = None
+        # 列表变化检测的已覆盖时间窗起点（None 表示覆盖中断）
+        self._covered_since: float | None = None
+        # 被列表标记为有更新的本子 -> 标记时间
+        self._flagged: dict[str, float] = {}
+        # 被标记但拉取详情失败的本子 -> 失败时间（退避一个间隔再提前检查）
+        self._flag_failed: dict[str, float] = {}
+        self._last_listing_at: float | None = None
+
+    @staticmethod
+    def tick_seconds(interval: float) -> float:
+        """run_due 的调用周期：检查间隔的 1/20，限制在 10～60 秒"""
+        return max(10.0, min(60.0, interval / 20))
+
+    async def check_once(self) -> CheckCycle:
+        """检查全部订阅一次（先做列表变化检测），发现更新则回写章节数并通知"""
+        cycle = CheckCycle(started_at=time.time())
+        started = time.monotonic()
+        by_album = await self._load_subscriptions(cycle)
+        if by_album:
+            await self._detect_changes(cycle)
+        cycle.due = len(by_album)
+        await self._check_albums(by_album, cycle)
+        return self._finish(cycle, started)
+
+    async def run_due(self, interval: float) -> CheckCycle:
+        """
+        只检查到期的本子（分片调度），供后台按 tick_seconds 周期调用
+
+        Args:
+            interval: 检查间隔（秒），每个本子约每个间隔检查一次
+        """
+        cycle = CheckCycle(started_at=time.time())
+        started = time.monotonic()
+        by_album = await self._load_subscriptions(cycle)
+        if not by_album:
+            return self._finish(cycle, started)
+
+        now = time.time()
+        if self._last_listing_at is None or now - self._last_listing_at >= interval:
+            await self._detect_changes(cycle)
+
+        schedule = await self.manager.get_schedule_async(by_album)
+        rephased: dict[str, float] = {}
+        candidates: list[tuple[bool, float, str]] = []
+        for album_id in by_album:
+            next_due = schedule.get(album_id)
+            if next_due is None or now - next_due > interval:
+                # 新订阅（或首次启用分片），以及停机超过一个间隔而积压的本子：
+                # 按相位重新分布到接下来的间隔内，避免重启后集中检查
+                if next_due is not None:
+                    cycle.rephased += 1
+                next_due = now + schedule_phase(album_id, interval)
+                schedule[album_id] = rephased[album_id] = next_due
+            # 被列表标记有更新的本子提前到期（拉取失败后退避一个间隔）
+            flagged = self._flag_ready(album_id, now, interval)
+            if next_due <= now or flagged:
+                candidates.append((not flagged, next_due, album_id))
+        await self.manager.set_schedules_async(rephased)
+
+        # 单个 tick 的检查数有上限：被标记的本子优先，其余按到期先后，
+        # 超出部分保持到期状态，留给之后的 tick
+        limit = max(
+            self.concurrency,
+            math.ceil(
+                _TICK_HEADROOM * len(by_album) * self.tick_seconds(interval) / interval
+            ),
+        )
+        candidates.sort()
+        due = {album_id: by_album[album_id] for _, _, album_id in candidates[:limit]}
+        cycle.due = len(due)
+        cycle.deferred = len(candidates) - len(due)
+
+        await self._check_albums(due, cycle)
+
+        now = time.time()
+        await self.manager.set_schedules_async(
+            {
+                album_id: next_due_time(
+                    album_id,
+                    schedule[album_id],
+                    now,
+                    interval,
+                    random.uniform(-_SCHEDULE_JITTER, _SCHEDULE_JITTER),
+                )
+                for album_id in due
+            }
+        )
+        return self._finish(cycle, started)
+
+    async def _load_subscriptions(self, cycle: CheckCycle) -> dict[str, list[dict]]:
+        subs = await self.manager.list_all_async()
+        by_album: dict[str, list[dict]] = {}
+        for sub in subs:
+            by_album.setdefault(str(sub["album_id"]), []).append(sub)
+        cycle.subscriptions = len(subs)
+        cycle.albums = len(by_album)
+        return by_album
+
+    def _finish(self, cycle: CheckCycle, started: float) -> CheckCycle:
+        cycle.duration = time.monotonic() - started
+        self.cycles += 1
+        self.last_cycle = cycle
+        return cycle
+
+    def _flag_ready(self, album_id: str, now: float, interval: float) -> bool:
+        """被列表标记、且距上次拉取失败已超过一个间隔的本子"""
+        if album_id not in self._flagged:
+            return False
+        return now - self._flag_failed.get(album_id, 0.0) >= interval
+
+    def _can_skip(self, fingerprint: dict | None, album_id: str, now: float) -> bool:
+        """指纹新鲜、检查后一直处于已覆盖窗口内且未被列表标记的本子可跳过"""
+        if not fingerprint or self._covered_since is None:
+            return False
+        checked_at = fingerprint.get("checked_at") or 0
+        if now - checked_at > _FINGERPRINT_MAX_AGE:
+            return False
+        if checked_at < self._covered_since:
+            return False
+        return self._flagged.get(album_id, 0) < checked_at
+
+    async def _check_albums(
+        self, by_album: dict[str, list[dict]], cycle: CheckCycle
+    ) -> None:
+        """对需要的本子拉取详情、保存指纹并分发通知"""
+        if not by_album:
+            return
+        if self._covered_since is not None:
+            fingerprints = await self.manager.get_fingerprints_async(by_album)
+            now = time.time()
+            pending = {
+                album_id: rows
+                for album_id, rows in by_album.items()
+                if not self._can_skip(fingerprints.get(album_id), album_id, now)
+            }
+            cycle.skipped = len(by_album) - len(pending)
+            by_album = pending
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check_album(album_id: str, rows: list[dict]) -> None:
+            async with semaphore:
+                await self.bucket.acquire()
+                try:
+                    detail = await self.fetch_detail(album_id)
+                except Exception as e:
+                    cycle.failed += 1
+                    if album_id in self._flagged:
+                        self._flag_failed[album_id] = time.time()
+                    logger.debug(f"检查订阅 {album_id} 失败: {e}")
+                    return
+            cycle.fetched += 1
+            if not detail:
+                return
+            fingerprint = album_fingerprint(detail)
+            fingerprint["checked_at"] = time.time()
+            await self.manager.put_fingerprint_async(album_id, fingerprint)
+            self._flagged.pop(album_id, None)
+            self._flag_failed.pop(album_id, None)
+            notified = await self._dispatch(album_id, detail, rows)
+            if notified:
+                cycle.updated += 1
+                cycle.notified += notified
+
+        await asyncio.gather(
+            *(check_album(album_id, rows) for album_id, rows in by_album.items())
+        )
+
+    async def _detect_changes(self, cycle: CheckCycle) -> None:
+        """
+        翻“最新”列表，标记上一次列表之后有更新的本子并维护已覆盖时间窗
+
+        未配置列表、首次运行、超出页数或请求失败时覆盖中断（之后按全量检查，
+        直到下一次列表找回水位线）。
+        """
+        if self.fetch_latest is None or self.latest_pages <= 0:
+            return
+
+        raw = await self.manager.get_meta_async(_WATERMARK_KEY)
+        try:
+            stored = json.loads(raw) if raw else {}
+        except ValueError:
+            stored = {}
+        if not isinstance(stored, dict):
+            stored = {}
+        watermark = stored.get("ids") or []
+        watermark_at = stored.get("at")
+
+        listed_at = time.time()
+        self._last_listing_at = listed_at
+        listing: list[str] = []
+        changed = None
+        for page in range(1, self.latest_pages + 1):
+            await self.bucket.acquire()
+            try:
+                ids = await self.fetch_latest(page)
+            except Exception as e:
+                logger.debug(f"获取最新列表第 {page} 页失败: {e}")
+                self._covered_since = None
+                return
+            cycle.listing_requests += 1
+            if not ids:
+                break
+            listing.extend(ids)
+            changed = changed_before_watermark(listing, watermark)
+            if changed is not None:
+                break
+
+        if changed is None or watermark_at is None:
+            self._covered_since = None
+        else:
+            if self._covered_since is None:
+                self._covered_since = float(watermark_at)
+            for album_id in changed:
+                self._flagged[album_id] = listed_at
+        # 清理早已失去意义的标记
+        horizon = listed_at - _FINGERPRINT_MAX_AGE
+        self._flagged = {a: t for a, t in self._flagged.items() if t >= horizon}
+        self._flag_failed = {
+            a: t for a, t in self._flag_failed.items() if a in self._flagged
+        }
+
+        if listing:
+            await self.manager.set_meta_async(
+                _WATERMARK_KEY,
+                json.dumps({"ids": listing[:_WATERMARK_SIZE], "at": listed_at}),
+            )
+
+    async def _dispatch(self, album_id: str, detail: dict, rows: list[dict]) -> int:
+        """把一个本子的最新章节数分发给各订阅会话，返回通知数
+
+        通知只推进 notified_count；last_count 保持为会话已下载到的章节数，
+        /jmupdate 与预取都从它开始。
+        """
+        current = int(detail.get("photo_count", 0) or 0)
+        stale = [row for row in rows if current > _notified(row)]
+        if not stale:
+            return 0
+        if self.on_update is not None:
+            last = min(int(row.get("last_count", 0) or 0) for row in stale)
+            try:
+                self.on_update(album_id, last, current, stale)
+            except Exception as e:
+                logger.debug(f"订阅更新回调 {album_id} 失败: {e}")
+
+        async def push(row: dict) -> None:
+            last = _notified(row)
+            title = detail.get("title") or row.get("title") or ""
+            await self.manager.mark_notified_async(row["umo"], album_id, current)
+            try:
+                await self.notify(row["umo"], album_id, title, last, current)
+            except Exception as e:
+                logger.debug(f"通知订阅 {album_id} -> {row['umo']} 失败: {e}")
+
+        await asyncio.gather(*(push(row) for row in stale))
+        return len(stale)
+
+    def stats(self) -> dict | None:
+        """最近一轮检查的统计，尚未检查过返回 None"""
+        cycle = self.last_cycle
+        if cycle is None:
+            return None
+        return {
+            "cycles": self.cycles,
+            "started_at": cycle.started_at,
+            "duration": cycle.duration,
+            "subscriptions": cycle.subscriptions,
+            "albums": cycle.albums,
+            "fetched": cycle.fetched,
+            "failed": cycle.failed,
+            "updated": cycle.updated,
+            "notified": cycle.notified,
+            "skipped": cycle.skipped,
+            "listing_requests": cycle.listing_requests,
+            "due": cycle.due,
+            "deferred": cycle.deferred,
+            "rephased": cycle.rephased,
+        }
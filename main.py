@@ -5,6 +5,8 @@ JM-Cosmos II - AstrBot JM漫画下载插件
 """
 
 import asyncio
+from contextlib import aclosing
+from functools import partial
 from pathlib import Path
 
 import astrbot.api.message_components as Comp
@@ -13,16 +15,33 @@ from astrbot.api.event import AstrMessageEvent, filter
 from astrbot.api.star import Context, Star, StarTools, register
 
 from .core import (
+    PRIORITY_ADMIN,
+    PRIORITY_NORMAL,
+    QUEUE_PROGRESS_UNIT,
+    CoverCache,
+    DomainHealth,
     DownloadQuotaManager,
+    DownloadResult,
     JMAuthManager,
     JMBrowser,
+    JMClientMixin,
     JMConfigManager,
     JMDownloadManager,
     JMPacker,
+    PackCache,
+    PackResult,
+    SubscriptionChecker,
     SubscriptionManager,
+    SubscriptionPrefetcher,
     classify_exception,
+    http_probe,
+)
+from .utils import (
+    MessageFormatter,
+    configure_compressed_cache,
+    generate_album_filename,
+    send_with_recall,
 )
-from .utils import MessageFormatter, generate_album_filename, send_with_recall
 
 # 插件名称常量
 PLUGIN_NAME = "jm_cosmos2"
@@ -63,6 +82,49 @@ class JMCosmosPlugin(Star):
         # 初始化浏览查询器
         self.browser = JMBrowser(self.config_manager)
 
+        # 共享客户端池（复用 keep-alive 连接）
+        JMClientMixin.configure_client_pool(
+            self.config_manager.client_pool_size,
+            self.config_manager.client_pool_idle_timeout,
+        )
+
+        # 域名健康度：沿用上次探测得到的顺序，并在后台定时探测
+        self.domain_health = None
+        self._domain_probe_task = None
+        if len(self.config_manager.client_domain) > 1:
+            self.domain_health = DomainHealth(
+                self.data_dir / "domain_health.json",
+                transport=self._domain_probe_transport(),
+            )
+            self._apply_domain_order()
+            if self.config_manager.domain_probe_interval > 0:
+                try:
+                    self._domain_probe_task = asyncio.create_task(
+                        self._domain_probe_loop()
+                    )
+                except RuntimeError:
+                    logger.warning("无法启动域名探测任务：当前没有运行中的事件循环")
+
+        # 打包进程池大小（即并发打包上限）
+        JMPacker.configure_pool(self.config_manager.pack_max_workers)
+
+        # 打包产物缓存（热门本子重复请求直接从磁盘发送）
+        self.pack_cache = PackCache(
+            self.config_manager.download_dir / "pack_cache",
+            self.config_manager.pack_cache_max_mb * 1024 * 1024,
+        )
+
+        # 封面缓存（字节上限 + LRU，预生成压缩版本）
+        self.cover_cache = CoverCache(
+            self.config_manager.download_dir / "covers",
+            self.config_manager.cover_cache_max_mb * 1024 * 1024,
+        )
+
+        # 发送超时回退的压缩图片缓存（按内容键复用，LRU 淘汰）
+        configure_compressed_cache(
+            self.config_manager.download_dir / "compressed_cache"
+        )
+
         # 初始化认证管理器
         self.auth_manager = JMAuthManager(self.config_manager)
 
@@ -78,6 +140,20 @@ class JMCosmosPlugin(Star):
         self.subscription_manager = SubscriptionManager(
             self.data_dir / "subscriptions.db"
         )
+        # 订阅新章节后台预取（subscribe_prefetch 开启时生效）
+        self.prefetcher = SubscriptionPrefetcher(
+            self.download_manager, self.quota_manager, self.config_manager
+        )
+        self.subscription_checker = SubscriptionChecker(
+            self.subscription_manager,
+            partial(self.browser.get_album_detail, refresh=True),
+            self._notify_update,
+            concurrency=self.config_manager.subscribe_check_concurrency,
+            rate_per_minute=self.config_manager.subscribe_check_rpm,
+            fetch_latest=self.browser.get_latest_album_ids,
+            latest_pages=self.config_manager.subscribe_latest_pages,
+            on_update=self.prefetcher.schedule,
+        )
 
         # 调试模式
         self.debug_mode = self.config_manager.debug_mode
@@ -149,24 +225,30 @@ class JMCosmosPlugin(Star):
         from astrbot.api.event import MessageChain
 
         async def _on_progress(done: int, total: int, unit: str = "图片") -> None:
-            try:
-                await event.send(
-                    MessageChain(
-                        [
-                            Comp.Plain(
-                                MessageFormatter.format_download_progress(
-                                    "下载中", done, total, unit
-                                )
-                            )
-                        ]
-                    )
+            if unit == QUEUE_PROGRESS_UNIT:
+                text = MessageFormatter.format_queue_position(done, total)
+            else:
+                text = MessageFormatter.format_download_progress(
+                    "下载中", done, total, unit
                 )
+            try:
+                await event.send(MessageChain([Comp.Plain(text)]))
             except Exception as send_err:
                 logger.debug(f"发送下载进度失败: {send_err}")
 
         return _on_progress
 
-    def _reserve_quota(self, event: AstrMessageEvent) -> tuple[bool, str, bool]:
+    def _download_schedule(self, event: AstrMessageEvent) -> dict:
+        """下载调度参数：按群（私聊按用户）公平排队，管理员优先"""
+        user_id = str(event.get_sender_id())
+        group_id = event.get_group_id()
+        is_admin = user_id in self.config_manager.admin_list
+        return {
+            "owner": f"group:{group_id}" if group_id else f"user:{user_id}",
+            "priority": PRIORITY_ADMIN if is_admin else PRIORITY_NORMAL,
+        }
+
+    async def _reserve_quota(self, event: AstrMessageEvent) -> tuple[bool, str, bool]:
         """
         下载前原子预留配额（管理员与不限额时跳过）。
 
@@ -179,7 +261,7 @@ class JMCosmosPlugin(Star):
         if limit <= 0 or is_admin:
             return True, "", False
 
-        reserved, used, total = self.quota_manager.reserve(user_id, limit)
+        reserved, used, total = await self.quota_manager.reserve_async(user_id, limit)
         if not reserved:
             return (
                 False,
@@ -188,10 +270,79 @@ class JMCosmosPlugin(Star):
             )
         return True, "", True
 
-    def _refund_quota(self, event: AstrMessageEvent, reserved: bool) -> None:
+    async def _refund_quota(self, event: AstrMessageEvent, reserved: bool) -> None:
         """下载失败时返还已预留的配额"""
         if reserved:
-            self.quota_manager.refund(event.get_sender_id())
+            await self.quota_manager.refund_async(event.get_sender_id())
+
+    async def _get_cover(self, album_id: str) -> Path | None:
+        """获取封面：优先命中封面缓存，否则下载并登记（生成压缩版本、按上限淘汰）"""
+        cached = self.cover_cache.lookup(album_id)
+        if cached:
+            return cached
+        cover_path = await self.browser.get_album_cover(
+            album_id, self.cover_cache.cover_dir
+        )
+        if cover_path:
+            await asyncio.to_thread(self.cover_cache.admit, cover_path)
+        return cover_path
+
+    def _new_packer(self) -> JMPacker:
+        """按当前配置构建打包器"""
+        return JMPacker(
+            pack_format=self.config_manager.pack_format,
+            password=self.config_manager.pack_password,
+            decode_workers=self.config_manager.pack_decode_workers,
+            zip_compression=self.config_manager.zip_compression,
+            zip_level=self.config_manager.zip_compress_level,
+        )
+
+    def _album_output_name(self, album_id: str, copy_index: int = 0) -> str:
+        """本子打包文件名"""
+        return generate_album_filename(
+            album_id=album_id,
+            password=self.config_manager.pack_password,
+            show_password=self.config_manager.filename_show_password,
+            copy_index=copy_index,
+        )
+
+    def _open_pack_pipeline(self, packer: JMPacker, album_id: str):
+        """按配置创建流水线打包（关闭或格式不支持时返回 None）"""
+        # 分卷模式下是否分卷要等下载完按目录大小决定，不走流水线
+        if not self.config_manager.pack_pipeline or self._zip_volume_bytes():
+            return None
+        return packer.open_pipeline(self._album_output_name(album_id))
+
+    async def _pack_download(self, packer: JMPacker, result, pipeline):
+        """流水线已随本次下载启动则等待其收尾，否则下载完成后整体打包"""
+        if pipeline is not None and pipeline.started:
+            return await asyncio.to_thread(pipeline.close)
+        return await packer.pack_async(
+            source_dir=result.save_path,
+            output_name=self._album_output_name(result.album_id, result.share_index),
+        )
+
+    def _zip_volume_bytes(self) -> int:
+        """ZIP 分卷大小（字节），未开启分卷或非 zip 格式时为 0"""
+        if self.config_manager.pack_format != "zip":
+            return 0
+        return max(0, int(self.config_manager.zip_volume_mb)) * 1024 * 1024
+
+    async def _plan_zip_volumes(self, result) -> list | None:
+        """下载目录超过分卷大小时返回分卷划分，否则返回 None（整包发送）"""
+        volume_bytes = self._zip_volume_bytes()
+        if not volume_bytes:
+            return None
+        volumes = await asyncio.to_thread(
+            JMPacker.plan_volumes, result.save_path, volume_bytes
+        )
+        return volumes if len(volumes) > 1 else None
+
+    @staticmethod
+    async def _abort_pack_pipeline(pipeline) -> None:
+        """放弃未收尾的流水线打包（已 close 时无操作）"""
+        if pipeline is not None and pipeline.started:
+            await asyncio.to_thread(pipeline.abort)
 
     @filter.command("jmhelp")
     async def help_command(self, event: AstrMessageEvent):
@@ -228,56 +379,80 @@ class JMCosmosPlugin(Star):
             return
 
         # 下载前原子预留配额（管理员/不限额时跳过）
-        ok, deny_msg, quota_reserved = self._reserve_quota(event)
+        ok, deny_msg, quota_reserved = await self._reserve_quota(event)
         if not ok:
             yield event.plain_result(deny_msg)
             return
 
         download_succeeded = False
+        pipeline = None
         try:
             # 发送开始下载提示
             yield event.plain_result(f"⏳ 开始下载本子 {album_id}，请稍候...")
 
-            # 如果配置了发送封面预览，获取详情和封面（预览失败不应中断下载）
-            if self.config_manager.send_cover_preview:
+            # 封面预览与产物缓存都需要详情（获取失败不应中断下载）；
+            # 产物缓存按章节列表取键，须用最新详情，避免命中过期的章节列表
+            detail = None
+            if self.config_manager.send_cover_preview or self.pack_cache.enabled:
                 try:
-                    detail = await self.browser.get_album_detail(album_id)
+                    detail = await self.browser.get_album_detail(
+                        album_id, refresh=self.pack_cache.enabled
+                    )
                 except Exception as preview_err:
-                    logger.debug(f"获取封面预览详情失败，跳过预览: {preview_err}")
-                    detail = None
-                if detail:
-                    # 获取封面图片
-                    cover_dir = self.config_manager.download_dir / "covers"
-                    cover_path = await self.browser.get_album_cover(album_id, cover_dir)
-
-                    if cover_path and cover_path.exists():
-                        # 构建封面消息链
-                        from astrbot.api.event import MessageChain
-
-                        cover_chain = MessageChain(
-                            [
-                                Comp.Image(file=str(cover_path)),
-                                Comp.Plain(MessageFormatter.format_album_info(detail)),
-                            ]
-                        )
+                    logger.debug(f"获取本子详情失败，跳过预览: {preview_err}")
 
-                        # 根据配置决定是否对封面消息自动撤回
-                        if self.config_manager.cover_recall_enabled:
-                            await send_with_recall(
-                                event,
-                                cover_chain,
-                                self.config_manager.auto_recall_delay,
-                            )
-                        else:
-                            yield event.chain_result(cover_chain.chain)
-                    else:
-                        yield event.plain_result(
-                            MessageFormatter.format_album_info(detail)
+            # 如果配置了发送封面预览，发送详情和封面
+            if self.config_manager.send_cover_preview and detail:
+                # 获取封面图片
+                cover_path = await self._get_cover(album_id)
+
+                if cover_path and cover_path.exists():
+                    # 构建封面消息链
+                    from astrbot.api.event import MessageChain
+
+                    cover_chain = MessageChain(
+                        [
+                            Comp.Image(file=str(cover_path)),
+                            Comp.Plain(MessageFormatter.format_album_info(detail)),
+                        ]
+                    )
+
+                    # 根据配置决定是否对封面消息自动撤回
+                    if self.config_manager.cover_recall_enabled:
+                        await send_with_recall(
+                            event,
+                            cover_chain,
+                            self.config_manager.auto_recall_delay,
                         )
+                    else:
+                        yield event.chain_result(cover_chain.chain)
+                else:
+                    yield event.plain_result(MessageFormatter.format_album_info(detail))
 
-            # 执行下载
+            # 命中产物缓存则直接发送，跳过下载与打包
+            cache_key = None
+            if detail and detail.get("photo_ids"):
+                digest = PackCache.chapters_digest(detail["photo_ids"])
+                cache_key = self._pack_cache_key(album_id, f"all:{digest}")
+            cached = (
+                await self.pack_cache.get_async(cache_key, pin=True)
+                if cache_key
+                else None
+            )
+            if cached:
+                download_succeeded = True
+                async for msg in self._emit_cached_pack(event, album_id, cached):
+                    yield msg
+                return
+
+            # 执行下载（开启流水线打包时边下载边写入）
+            packer = self._new_packer()
+            pipeline = self._open_pack_pipeline(packer, album_id)
             result = await self.download_manager.download_album(
-                album_id, self._make_progress_callback(event)
+                album_id,
+                self._make_progress_callback(event),
+                **self._download_schedule(event),
+                pack_pipeline=pipeline,
             )
 
             if not result.success:
@@ -291,64 +466,28 @@ class JMCosmosPlugin(Star):
             # 下载成功，配额已在预留阶段计入（管理员不计）
             download_succeeded = True
 
-            # 生成文件名
-            output_name = generate_album_filename(
-                album_id=album_id,
-                password=self.config_manager.pack_password,
-                show_password=self.config_manager.filename_show_password,
-            )
-
-            # 打包文件
-            packer = JMPacker(
-                pack_format=self.config_manager.pack_format,
-                password=self.config_manager.pack_password,
-            )
-
-            pack_result = packer.pack(
-                source_dir=result.save_path,
-                output_name=output_name,
-            )
-
-            result_msg = MessageFormatter.format_download_result(result, pack_result)
-
-            if (
-                pack_result.success
-                and pack_result.output_path
-                and pack_result.format != "none"
-            ):
-                # 构建文件路径 - 调试输出
-                file_path_str = str(pack_result.output_path)
-                logger.info(f"准备发送文件: {file_path_str}")
-
-                # 构建消息链
-                from astrbot.api.event import MessageChain
-
-                file_chain = MessageChain(
-                    [
-                        Comp.Plain(result_msg),
-                        Comp.File(
-                            name=pack_result.output_path.name,
-                            file=file_path_str,
-                        ),
-                    ]
-                )
+            pack_result = None
+            try:
+                # 超过分卷大小：逐卷打包、写完一卷发送一卷
+                volumes = await self._plan_zip_volumes(result)
+                if volumes:
+                    async for msg in self._emit_zip_volumes(
+                        event, result, packer, volumes
+                    ):
+                        yield msg
+                    return
 
-                # 根据配置决定是否使用自动撤回
-                if self.config_manager.auto_recall_enabled:
-                    await send_with_recall(
-                        event,
-                        file_chain,
-                        self.config_manager.auto_recall_delay,
-                    )
-                else:
-                    yield event.chain_result(file_chain.chain)
+                # 打包文件
+                pack_result = await self._pack_download(packer, result, pipeline)
 
-                # 自动清理
-                if self.config_manager.auto_delete_after_send:
-                    JMPacker.cleanup(result.save_path)
-                    JMPacker.cleanup(pack_result.output_path)
-            else:
-                yield event.plain_result(result_msg)
+                pinned = await self._store_pack_cache(cache_key, result, pack_result)
+                try:
+                    async for msg in self._emit_packed_file(event, result, pack_result):
+                        yield msg
+                finally:
+                    self.pack_cache.unpin(pinned)
+            finally:
+                self._finish_download_dir(result, pack_result)
 
         except Exception as e:
             logger.error(f"下载本子失败: {e}")
@@ -359,8 +498,9 @@ class JMCosmosPlugin(Star):
             etype, emsg = classify_exception(e)
             yield event.plain_result(MessageFormatter.format_error(etype, emsg))
         finally:
+            await self._abort_pack_pipeline(pipeline)
             if not download_succeeded:
-                self._refund_quota(event, quota_reserved)
+                await self._refund_quota(event, quota_reserved)
 
     @filter.command("jmc")
     async def download_photo_command(
@@ -401,7 +541,7 @@ class JMCosmosPlugin(Star):
             return
 
         # 下载前原子预留配额（管理员/不限额时跳过）
-        ok, deny_msg, quota_reserved = self._reserve_quota(event)
+        ok, deny_msg, quota_reserved = await self._reserve_quota(event)
         if not ok:
             yield event.plain_result(deny_msg)
             return
@@ -425,6 +565,19 @@ class JMCosmosPlugin(Star):
 
             photo_id, photo_title, total_chapters = chapter_info
 
+            # 命中产物缓存则直接发送，跳过下载与打包
+            cache_key = self._pack_cache_key(album_id, f"photo:{photo_id}")
+            cached = (
+                await self.pack_cache.get_async(cache_key, pin=True)
+                if cache_key
+                else None
+            )
+            if cached:
+                download_succeeded = True
+                async for msg in self._emit_cached_pack(event, album_id, cached):
+                    yield msg
+                return
+
             yield event.plain_result(
                 f"📖 找到章节: {photo_title}\n"
                 f"📚 章节: {chapter_idx}/{total_chapters}\n"
@@ -433,7 +586,10 @@ class JMCosmosPlugin(Star):
 
             # 使用真正的 photo_id 下载
             result = await self.download_manager.download_photo(
-                photo_id, self._make_progress_callback(event)
+                photo_id,
+                self._make_progress_callback(event),
+                **self._download_schedule(event),
+                album_id=album_id,
             )
 
             if not result.success:
@@ -453,57 +609,27 @@ class JMCosmosPlugin(Star):
                 password=self.config_manager.pack_password,
                 chapter_idx=chapter_idx,
                 show_password=self.config_manager.filename_show_password,
+                copy_index=result.share_index,
             )
 
             # 打包
-            packer = JMPacker(
-                pack_format=self.config_manager.pack_format,
-                password=self.config_manager.pack_password,
-            )
+            packer = self._new_packer()
 
-            pack_result = packer.pack(
-                source_dir=result.save_path,
-                output_name=output_name,
-            )
-
-            result_msg = MessageFormatter.format_download_result(result, pack_result)
-
-            if (
-                pack_result.success
-                and pack_result.output_path
-                and pack_result.format != "none"
-            ):
-                file_path_str = str(pack_result.output_path)
-                logger.info(f"准备发送章节文件: {file_path_str}")
-
-                # 构建消息链
-                from astrbot.api.event import MessageChain
-
-                file_chain = MessageChain(
-                    [
-                        Comp.Plain(result_msg),
-                        Comp.File(
-                            name=pack_result.output_path.name,
-                            file=file_path_str,
-                        ),
-                    ]
+            pack_result = None
+            try:
+                pack_result = await packer.pack_async(
+                    source_dir=result.save_path,
+                    output_name=output_name,
                 )
 
-                # 根据配置决定是否使用自动撤回
-                if self.config_manager.auto_recall_enabled:
-                    await send_with_recall(
-                        event,
-                        file_chain,
-                        self.config_manager.auto_recall_delay,
-                    )
-                else:
-                    yield event.chain_result(file_chain.chain)
-
-                if self.config_manager.auto_delete_after_send:
-                    JMPacker.cleanup(result.save_path)
-                    JMPacker.cleanup(pack_result.output_path)
-            else:
-                yield event.plain_result(result_msg)
+                pinned = await self._store_pack_cache(cache_key, result, pack_result)
+                try:
+                    async for msg in self._emit_packed_file(event, result, pack_result):
+                        yield msg
+                finally:
+                    self.pack_cache.unpin(pinned)
+            finally:
+                self._finish_download_dir(result, pack_result)
 
         except Exception as e:
             logger.error(f"下载章节失败: {e}")
@@ -511,7 +637,7 @@ class JMCosmosPlugin(Star):
             yield event.plain_result(MessageFormatter.format_error(etype, emsg))
         finally:
             if not download_succeeded:
-                self._refund_quota(event, quota_reserved)
+                await self._refund_quota(event, quota_reserved)
 
     @filter.command("jms")
     async def search_command(
@@ -626,8 +752,7 @@ class JMCosmosPlugin(Star):
 
             # 根据配置决定是否发送封面图片
             if self.config_manager.send_cover_preview:
-                cover_dir = self.config_manager.download_dir / "covers"
-                cover_path = await self.browser.get_album_cover(album_id, cover_dir)
+                cover_path = await self._get_cover(album_id)
 
                 if cover_path and cover_path.exists():
                     # 构建封面消息链
@@ -959,11 +1084,68 @@ class JMCosmosPlugin(Star):
         status = self.auth_manager.get_login_status()
 
         if status["logged_in"]:
-            yield event.plain_result(f"✅ 已登录\n👤 用户名: {status['username']}")
+            text = f"✅ 已登录\n👤 用户名: {status['username']}"
         else:
-            yield event.plain_result(
-                "❌ 当前未登录\n💡 使用 /jmlogin <用户名> <密码> 登录"
+            text = "❌ 当前未登录\n💡 使用 /jmlogin <用户名> <密码> 登录"
+
+        pack = JMPacker.pool_stats()
+        text += f"\n📦 打包: 进行中 {pack['running']} / 排队 {pack['queued']}"
+        download = self.download_manager.scheduler.stats()
+        text += (
+            f"\n⬇️ 下载: 进行中 {download['running']} / 排队 {download['queued']}"
+            f" / 合并 {self.download_manager.coalesced_downloads}"
+        )
+        concurrency = self.download_manager.concurrency_stats()
+        if concurrency is not None:
+            latency = concurrency["latency_ms"]
+            text += (
+                f"\n🎚️ 图片并发: {concurrency['limit']}"
+                f"（{concurrency['min']}-{concurrency['max']}）"
+                f" / 进行中 {concurrency['in_flight']}"
+                f" / 延迟 {f'{latency}ms' if latency is not None else '-'}"
+                f" / 错误率 {concurrency['error_rate']:.0%}"
+            )
+        if self.domain_health is not None:
+            labels = []
+            for d in self.domain_health.stats(self.config_manager.client_domain):
+                if not d["healthy"]:
+                    labels.append(f"{d['domain']} ✗")
+                elif d["ewma_ms"] is not None:
+                    labels.append(f"{d['domain']} {d['ewma_ms']:.0f}ms")
+                else:
+                    labels.append(d["domain"])
+            text += "\n🌐 域名: " + " > ".join(labels)
+        sub_check = self.subscription_checker.stats()
+        if sub_check is not None:
+            text += (
+                f"\n🔔 订阅检查: {sub_check['albums']} 本"
+                f" / 上轮到期 {sub_check['due']}"
+                f" / 详情 {sub_check['fetched']} / 跳过 {sub_check['skipped']}"
+                f" / 耗时 {sub_check['duration']:.1f}s"
+                f"（间隔 {self.config_manager.subscribe_check_interval}s）"
+                f" / 失败 {sub_check['failed']}"
+            )
+        if self.prefetcher.enabled:
+            prefetch = self.prefetcher.stats()
+            text += (
+                f"\n📦 订阅预取: 完成 {prefetch['completed']} / 进行中 {prefetch['running']}"
+                f" / 失败 {prefetch['failed']} / 配额跳过 {prefetch['skipped_quota']}"
+                f" / 磁盘跳过 {prefetch['skipped_disk']}"
+                f" / 过期清理 {prefetch['expired']}"
             )
+        pool = JMClientMixin.client_pool_stats()
+        text += f"\n🔌 连接复用: 复用 {pool['reused']} / 新建 {pool['created']}"
+        detail_cache = self.browser.detail_cache_stats()
+        text += (
+            f"\n🗂️ 详情缓存: 命中 {detail_cache['hits']} / 未命中 {detail_cache['misses']}"
+            f" / 合并 {detail_cache['coalesced']}"
+        )
+        covers = self.cover_cache.stats()
+        text += (
+            f"\n🖼️ 封面缓存: 命中 {covers['hits']} / 未命中 {covers['misses']}"
+            f" / 淘汰 {covers['evicted']}"
+        )
+        yield event.plain_result(text)
 
     @filter.command("jmfav")
     async def favorites_command(
@@ -1072,14 +1254,14 @@ class JMCosmosPlugin(Star):
             return
 
         umo = event.unified_msg_origin
-        if self.subscription_manager.exists(umo, album_id):
+        if await self.subscription_manager.exists_async(umo, album_id):
             yield event.plain_result(f"ℹ️ 本会话已订阅本子 {album_id}")
             return
 
         yield event.plain_result(f"🔔 正在订阅本子 {album_id}...")
 
         try:
-            detail = await self.browser.get_album_detail(album_id)
+            detail = await self.browser.get_album_detail(album_id, refresh=True)
         except Exception as e:
             logger.error(f"订阅时获取详情失败: {e}")
             etype, emsg = classify_exception(e)
@@ -1091,7 +1273,7 @@ class JMCosmosPlugin(Star):
 
         title = detail.get("title", "")
         count = int(detail.get("photo_count", 0) or 0)
-        ok = self.subscription_manager.add(
+        ok = await self.subscription_manager.add_async(
             umo, album_id, event.get_sender_id(), title, count
         )
         if ok:
@@ -1121,7 +1303,7 @@ class JMCosmosPlugin(Star):
 
         album_id = str(album_id).strip()
         umo = event.unified_msg_origin
-        if self.subscription_manager.remove(umo, album_id):
+        if await self.subscription_manager.remove_async(umo, album_id):
             yield event.plain_result(f"✅ 已取消订阅本子 {album_id}")
         else:
             yield event.plain_result(f"ℹ️ 本会话未订阅本子 {album_id}")
@@ -1138,7 +1320,7 @@ class JMCosmosPlugin(Star):
             yield event.plain_result(error_msg)
             return
 
-        subs = self.subscription_manager.list_for(event.unified_msg_origin)
+        subs = await self.subscription_manager.list_for_async(event.unified_msg_origin)
         yield event.plain_result(MessageFormatter.format_subscriptions(subs))
 
     @filter.command("jmupdate")
@@ -1163,19 +1345,20 @@ class JMCosmosPlugin(Star):
             return
 
         # 下载前原子预留配额（管理员/不限额时跳过）
-        ok, deny_msg, quota_reserved = self._reserve_quota(event)
+        ok, deny_msg, quota_reserved = await self._reserve_quota(event)
         if not ok:
             yield event.plain_result(deny_msg)
             return
 
         umo = event.unified_msg_origin
-        skip = self.subscription_manager.get_last_count(umo, album_id) or 0
+        skip = await self.subscription_manager.get_last_count_async(umo, album_id) or 0
 
         download_succeeded = False
+        pipeline = None
         try:
             yield event.plain_result(f"⏳ 正在检查本子 {album_id} 的更新...")
 
-            detail = await self.browser.get_album_detail(album_id)
+            detail = await self.browser.get_album_detail(album_id, refresh=True)
             if not detail:
                 yield event.plain_result(MessageFormatter.format_error("not_found"))
                 return
@@ -1188,11 +1371,37 @@ class JMCosmosPlugin(Star):
                 return
 
             new_chapters = current - skip if skip else current
+
+            # 命中产物缓存则直接发送，跳过下载与打包
+            cache_key = None
+            if detail.get("photo_ids"):
+                digest = PackCache.chapters_digest(detail["photo_ids"])
+                cache_key = self._pack_cache_key(album_id, f"from:{skip}:{digest}")
+            cached = (
+                await self.pack_cache.get_async(cache_key, pin=True)
+                if cache_key
+                else None
+            )
+            if cached:
+                download_succeeded = True
+                await self.subscription_manager.update_count_async(
+                    umo, album_id, current
+                )
+                async for msg in self._emit_cached_pack(event, album_id, cached):
+                    yield msg
+                return
+
             scope = f"新增 {new_chapters} 章" if skip else "全部章节"
             yield event.plain_result(f"📥 开始下载{scope}...")
 
+            packer = self._new_packer()
+            pipeline = self._open_pack_pipeline(packer, album_id)
             result = await self.download_manager.download_album(
-                album_id, self._make_progress_callback(event), skip
+                album_id,
+                self._make_progress_callback(event),
+                skip,
+                **self._download_schedule(event),
+                pack_pipeline=pipeline,
             )
 
             if not result.success:
@@ -1206,113 +1415,297 @@ class JMCosmosPlugin(Star):
             # 下载成功，配额已在预留阶段计入（管理员不计）
             download_succeeded = True
 
-            output_name = generate_album_filename(
-                album_id=album_id,
-                password=self.config_manager.pack_password,
-                show_password=self.config_manager.filename_show_password,
-            )
-            packer = JMPacker(
-                pack_format=self.config_manager.pack_format,
-                password=self.config_manager.pack_password,
-            )
-            pack_result = packer.pack(
-                source_dir=result.save_path, output_name=output_name
-            )
+            pack_result = None
+            try:
+                volumes = await self._plan_zip_volumes(result)
+                if not volumes:
+                    pack_result = await self._pack_download(packer, result, pipeline)
 
-            # 同步更新订阅记录的已知章节数
-            if self.subscription_manager.exists(umo, album_id):
-                self.subscription_manager.update_count(umo, album_id, current)
+                # 同步更新订阅记录的已知章节数（未订阅时不影响任何记录）
+                await self.subscription_manager.update_count_async(
+                    umo, album_id, current
+                )
 
-            async for msg in self._emit_packed_file(event, result, pack_result):
-                yield msg
+                if volumes:
+                    async for msg in self._emit_zip_volumes(
+                        event, result, packer, volumes
+                    ):
+                        yield msg
+                    return
+
+                pinned = await self._store_pack_cache(cache_key, result, pack_result)
+                try:
+                    async for msg in self._emit_packed_file(event, result, pack_result):
+                        yield msg
+                finally:
+                    self.pack_cache.unpin(pinned)
+            finally:
+                self._finish_download_dir(result, pack_result)
 
         except Exception as e:
             logger.error(f"增量下载失败: {e}")
             etype, emsg = classify_exception(e)
             yield event.plain_result(MessageFormatter.format_error(etype, emsg))
         finally:
+            await self._abort_pack_pipeline(pipeline)
             if not download_succeeded:
-                self._refund_quota(event, quota_reserved)
+                await self._refund_quota(event, quota_reserved)
 
-    async def _emit_packed_file(self, event: AstrMessageEvent, result, pack_result):
-        """统一处理打包文件的发送（含自动撤回与清理），供下载类命令复用"""
-        result_msg = MessageFormatter.format_download_result(result, pack_result)
+    async def _emit_packed_file(
+        self, event: AstrMessageEvent, result, pack_result, cached: bool = False
+    ):
+        """统一处理打包文件的发送（含自动撤回与产物清理），供下载类命令复用
+
+        缓存中的产物由 PackCache 管理生命周期，发送后不删除；下载目录由调用方
+        在 finally 中经 _finish_download_dir 释放。
+        """
+        result_msg = MessageFormatter.format_download_result(
+            result, pack_result, cached=cached
+        )
 
         if (
             pack_result.success
             and pack_result.output_path
             and pack_result.format != "none"
         ):
-            from astrbot.api.event import MessageChain
-
-            file_chain = MessageChain(
-                [
-                    Comp.Plain(result_msg),
-                    Comp.File(
-                        name=pack_result.output_path.name,
-                        file=str(pack_result.output_path),
-                    ),
-                ]
-            )
-
-            if self.config_manager.auto_recall_enabled:
-                await send_with_recall(
-                    event, file_chain, self.config_manager.auto_recall_delay
-                )
-            else:
-                yield event.chain_result(file_chain.chain)
+            async for msg in self._send_file(
+                event, result_msg, pack_result.output_path
+            ):
+                yield msg
 
-            if self.config_manager.auto_delete_after_send:
-                JMPacker.cleanup(result.save_path)
+            if (
+                self.config_manager.auto_delete_after_send
+                and not cached
+                and not self.pack_cache.owns(pack_result.output_path)
+            ):
                 JMPacker.cleanup(pack_result.output_path)
         else:
             yield event.plain_result(result_msg)
 
+    async def _emit_zip_volumes(
+        self, event: AstrMessageEvent, result, packer: JMPacker, volumes: list
+    ):
+        """逐卷打包并发送：每卷写完即发送，发送后按配置删除，磁盘占用有上限
+
+        分卷不进入产物缓存；下载目录由调用方释放。
+        """
+        output_name = self._album_output_name(result.album_id, result.share_index)
+        failed = None
+        async with aclosing(
+            packer.pack_volumes_async(result.save_path, output_name, volumes)
+        ) as parts:
+            async for part in parts:
+                if not part.success:
+                    failed = part
+                    break
+                if part.volume_index == 1:
+                    caption = MessageFormatter.format_download_result(result, part)
+                else:
+                    caption = MessageFormatter.format_volume_caption(
+                        part.volume_index, part.volume_total
+                    )
+                async for msg in self._send_file(event, caption, part.output_path):
+                    yield msg
+                if self.config_manager.auto_delete_after_send:
+                    JMPacker.cleanup(part.output_path)
+
+        if failed is not None:
+            yield event.plain_result(
+                MessageFormatter.format_download_result(result, failed)
+            )
+
+    async def _send_file(self, event: AstrMessageEvent, caption: str, path: Path):
+        """发送带说明文字的文件（按配置自动撤回）"""
+        from astrbot.api.event import MessageChain
+
+        logger.info(f"准备发送文件: {path}")
+        file_chain = MessageChain(
+            [Comp.Plain(caption), Comp.File(name=path.name, file=str(path))]
+        )
+
+        if self.config_manager.auto_recall_enabled:
+            await send_with_recall(
+                event, file_chain, self.config_manager.auto_recall_delay
+            )
+        else:
+            yield event.chain_result(file_chain.chain)
+
+    def _finish_download_dir(self, result, pack_result=None) -> None:
+        """发送结束（含打包或发送异常）后释放下载目录
+
+        开启发送后删除时由最后一个使用者清理目录；打包为 none 或打包失败时
+        保留目录（文件仍在本地供取用）。
+        """
+        self.prefetcher.claim(result.save_path)
+        keep = pack_result is not None and not (
+            pack_result.success
+            and pack_result.output_path
+            and pack_result.format != "none"
+        )
+        if self.config_manager.auto_delete_after_send and not keep:
+            self._release_download_dir(result)
+        else:
+            self.download_manager.release_save_path(result.save_path)
+
+    def _release_download_dir(self, result) -> None:
+        """释放下载目录；共享下载的目录由最后一个发送完的调用方清理"""
+        if self.download_manager.release_save_path(result.save_path):
+            JMPacker.cleanup(result.save_path)
+            self.download_manager.drop_manifest(result.album_id)
+
+    # ==================== 打包产物缓存 ====================
+
+    def _pack_cache_key(self, album_id: str, chapters: str) -> str | None:
+        """计算产物缓存键；缓存关闭或不打包（none）时返回 None"""
+        pack_format = self.config_manager.pack_format
+        if not self.pack_cache.enabled or pack_format == "none":
+            return None
+        return PackCache.make_key(
+            album_id,
+            chapters,
+            pack_format,
+            self.config_manager.pack_password,
+            self.config_manager.image_suffix,
+            self.config_manager.filename_show_password,
+        )
+
+    async def _store_pack_cache(
+        self, cache_key: str | None, result, pack_result
+    ) -> str | None:
+        """把完整下载的打包产物移入缓存，并把 pack_result 指向缓存中的路径
+
+        Returns:
+            已固定的缓存键（发送结束后须 unpin），未进入缓存时为 None
+        """
+        if (
+            not cache_key
+            or not result.all_success
+            or not pack_result.success
+            or not pack_result.output_path
+        ):
+            return None
+        meta = {
+            "title": result.title,
+            "author": result.author,
+            "photo_count": result.photo_count,
+            "image_count": result.image_count,
+            "format": pack_result.format,
+            "encrypted": pack_result.encrypted,
+        }
+        cached_path = await self.pack_cache.put_async(
+            cache_key, result.album_id, pack_result.output_path, meta, pin=True
+        )
+        if cached_path is None:
+            return None
+        pack_result.output_path = cached_path
+        return cache_key
+
+    async def _emit_cached_pack(
+        self, event: AstrMessageEvent, album_id: str, entry: dict
+    ):
+        """发送缓存命中的产物（不下载、不打包、不删除），发送结束后解除固定"""
+        result = DownloadResult(
+            success=True,
+            album_id=album_id,
+            title=entry.get("title", ""),
+            author=entry.get("author", ""),
+            photo_count=entry.get("photo_count", 0),
+            image_count=entry.get("image_count", 0),
+            save_path=entry["path"].parent,
+        )
+        pack_result = PackResult(
+            success=True,
+            output_path=entry["path"],
+            format=entry.get("format", self.config_manager.pack_format),
+            encrypted=entry.get("encrypted", False),
+        )
+        try:
+            async for msg in self._emit_packed_file(
+                event, result, pack_result, cached=True
+            ):
+                yield msg
+        finally:
+            self.pack_cache.unpin(entry.get("key"))
+
     # ==================== 订阅后台检查 ====================
 
     async def _subscription_loop(self) -> None:
-        """后台定时检查订阅本子是否有新章节"""
+        """后台分片检查订阅：每个 tick 只检查到期的本子，请求平摊到整个间隔"""
         await asyncio.sleep(30)  # 启动缓冲，避免与初始化争抢
         while True:
             interval = self.config_manager.subscribe_check_interval
             if interval <= 0:
                 logger.info("订阅检查间隔为 0，停止后台检查")
                 return
+            interval = max(60, interval)
             try:
-                await self._check_subscriptions_once()
+                await self._check_subscriptions_once(interval)
             except asyncio.CancelledError:
                 raise
             except Exception as e:
                 logger.error(f"订阅检查出错: {e}")
+            await asyncio.sleep(SubscriptionChecker.tick_seconds(interval))
+
+    def _domain_probe_transport(self):
+        """域名探测函数（启用代理时经代理探测）"""
+        proxies = None
+        if self.config_manager.use_proxy and self.config_manager.proxy_url:
+            url = self.config_manager.proxy_url
+            proxies = {"http": url, "https": url}
+        return partial(http_probe, proxies=proxies)
+
+    def _apply_domain_order(self) -> None:
+        """按健康度调整新客户端的域名顺序，顺序变化时作废池中旧客户端"""
+        order = self.domain_health.ordered(self.config_manager.client_domain)
+        if self.config_manager.set_domain_order(order):
+            JMClientMixin.refresh_client_pool()
+            logger.info(f"域名顺序已按健康度调整: {', '.join(order)}")
+
+    async def _domain_probe_loop(self) -> None:
+        """后台定时探测自定义域名，记录延迟与失败并持久化"""
+        while True:
+            interval = self.config_manager.domain_probe_interval
+            if interval <= 0:
+                return
+            try:
+                await asyncio.to_thread(
+                    self.domain_health.probe, self.config_manager.client_domain
+                )
+                await asyncio.to_thread(self.domain_health.save)
+                self._apply_domain_order()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"域名探测出错: {e}")
             await asyncio.sleep(max(60, interval))
 
-    async def _check_subscriptions_once(self) -> None:
-        """检查所有订阅一次，发现更新则通知对应会话"""
+    async def _check_subscriptions_once(self, interval: int) -> None:
+        """检查一次到期的订阅，发现更新则通知对应会话"""
         if not JMBrowser.is_available():
             return
 
-        subs = self.subscription_manager.list_all()
-        if not subs:
+        cycle = await self.subscription_checker.run_due(interval)
+        # 没有新的预取时也按时清理过期的预取目录
+        await self.prefetcher.expire()
+        if not cycle.due and not cycle.listing_requests:
             return
-
-        for sub in subs:
-            try:
-                detail = await self.browser.get_album_detail(sub["album_id"])
-                if not detail:
-                    continue
-                current = int(detail.get("photo_count", 0) or 0)
-                last = int(sub.get("last_count", 0) or 0)
-                if current > last:
-                    title = detail.get("title") or sub.get("title") or ""
-                    self.subscription_manager.update_count(
-                        sub["umo"], sub["album_id"], current
-                    )
-                    await self._notify_update(
-                        sub["umo"], sub["album_id"], title, last, current
-                    )
-            except Exception as e:
-                logger.debug(f"检查订阅 {sub.get('album_id')} 失败: {e}")
-            await asyncio.sleep(2)  # 轻微限速，降低风控风险
+        summary = (
+            f"订阅检查: 到期 {cycle.due} / 共 {cycle.albums} 个本子，"
+            f"拉取详情 {cycle.fetched}（列表判定跳过 {cycle.skipped}），"
+            f"更新 {cycle.updated}，失败 {cycle.failed}，耗时 {cycle.duration:.1f}s"
+        )
+        if cycle.deferred or cycle.rephased:
+            summary += f"（顺延 {cycle.deferred}，重新分布 {cycle.rephased}）"
+        if cycle.updated:
+            logger.info(summary)
+        else:
+            logger.debug(summary)
+        tick = SubscriptionChecker.tick_seconds(interval)
+        if cycle.duration > tick:
+            logger.warning(
+                f"订阅检查单轮耗时 {cycle.duration:.0f}s 超过调度周期 {tick:.0f}s，"
+                "到期本子开始积压，可调大 subscribe_check_rpm 或检查间隔"
+            )
 
     async def _notify_update(
         self, umo: str, album_id: str, title: str, last: int, current: int
@@ -1333,13 +1726,20 @@ class JMCosmosPlugin(Star):
 
     async def terminate(self) -> None:
         """插件卸载时取消后台任务"""
-        task = getattr(self, "_subscription_task", None)
-        if task is not None and not task.done():
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
-            except Exception:
-                pass
+        for name in ("_subscription_task", "_domain_probe_task"):
+            task = getattr(self, name, None)
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                except Exception:
+                    pass
+        await self.prefetcher.shutdown()
+        JMPacker.shutdown_pool()
+        JMClientMixin.close_client_pool()
+        self.quota_manager.close()
+        self.subscription_manager.close()
+        self.browser.close()
         logger.info("JM-Cosmos II 插件已卸载")
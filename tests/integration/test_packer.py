@@ -203,3 +203,34 @@ class TestPdfPackingIntegration:
         assert result.format == "pdf"
         assert result.encrypted is True
         assert result.output_path.exists()
+
+    def test_pack_pdf_streams_pages_in_order(self, temp_download_dir, monkeypatch):
+        """跨越增量落盘边界时页面顺序与尺寸保持不变，且不残留临时文件"""
+        if not is_pymupdf_available():
+            pytest.skip("pymupdf 不可用")
+
+        import fitz
+
+        import core.packer
+
+        importlib.reload(core.packer)
+        from core.packer import JMPacker
+
+        monkeypatch.setattr(core.packer, "_PDF_FLUSH_PAGES", 2)
+
+        source_dir = temp_download_dir / "source_pdf_stream"
+        for chapter in (1, 2, 10):
+            chapter_dir = source_dir / str(chapter)
+            chapter_dir.mkdir(parents=True, exist_ok=True)
+            self._create_test_image(chapter_dir / "00001.png")
+        (source_dir / "2" / "00002.jpg").write_bytes(b"broken")
+
+        result = JMPacker(pack_format="pdf").pack(
+            source_dir, "test_pdf_stream", temp_download_dir
+        )
+
+        assert result.success is True, f"打包失败: {result.error_message}"
+        with fitz.open(result.output_path) as doc:
+            assert doc.page_count == 3
+            assert doc[0].rect.width == 1
+        assert not list(temp_download_dir.glob("*.part"))
@@ -54,8 +54,8 @@ plugin_pkg.__package__ = "astrbot_plugin_jm_cosmos"
 sys.modules["astrbot_plugin_jm_cosmos"] = plugin_pkg
 
 # 预先导入核心模块并注册
-from core import base as core_base  # noqa: E402
-from core import constants as core_constants  # noqa: E402
+from core import base as core_base
+from core import constants as core_constants
 
 # 设置 core 子包
 core_pkg = types.ModuleType("astrbot_plugin_jm_cosmos.core")
@@ -0,0 +1,158 @@
+"""
+本子详情缓存与并发请求合并测试
+
+验证 TTL 过期、SQLite 持久化、single-flight 合并以及 JMBrowser 的缓存接入。
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from core.album_cache import AlbumDetailCache
+from core.singleflight import SingleFlight
+
+DETAIL = {"id": "123", "title": "标题", "photo_count": 3, "tags": ["a"]}
+
+
+class TestAlbumDetailCache:
+    """详情缓存测试"""
+
+    def test_hit_and_miss_counters(self):
+        cache = AlbumDetailCache(ttl=60)
+        assert cache.get("123") is None
+        cache.put("123", DETAIL)
+        assert cache.get("123") == DETAIL
+        assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    def test_returns_copy(self):
+        cache = AlbumDetailCache(ttl=60)
+        cache.put("123", DETAIL)
+        cache.get("123")["title"] = "改动"
+        assert cache.get("123")["title"] == "标题"
+
+    def test_expired_entry_is_miss(self):
+        cache = AlbumDetailCache(ttl=60)
+        with patch("core.album_cache.time.time", return_value=1000.0):
+            cache.put("123", DETAIL)
+        with patch("core.album_cache.time.time", return_value=1061.0):
+            assert cache.get("123") is None
+
+    def test_disabled_when_ttl_zero(self, tmp_path):
+        cache = AlbumDetailCache(ttl=0, db_path=tmp_path / "c.db")
+        cache.put("123", DETAIL)
+        assert cache.get("123") is None
+        assert not (tmp_path / "c.db").exists()
+
+    def test_persisted_across_instances(self, tmp_path):
+        db_path = tmp_path / "album_cache.db"
+        writer = AlbumDetailCache(ttl=60, db_path=db_path)
+        writer.put("123", DETAIL)
+        writer.close()
+        reader = AlbumDetailCache(ttl=60, db_path=db_path)
+        assert reader.get("123") == DETAIL
+        reader.close()
+
+    def test_invalidate(self, tmp_path):
+        cache = AlbumDetailCache(ttl=60, db_path=tmp_path / "c.db")
+        cache.put("123", DETAIL)
+        cache.invalidate("123")
+        assert cache.get("123") is None
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_async_interface_uses_db_thread(self, tmp_path):
+        db_path = tmp_path / "c.db"
+        writer = AlbumDetailCache(ttl=60, db_path=db_path)
+        await writer.put_async("123", DETAIL)
+        writer.close()
+
+        reader = AlbumDetailCache(ttl=60, db_path=db_path)
+        assert await reader.get_async("123") == DETAIL  # 内存未命中，读数据库
+        assert reader.stats()["entries"] == 1
+        await reader.invalidate_async("123")
+        assert await reader.get_async("123") is None
+        reader.close()
+
+
+class TestSingleFlight:
+    """并发请求合并测试"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        results = await asyncio.gather(*(flight.run("k", fetch) for _ in range(5)))
+        assert results == ["ok"] * 5
+        assert calls == 1
+        assert flight.stats() == {"in_flight": 0, "coalesced": 4}
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_all_waiters(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            flight.run("k", fail), flight.run("k", fail), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not flight.in_flight("k")
+
+
+class TestBrowserDetailCache:
+    """JMBrowser 详情缓存接入测试"""
+
+    @pytest.mark.asyncio
+    async def test_cached_and_coalesced(self, config_manager):
+        from core.browser import JMBrowser
+
+        browser = JMBrowser(config_manager)
+        calls = 0
+
+        def fake_sync(album_id, option):
+            nonlocal calls
+            calls += 1
+            return dict(DETAIL)
+
+        with (
+            patch.object(browser, "is_available", return_value=True),
+            patch.object(browser, "_get_option", return_value=object()),
+            patch.object(browser, "_get_album_detail_sync", side_effect=fake_sync),
+        ):
+            await asyncio.gather(*(browser.get_album_detail("123") for _ in range(3)))
+            assert await browser.get_album_detail("123") == DETAIL
+            assert calls == 1
+            await browser.get_album_detail("123", refresh=True)
+            assert calls == 2
+
+        stats = browser.detail_cache_stats()
+        assert stats["coalesced"] == 2
+        assert stats["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_not_cached(self, config_manager):
+        from core.browser import JMBrowser
+
+        browser = JMBrowser(config_manager)
+        with (
+            patch.object(browser, "is_available", return_value=True),
+            patch.object(browser, "_get_option", return_value=object()),
+            patch.object(
+                browser,
+                "_get_album_detail_sync",
+                side_effect=[RuntimeError("network down"), dict(DETAIL)],
+            ),
+        ):
+            with pytest.raises(RuntimeError):
+                await browser.get_album_detail("123")
+            assert await browser.get_album_detail("123") == DETAIL
@@ -0,0 +1,235 @@
+"""
+客户端池测试
+
+使用假 option/client 验证租用归还、按身份隔离、空闲超时与按操作租用。
+"""
+
+import threading
+from unittest.mock import patch
+
+from core.base.client_pool import JMClientPool
+
+
+class _FakeClient:
+    def __init__(self, domain_list=None):
+        self.closed = False
+        self.calls = 0
+        self.domain_list = domain_list or ["default"]
+
+    def get_album_detail(self, album_id):
+        self.calls += 1
+        return f"album-{album_id}"
+
+    def close(self):
+        self.closed = True
+
+    def get_root_postman(self):
+        return self
+
+
+class _FakeOption:
+    """只提供池需要的最少接口：new_jm_client 与客户端配置"""
+
+    def __init__(self, cookies=None, domain=None):
+        self.cookies = cookies or {}
+        self.domain = domain or []
+        self.created: list[_FakeClient] = []
+
+        option = self
+
+        class _Client:
+            impl = "fake"
+
+            @property
+            def src_dict(self):
+                return {
+                    "domain": option.domain,
+                    "postman": {"meta_data": {"cookies": option.cookies}},
+                }
+
+        self.client = _Client()
+
+    def new_jm_client(self, domain_list=None):
+        client = _FakeClient(domain_list)
+        self.created.append(client)
+        return client
+
+
+def _pool(**kwargs) -> JMClientPool:
+    pool = JMClientPool(**kwargs)
+    # 假 option 不走 keep-alive 配置构建
+    pool._build_session_option = staticmethod(lambda option: option)
+    return pool
+
+
+class TestJMClientPool:
+    """客户端池测试"""
+
+    def test_reuses_released_client(self):
+        pool = _pool(max_size=2)
+        option = _FakeOption()
+
+        with pool.lease(option) as first:
+            pass
+        with pool.lease(option) as second:
+            pass
+
+        assert first is second
+        assert pool.stats() == {"idle": 1, "leased": 0, "created": 1, "reused": 1}
+
+    def test_concurrent_leases_get_distinct_clients(self):
+        pool = _pool(max_size=2)
+        option = _FakeOption()
+
+        with pool.lease(option) as a, pool.lease(option) as b:
+            assert a is not b
+            assert pool.stats()["leased"] == 2
+
+    def test_overflow_is_closed(self):
+        pool = _pool(max_size=1)
+        option = _FakeOption()
+
+        with pool.lease(option) as a, pool.lease(option) as b:
+            pass
+
+        assert pool.stats()["idle"] == 1
+        assert a.closed != b.closed
+
+    def test_identity_change_does_not_reuse_clients(self):
+        pool = _pool(max_size=1)
+        option = _FakeOption()
+        with pool.lease(option) as anonymous:
+            pass
+
+        option.cookies = {"AVS": "logged-in"}
+        with pool.lease(option) as logged_in:
+            pass
+
+        assert logged_in is not anonymous
+        # 池容量为 1：旧身份的空闲客户端被挤出并关闭
+        assert anonymous.closed
+
+    def test_options_with_different_config_do_not_share(self):
+        pool = _pool(max_size=4)
+        first = _FakeOption(domain=["a.example"])
+        second = _FakeOption(domain=["b.example"])
+        same_as_first = _FakeOption(domain=["a.example"])
+
+        with pool.lease(first) as a:
+            pass
+        with pool.lease(second) as b:
+            pass
+        with pool.lease(same_as_first) as c:
+            pass
+
+        assert a is not b
+        assert c is a  # 配置相同的 option 共用客户端
+
+    def test_lease_with_domain_list(self):
+        pool = _pool(max_size=4)
+        option = _FakeOption()
+
+        with pool.lease(option, ["x.example"]) as rotated:
+            assert rotated.domain_list == ["x.example"]
+        with pool.lease(option) as default:
+            assert default is not rotated
+        with pool.lease(option, ["x.example"]) as again:
+            assert again is rotated
+
+    def test_invalidate_retires_idle_and_leased_clients(self):
+        pool = _pool(max_size=2)
+        option = _FakeOption()
+        with pool.lease(option), pool.lease(option):
+            pass
+
+        with pool.lease(option) as leased:
+            pool.invalidate()
+            assert pool.stats()["idle"] == 0
+            assert len([c for c in option.created if c.closed]) == 1
+        with pool.lease(option) as fresh:
+            pass
+
+        assert leased.closed
+        assert fresh not in option.created[:2]
+
+    def test_idle_timeout(self):
+        pool = _pool(max_size=2, idle_timeout=10)
+        option = _FakeOption()
+        with (
+            patch("core.base.client_pool.time.monotonic", return_value=100.0),
+            pool.lease(option) as old,
+        ):
+            pass
+        with (
+            patch("core.base.client_pool.time.monotonic", return_value=111.0),
+            pool.lease(option) as new,
+        ):
+            pass
+
+        assert new is not old
+        assert old.closed
+
+    def test_disabled_pool_creates_each_time(self):
+        pool = _pool(max_size=0)
+        option = _FakeOption()
+        with pool.lease(option):
+            pass
+        with pool.lease(option):
+            pass
+
+        assert len(option.created) == 2
+        assert all(client.closed for client in option.created)
+
+
+class TestLeasePerOperation:
+    """一次操作租用一个客户端"""
+
+    def test_client_state_kept_within_operation(self):
+        pool = _pool(max_size=2)
+        option = _FakeOption()
+
+        with pool.lease(option) as client:
+            # 操作内设置的状态（如登录 cookies）后续请求仍可见
+            client.cookies = {"AVS": "x"}
+            seen = []
+            threads = [
+                threading.Thread(
+                    target=lambda i=i: seen.append(
+                        (client.get_album_detail(i), client.cookies)
+                    )
+                )
+                for i in range(8)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert len(option.created) == 1
+        assert client.calls == 8
+        assert all(cookies == {"AVS": "x"} for _, cookies in seen)
+        assert pool.stats() == {"idle": 1, "leased": 0, "created": 1, "reused": 0}
+
+    def test_close_session_postman(self):
+        from core.base.client_pool import _close_client
+
+        class _Session:
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        class _SessionPostman:
+            """会话 postman 没有 close，只持有 session"""
+
+            def __init__(self):
+                self.session = _Session()
+
+        postman = _SessionPostman()
+
+        class _Client:
+            def get_root_postman(self):
+                return postman
+
+        _close_client(_Client())
+        assert postman.session.closed
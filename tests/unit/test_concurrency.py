@@ -0,0 +1,103 @@
+"""
+自适应并发控制测试
+
+验证 AIMD 的乘性减、加性增、延迟膨胀时保持，以及名额上限与异常分类。
+"""
+
+import threading
+
+from core.concurrency import AdaptiveConcurrency, is_throttle_error
+
+
+def _fill_window(controller, latency=0.1, error=None, samples=20):
+    for _ in range(samples):
+        controller.record(latency, error)
+
+
+def _saturate(controller):
+    """占满当前全部名额后立即释放，使窗口峰值达到上限"""
+    slots = [controller.slot() for _ in range(controller.limit)]
+    for slot in slots:
+        slot.__enter__()
+    for slot in slots:
+        slot.__exit__(None, None, None)
+
+
+class TestThrottleClassification:
+    """限流/超时异常识别"""
+
+    def test_is_throttle_error(self):
+        assert is_throttle_error(TimeoutError())
+        assert is_throttle_error(RuntimeError("HTTP 429 Too Many Requests"))
+        assert is_throttle_error(RuntimeError("Read timed out"))
+        assert not is_throttle_error(ValueError("bad image"))
+
+
+class TestAdaptiveConcurrency:
+    """AIMD 调整"""
+
+    def test_initial_and_bounds(self):
+        assert AdaptiveConcurrency(2, 10).limit == 10
+        assert AdaptiveConcurrency(2, 10, initial=1).limit == 2
+        assert AdaptiveConcurrency(5, 3).max_limit == 5
+
+    def test_throttle_halves_limit(self):
+        controller = AdaptiveConcurrency(2, 16)
+        _fill_window(controller, error=RuntimeError("429"), samples=1)
+        _fill_window(controller, samples=19)
+
+        assert controller.limit == 8
+        assert controller.decreases == 1
+
+    def test_high_error_rate_decreases_to_min(self):
+        controller = AdaptiveConcurrency(3, 8)
+        for _ in range(3):
+            _fill_window(controller, error=ValueError("broken"))
+
+        assert controller.limit == 3
+
+    def test_saturated_healthy_window_increases(self):
+        controller = AdaptiveConcurrency(1, 4, initial=2)
+        _fill_window(controller)  # 第一个窗口建立延迟基线
+        _saturate(controller)
+        _fill_window(controller)
+
+        assert controller.limit == 3
+        assert controller.increases >= 1
+
+    def test_unsaturated_window_holds(self):
+        controller = AdaptiveConcurrency(1, 4, initial=2)
+        _fill_window(controller)
+        _fill_window(controller)
+
+        assert controller.limit == 2
+
+    def test_latency_inflation_holds(self):
+        controller = AdaptiveConcurrency(1, 4, initial=2)
+        _fill_window(controller, latency=0.1)
+        _saturate(controller)
+        _fill_window(controller, latency=1.0)
+
+        assert controller.limit == 2
+
+    def test_slot_respects_limit(self):
+        controller = AdaptiveConcurrency(1, 1)
+        entered = threading.Event()
+
+        with controller.slot():
+            worker = threading.Thread(
+                target=lambda: controller.slot().__enter__() or entered.set()
+            )
+            worker.start()
+            assert not entered.wait(0.1)
+        worker.join(1)
+        assert entered.is_set()
+
+    def test_stats(self):
+        controller = AdaptiveConcurrency(2, 6)
+        _fill_window(controller, latency=0.25)
+
+        stats = controller.stats()
+        assert stats["limit"] == 6
+        assert stats["latency_ms"] == 250
+        assert stats["error_rate"] == 0
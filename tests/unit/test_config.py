@@ -159,3 +159,34 @@ class TestCustomConfig:
         manager = JMConfigManager(config, data_dir)
         assert manager.use_proxy is True
         assert manager.proxy_url == "http://127.0.0.1:7890"
+
+
+class TestDomainOrder:
+    """域名健康排序测试"""
+
+    def test_set_domain_order(self, data_dir):
+        from core.base import JMConfigManager
+
+        manager = JMConfigManager({"client_domain": "a.com, b.com, c.com"}, data_dir)
+        assert manager.ordered_client_domain == ["a.com", "b.com", "c.com"]
+
+        assert manager.set_domain_order(["c.com", "a.com", "b.com"]) is True
+        assert manager.ordered_client_domain == ["c.com", "a.com", "b.com"]
+        # 顺序未变化
+        assert manager.set_domain_order(["c.com", "a.com", "b.com"]) is False
+
+    def test_rejects_different_domain_set(self, data_dir):
+        from core.base import JMConfigManager
+
+        manager = JMConfigManager({"client_domain": "a.com,b.com"}, data_dir)
+        assert manager.set_domain_order(["b.com", "x.com"]) is False
+        assert manager.ordered_client_domain == ["a.com", "b.com"]
+
+    def test_stale_order_ignored_after_config_change(self, data_dir):
+        from core.base import JMConfigManager
+
+        config = {"client_domain": "a.com,b.com"}
+        manager = JMConfigManager(config, data_dir)
+        manager.set_domain_order(["b.com", "a.com"])
+        config["client_domain"] = "a.com,d.com"
+        assert manager.ordered_client_domain == ["a.com", "d.com"]
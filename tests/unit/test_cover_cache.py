@@ -0,0 +1,110 @@
+"""
+封面缓存测试
+
+验证命中刷新、压缩版本预生成与按字节上限的 LRU 淘汰。
+"""
+
+import os
+
+from PIL import Image
+
+from core.cover_cache import (
+    COMPRESSED_SUFFIX,
+    CoverCache,
+    compress_image,
+    compressed_variant,
+)
+
+
+def _write_cover(path, size=(1600, 2000), mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.effect_noise(size, 64).convert("RGB").save(path, quality=90)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+class TestCompress:
+    """compress_image / compressed_variant 测试"""
+
+    def test_resizes_to_max_size(self, temp_dir):
+        source = _write_cover(temp_dir / "1.jpg")
+        target = temp_dir / "1.small.jpg"
+        assert compress_image(source, target, max_size=512) is True
+        with Image.open(target) as img:
+            assert max(img.size) == 512
+        assert not list(temp_dir.glob(".*.tmp"))
+
+    def test_variant_requires_fresh_file(self, temp_dir):
+        source = _write_cover(temp_dir / "1.jpg", size=(64, 64))
+        assert compressed_variant(source) is None
+
+        variant = temp_dir / f"1{COMPRESSED_SUFFIX}"
+        compress_image(source, variant)
+        assert compressed_variant(source) == variant
+
+        os.utime(variant, (1, 1))  # 比原图旧，视为失效
+        assert compressed_variant(source) is None
+
+
+class TestCoverCache:
+    """CoverCache 测试"""
+
+    def test_admit_builds_variant_and_lookup_hits(self, temp_dir):
+        cache = CoverCache(temp_dir / "covers", 10 * 1024 * 1024)
+        assert cache.lookup("100") is None
+
+        cover = _write_cover(cache.path_for("100"))
+        cache.admit(cover)
+
+        assert cache.lookup("100") == cover
+        assert compressed_variant(cover) is not None
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["bytes"] > cover.stat().st_size
+
+    def test_evicts_least_recently_used(self, temp_dir):
+        cache = CoverCache(temp_dir / "covers", 10 * 1024 * 1024)
+        old = _write_cover(cache.path_for("1"), size=(64, 64), mtime=1000)
+        recent = _write_cover(cache.path_for("2"), size=(64, 64), mtime=2000)
+        new = _write_cover(cache.path_for("3"), size=(64, 64))
+        cache.admit(new)
+
+        # 上限只差 1 字节：淘汰最久未用的封面 1 即可，封面 2 与新封面保留
+        cache.max_bytes = cache.stats()["bytes"] - 1
+        assert cache.evict(keep=new) == 1
+        assert not old.exists()
+        assert recent.exists() and new.exists()
+        assert compressed_variant(new) is not None
+
+    def test_lookup_refreshes_recency(self, temp_dir):
+        cache = CoverCache(temp_dir / "covers", 10 * 1024 * 1024)
+        first = _write_cover(cache.path_for("1"), size=(64, 64), mtime=1000)
+        second = _write_cover(cache.path_for("2"), size=(64, 64), mtime=2000)
+        new = _write_cover(cache.path_for("3"), size=(64, 64))
+        cache.admit(new)
+
+        cache.lookup("1")  # 封面 1 变为最近使用
+        cache.max_bytes = cache.stats()["bytes"] - 1
+        cache.evict(keep=new)
+
+        assert first.exists()
+        assert not second.exists()
+
+    def test_zero_budget_never_evicts(self, temp_dir):
+        cache = CoverCache(temp_dir / "covers", 0)
+        covers = [_write_cover(cache.path_for(str(i)), size=(32, 32)) for i in range(3)]
+        for cover in covers:
+            cache.admit(cover)
+        assert all(cover.exists() for cover in covers)
+
+    def test_readmit_does_not_double_count(self, temp_dir):
+        cache = CoverCache(temp_dir / "covers", 10 * 1024 * 1024)
+        cover = _write_cover(cache.path_for("1"), size=(64, 64))
+        cache.admit(cover)
+        first = cache.stats()["bytes"]
+
+        cache.admit(cover)
+        cache.admit(cover)
+
+        assert cache.stats()["bytes"] == first
@@ -0,0 +1,134 @@
+"""
+SQLite 专用线程访问器测试
+
+验证长连接复用、写入合并提交、失败隔离与关闭时提交剩余写入。
+"""
+
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from core.db import SQLiteWorker
+
+
+def _create(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v INTEGER)")
+
+
+def _all(conn):
+    return dict(conn.execute("SELECT k, v FROM kv").fetchall())
+
+
+@pytest.fixture
+def worker(temp_dir):
+    db = SQLiteWorker(temp_dir / "kv.db")
+    db.run(_create)
+    yield db
+    db.close()
+
+
+class TestSQLiteWorker:
+    """SQLiteWorker 测试"""
+
+    def test_single_connection_in_wal_mode(self, worker):
+        conn = worker.run(lambda c: c)
+        assert worker.run(lambda c: c) is conn
+        assert worker.run(lambda c: c.execute("PRAGMA journal_mode").fetchone())[0] == (
+            "wal"
+        )
+
+    def test_writes_queued_behind_busy_worker_share_one_batch(self, worker):
+        gate = threading.Event()
+        worker.submit(lambda conn: gate.wait(5))
+        futures = [
+            worker.write("INSERT INTO kv VALUES (?, ?)", (f"k{i}", i))
+            for i in range(10)
+        ]
+        gate.set()
+
+        assert [f.result(5) for f in futures] == [1] * 10
+        assert worker.write_batches == 1
+        assert worker.run(_all) == {f"k{i}": i for i in range(10)}
+
+    def test_write_many_in_one_transaction(self, worker):
+        worker.write("INSERT INTO kv VALUES ('a', 0)")
+        future = worker.write_many(
+            "INSERT INTO kv VALUES (?, ?) ON CONFLICT(k) DO UPDATE SET v = excluded.v",
+            [("a", 1), ("b", 2), ("c", 3)],
+        )
+
+        assert future.result(5) == 3
+        assert worker.run(_all) == {"a": 1, "b": 2, "c": 3}
+
+    def test_write_many_rolls_back_on_error(self, worker):
+        future = worker.write_many("INSERT INTO kv VALUES (?, ?)", [("a", 1), ("a", 2)])
+
+        with pytest.raises(sqlite3.IntegrityError):
+            future.result(5)
+        assert worker.run(_all) == {}
+
+    def test_reads_see_earlier_writes(self, worker):
+        worker.write("INSERT INTO kv VALUES ('a', 1)")
+        assert worker.run(_all) == {"a": 1}
+
+    def test_failed_statement_does_not_fail_batch(self, worker):
+        gate = threading.Event()
+        worker.submit(lambda conn: gate.wait(5))
+        ok = worker.write("INSERT INTO kv VALUES ('a', 1)")
+        dup = worker.write("INSERT INTO kv VALUES ('a', 2)")
+        other = worker.write("INSERT INTO kv VALUES ('b', 3)")
+        gate.set()
+
+        assert ok.result(5) == 1
+        with pytest.raises(sqlite3.IntegrityError):
+            dup.result(5)
+        assert other.result(5) == 1
+        assert worker.run(_all) == {"a": 1, "b": 3}
+
+    async def test_call_is_awaitable(self, worker):
+        await asyncio.wrap_future(worker.write("INSERT INTO kv VALUES ('a', 1)"))
+        assert await worker.call(_all) == {"a": 1}
+
+    def test_close_flushes_pending_writes(self, temp_dir):
+        db = SQLiteWorker(temp_dir / "kv.db")
+        db.run(_create)
+        db.write("INSERT INTO kv VALUES ('a', 1)")
+        db.close()
+
+        with pytest.raises(RuntimeError):
+            db.write("INSERT INTO kv VALUES ('b', 2)")
+        reopened = SQLiteWorker(temp_dir / "kv.db")
+        assert reopened.run(_all) == {"a": 1}
+        reopened.close()
+
+    def test_writes_racing_close_always_resolve(self, temp_dir):
+        """与 close 并发的写入要么被拒绝，要么其 future 必定完成"""
+        db = SQLiteWorker(temp_dir / "kv.db")
+        db.run(_create)
+        futures = []
+        start = threading.Barrier(5)
+
+        def writer(n):
+            start.wait()
+            for i in range(200):
+                try:
+                    futures.append(
+                        db.write("INSERT INTO kv VALUES (?, ?)", (f"{n}-{i}", i))
+                    )
+                except RuntimeError:
+                    return
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        start.wait()
+        db.close()
+        for t in threads:
+            t.join()
+
+        for future in futures:
+            assert future.exception(timeout=5) is None or isinstance(
+                future.exception(), RuntimeError
+            )
@@ -0,0 +1,92 @@
+"""
+域名健康度测试
+
+使用假探测函数验证排序、失败降级、EWMA 与持久化。
+"""
+
+from core.domain_health import DomainHealth
+
+
+class _FakeTransport:
+    """按域名返回预设结果：None 表示成功，异常实例表示失败"""
+
+    def __init__(self, outcomes=None):
+        self.outcomes = outcomes or {}
+        self.calls: list[str] = []
+
+    def __call__(self, domain):
+        self.calls.append(domain)
+        outcome = self.outcomes.get(domain)
+        if outcome is not None:
+            raise outcome
+
+
+class TestDomainHealth:
+    """DomainHealth 测试"""
+
+    def test_unknown_domains_keep_config_order(self):
+        health = DomainHealth()
+        assert health.ordered(["a", "b", "c"]) == ["a", "b", "c"]
+
+    def test_orders_by_latency(self):
+        health = DomainHealth()
+        health.record_success("a", 0.3)
+        health.record_success("b", 0.1)
+        health.record_success("c", 0.2)
+        assert health.ordered(["a", "b", "c"]) == ["b", "c", "a"]
+
+    def test_known_fast_before_unknown(self):
+        health = DomainHealth()
+        health.record_success("c", 0.5)
+        assert health.ordered(["a", "b", "c"]) == ["c", "a", "b"]
+
+    def test_consecutive_failures_demote(self):
+        health = DomainHealth()
+        health.record_success("a", 0.05)
+        health.record_success("b", 0.5)
+        health.record_failure("a")
+        assert health.is_healthy("a")
+        health.record_failure("a")
+        assert not health.is_healthy("a")
+        assert health.ordered(["a", "b"]) == ["b", "a"]
+
+        # 一次成功即恢复
+        health.record_success("a", 0.05)
+        assert health.ordered(["a", "b"]) == ["a", "b"]
+
+    def test_ewma_smooths_latency(self):
+        health = DomainHealth()
+        health.record_success("a", 0.1)
+        health.record_success("a", 0.2)
+        ewma = health.stats(["a"])[0]["ewma_ms"]
+        assert 100 < ewma < 200
+        assert abs(ewma - 130) < 1e-6
+
+    def test_probe_records_results(self):
+        transport = _FakeTransport({"bad": ConnectionError("refused")})
+        health = DomainHealth(transport=transport)
+
+        health.probe(["good", "bad"])
+        health.probe(["good", "bad"])
+
+        assert sorted(transport.calls) == ["bad", "bad", "good", "good"]
+        stats = {d["domain"]: d for d in health.stats(["bad", "good"])}
+        assert stats["good"]["healthy"] and stats["good"]["ewma_ms"] is not None
+        assert not stats["bad"]["healthy"] and stats["bad"]["failures"] == 2
+        assert health.ordered(["bad", "good"]) == ["good", "bad"]
+
+    def test_persistence(self, temp_dir):
+        path = temp_dir / "domain_health.json"
+        health = DomainHealth(path)
+        health.record_success("a", 0.4)
+        health.record_success("b", 0.1)
+        health.save()
+
+        reloaded = DomainHealth(path)
+        assert reloaded.ordered(["a", "b"]) == ["b", "a"]
+
+    def test_corrupt_state_ignored(self, temp_dir):
+        path = temp_dir / "domain_health.json"
+        path.write_text("{not json", encoding="utf-8")
+        health = DomainHealth(path)
+        assert health.ordered(["a", "b"]) == ["a", "b"]
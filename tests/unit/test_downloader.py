@@ -190,3 +190,360 @@ class TestResolveAllSuccess:
         assert _resolve_all_success(_FakeDownloader(False, False), 3) is True
         # 增量下载：存在真实下载失败 -> False
         assert _resolve_all_success(_FakeDownloader(False, True), 3) is False
+
+
+class TestManifestResume:
+    """断点续传清单与下载管理器的衔接"""
+
+    def test_manifest_failures(self, temp_dir):
+        from core.downloader import _manifest_failures
+        from core.manifest import DownloadManifest
+
+        manifest = DownloadManifest.for_album(temp_dir, "100")
+        manifest.begin_photo("1", 1, 2)
+        image = temp_dir / "100" / "1" / "00001.jpg"
+        image.parent.mkdir(parents=True)
+        image.write_bytes(b"img")
+        manifest.record_image("1", image)
+
+        # 章节 1 缺 1 张；章节 2 未开始按缺 1 张计
+        assert _manifest_failures(manifest, ["1", "2"]) == (2, ["1", "2"])
+
+    def test_drop_manifest_after_cleanup(self, config_manager):
+        from core.downloader import JMDownloadManager
+        from core.manifest import DownloadManifest
+
+        manager = JMDownloadManager(config_manager)
+        root = config_manager.download_dir
+        DownloadManifest.for_album(root, "100").save()
+        (root / "100").mkdir()
+
+        manager.drop_manifest("100")
+        assert (root / ".manifests" / "100.json").exists()
+
+        (root / "100").rmdir()
+        manager.drop_manifest("100")
+        assert not (root / ".manifests" / "100.json").exists()
+
+
+class TestDownloadCoalescing:
+    """同一本子并发下载合并测试"""
+
+    @staticmethod
+    def _ok_result(album_id: str = "123456"):
+        from core.downloader import DownloadResult
+
+        return DownloadResult(
+            success=True,
+            album_id=album_id,
+            title="T",
+            author="A",
+            photo_count=1,
+            image_count=3,
+            save_path=Path("/downloads/123456"),
+        )
+
+    @pytest.mark.asyncio
+    async def test_concurrent_downloads_share_one_run(self, config_manager):
+        """并发的相同下载只执行一次，后加入者得到不同的 share_index"""
+        import asyncio
+        import threading
+
+        from core.downloader import JMDownloadManager
+
+        manager = JMDownloadManager(config_manager)
+        calls = 0
+        release = threading.Event()
+
+        def fake_sync(album_id, option, skip_photos, progress_sink=None):
+            nonlocal calls
+            calls += 1
+            release.wait(5)
+            return self._ok_result(album_id)
+
+        with (
+            patch.object(manager, "is_available", return_value=True),
+            patch.object(manager, "_get_option", return_value=object()),
+            patch.object(manager, "_download_album_sync", side_effect=fake_sync),
+        ):
+            tasks = [
+                asyncio.create_task(manager.download_album("123456")) for _ in range(3)
+            ]
+            await asyncio.sleep(0.05)
+            release.set()
+            results = await asyncio.gather(*tasks)
+
+        assert calls == 1
+        assert sorted(r.share_index for r in results) == [0, 1, 2]
+        assert manager.coalesced_downloads == 2
+        assert not manager._inflight
+
+        # 目录由最后一个使用者释放
+        save_path = results[0].save_path
+        assert manager.release_save_path(save_path) is False
+        assert manager.release_save_path(save_path) is False
+        assert manager.release_save_path(save_path) is True
+
+    @pytest.mark.asyncio
+    async def test_different_skip_not_coalesced(self, config_manager):
+        """增量下载与完整下载不合并"""
+        import asyncio
+
+        from core.downloader import JMDownloadManager
+
+        manager = JMDownloadManager(config_manager)
+
+        def fake_sync(album_id, option, skip_photos, progress_sink=None):
+            return self._ok_result(album_id)
+
+        with (
+            patch.object(manager, "is_available", return_value=True),
+            patch.object(manager, "_get_option", return_value=object()),
+            patch.object(
+                manager, "_download_album_sync", side_effect=fake_sync
+            ) as sync,
+        ):
+            await asyncio.gather(
+                manager.download_album("123456"),
+                manager.download_album("123456", skip_photos=2),
+            )
+
+        assert sync.call_count == 2
+        assert manager.coalesced_downloads == 0
+
+    @pytest.mark.asyncio
+    async def test_same_album_downloads_serialized(self, config_manager):
+        """同一本子不同 skip 的下载不同时写目录，且排队者完成前目录不被清理"""
+        import asyncio
+        import threading
+
+        from core.downloader import JMDownloadManager
+
+        manager = JMDownloadManager(config_manager)
+        running = 0
+        overlapped = False
+        release = threading.Event()
+        lock = threading.Lock()
+
+        def fake_sync(album_id, option, skip_photos, progress_sink=None):
+            nonlocal running, overlapped
+            with lock:
+                running += 1
+                overlapped = overlapped or running > 1
+            release.wait(5)
+            with lock:
+                running -= 1
+            return self._ok_result(album_id)
+
+        with (
+            patch.object(manager, "is_available", return_value=True),
+            patch.object(manager, "_get_option", return_value=object()),
+            patch.object(manager, "_download_album_sync", side_effect=fake_sync),
+        ):
+            first = asyncio.create_task(manager.download_album("123456"))
+            second = asyncio.create_task(
+                manager.download_album("123456", skip_photos=2)
+            )
+            await asyncio.sleep(0.05)
+            release.set()
+            done = await first
+            # 第二个下载仍在进行：第一个调用方不应清理目录
+            assert manager.release_save_path(done.save_path) is False
+            later = await second
+
+        assert not overlapped
+        assert manager.release_save_path(later.save_path) is True
+        assert not manager._album_users and not manager._album_locks
+
+    @pytest.mark.asyncio
+    async def test_album_and_chapter_downloads_serialized(self, config_manager):
+        """/jm 与 /jmc 同一本子的下载不同时写目录，章节目录使用中时本子目录不清理"""
+        import asyncio
+        import threading
+        from dataclasses import replace
+
+        from core.downloader import JMDownloadManager
+
+        manager = JMDownloadManager(config_manager)
+        running = 0
+        overlapped = False
+        release = threading.Event()
+        lock = threading.Lock()
+
+        def tracked(result):
+            def run(*args, progress_sink=None):
+                nonlocal running, overlapped
+                with lock:
+                    running += 1
+                    overlapped = overlapped or running > 1
+                release.wait(5)
+                with lock:
+                    running -= 1
+                return result
+
+            return run
+
+        album = self._ok_result()
+        chapter = replace(album, photo_count=1, save_path=album.save_path / "1")
+        with (
+            patch.object(manager, "is_available", return_value=True),
+            patch.object(manager, "_get_option", return_value=object()),
+            patch.object(manager, "_download_album_sync", side_effect=tracked(album)),
+            patch.object(manager, "_download_photo_sync", side_effect=tracked(chapter)),
+        ):
+            tasks = [
+                asyncio.create_task(manager.download_album("123456")),
+                asyncio.create_task(
+                    manager.download_photo("654321", album_id="123456")
+                ),
+            ]
+            await asyncio.sleep(0.05)
+            release.set()
+            album_result, chapter_result = await asyncio.gather(*tasks)
+
+        assert not overlapped
+        # 章节目录仍在发送：本子目录不是可清理的最后使用者
+        assert manager.release_save_path(album_result.save_path) is False
+        assert manager.release_save_path(chapter_result.save_path) is True
+
+    @pytest.mark.asyncio
+    async def test_hold_album_dir_waits_for_download(self, config_manager):
+        """清理方独占目录时等待进行中的下载结束"""
+        import asyncio
+        import threading
+
+        from core.downloader import JMDownloadManager
+
+        manager = JMDownloadManager(config_manager)
+        release = threading.Event()
+        order = []
+
+        def fake_sync(album_id, option, skip_photos, progress_sink=None):
+            release.wait(5)
+            order.append("download")
+            return self._ok_result(album_id)
+
+        async def clean():
+            async with manager.hold_album_dir(
+                "123456", Path("/downloads/123456")
+            ) as idle:
+                order.append("clean")
+                return idle
+
+        with (
+            patch.object(manager, "is_available", return_value=True),
+            patch.object(manager, "_get_option", return_value=object()),
+            patch.object(manager, "_download_album_sync", side_effect=fake_sync),
+        ):
+            download = asyncio.create_task(manager.download_album("123456"))
+            await asyncio.sleep(0.05)
+            cleaner = asyncio.create_task(clean())
+            await asyncio.sleep(0.05)
+            release.set()
+            await download
+
+        # 下载完成的目录仍被调用方持有，清理方应跳过
+        assert await cleaner is False
+        assert order == ["download", "clean"]
+
+        manager.release_save_path(Path("/downloads/123456"))
+        async with manager.hold_album_dir("123456", Path("/downloads/123456")) as idle:
+            assert idle is True
+
+
+class TestDownloadScheduler:
+    """全局下载调度器测试"""
+
+    @staticmethod
+    async def _hold(scheduler, order, name, owner, priority=0, cost=1, gate=None):
+        async with scheduler.slot(owner, priority, cost):
+            order.append(name)
+            if gate is not None:
+                await gate.wait()
+
+    @pytest.mark.asyncio
+    async def test_cap_and_fair_rotation(self):
+        """名额用尽后排队；同优先级按来源轮转，管理员优先"""
+        import asyncio
+
+        from core.downloader import PRIORITY_ADMIN, DownloadScheduler
+
+        scheduler = DownloadScheduler(max_jobs=1)
+        order: list[str] = []
+        gate = asyncio.Event()
+
+        first = asyncio.create_task(
+            self._hold(scheduler, order, "first", "g1", gate=gate)
+        )
+        await asyncio.sleep(0)
+        waiting = [
+            asyncio.create_task(self._hold(scheduler, order, name, owner, prio))
+            for name, owner, prio in [
+                ("g1-a", "g1", 0),
+                ("g1-b", "g1", 0),
+                ("g2-a", "g2", 0),
+                ("admin", "g3", PRIORITY_ADMIN),
+            ]
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.stats() == {"running": 1, "queued": 4, "workers": 1}
+
+        gate.set()
+        await asyncio.gather(first, *waiting)
+        assert order == ["first", "admin", "g1-a", "g2-a", "g1-b"]
+        assert scheduler.stats() == {"running": 0, "queued": 0, "workers": 0}
+
+    @pytest.mark.asyncio
+    async def test_worker_budget(self):
+        """图片线程总数超限时排队"""
+        import asyncio
+
+        from core.downloader import DownloadScheduler
+
+        scheduler = DownloadScheduler(max_jobs=0, max_workers=10)
+        order: list[str] = []
+        gate = asyncio.Event()
+        tasks = [
+            asyncio.create_task(
+                self._hold(scheduler, order, name, name, cost=6, gate=gate)
+            )
+            for name in ("a", "b")
+        ]
+        await asyncio.sleep(0)
+        assert order == ["a"]
+        assert scheduler.queued == 1
+        gate.set()
+        await asyncio.gather(*tasks)
+        assert order == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_queue_position_and_cancel(self):
+        """排队时通知位置；取消排队任务后从队列移除"""
+        import asyncio
+
+        from core.downloader import DownloadScheduler
+
+        scheduler = DownloadScheduler(max_jobs=1)
+        gate = asyncio.Event()
+        notified: list[tuple[int, int]] = []
+
+        async def on_queued(position, total):
+            notified.append((position, total))
+
+        async def queued_job():
+            async with scheduler.slot("g2", on_queued=on_queued):
+                pass
+
+        holder = asyncio.create_task(self._hold(scheduler, [], "x", "g1", gate=gate))
+        await asyncio.sleep(0)
+        job = asyncio.create_task(queued_job())
+        await asyncio.sleep(0)
+        assert notified == [(1, 1)]
+
+        job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+        assert scheduler.queued == 0
+        gate.set()
+        await holder
+        assert scheduler.running == 0
@@ -0,0 +1,64 @@
+"""
+压缩图片缓存测试
+
+验证内容键复用、源文件变化后失效以及按字节上限的 LRU 淘汰。
+"""
+
+import os
+
+from PIL import Image
+
+from core.image_cache import CompressedImageCache
+
+
+def _write_image(path, size=(1600, 1200), mtime=None):
+    Image.effect_noise(size, 64).convert("RGB").save(path, quality=90)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+class TestCompressedImageCache:
+    """CompressedImageCache 测试"""
+
+    def test_reuses_compressed_file(self, temp_dir):
+        cache = CompressedImageCache(temp_dir / "cache", 10 * 1024 * 1024)
+        source = _write_image(temp_dir / "a.jpg")
+
+        first = cache.get(source)
+        second = cache.get(source)
+
+        assert first is not None and first == second
+        with Image.open(first) as img:
+            assert max(img.size) == 1024
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+        assert source.exists()  # 源文件不受影响
+
+    def test_key_changes_with_quality_and_mtime(self, temp_dir):
+        cache = CompressedImageCache(temp_dir / "cache", 10 * 1024 * 1024)
+        source = _write_image(temp_dir / "a.jpg", size=(64, 64), mtime=1000)
+
+        base = cache.get(source, 60)
+        assert cache.get(source, 80) != base
+
+        os.utime(source, (2000, 2000))  # 源文件更新后不再命中旧结果
+        assert cache.get(source, 60) != base
+
+    def test_missing_source(self, temp_dir):
+        cache = CompressedImageCache(temp_dir / "cache", 1024)
+        assert cache.get(temp_dir / "missing.jpg") is None
+
+    def test_evicts_least_recently_used(self, temp_dir):
+        cache = CompressedImageCache(temp_dir / "cache", 10 * 1024 * 1024)
+        paths = []
+        for i in range(3):
+            compressed = cache.get(_write_image(temp_dir / f"{i}.jpg", size=(64, 64)))
+            os.utime(compressed, (1000 + i, 1000 + i))
+            paths.append(compressed)
+
+        cache.get(temp_dir / "0.jpg")  # 命中后 0 变为最近使用
+        cache.max_bytes = cache.stats()["bytes"] - 1
+        assert cache.evict() == 1
+
+        assert paths[0].exists() and paths[2].exists()
+        assert not paths[1].exists()
@@ -0,0 +1,120 @@
+"""
+断点续传清单测试
+
+验证图片记录与校验、章节完成判定、缺失统计以及清单的持久化与损坏恢复。
+"""
+
+import json
+import threading
+from unittest.mock import patch
+
+from core.manifest import DownloadManifest
+
+
+def _image(folder, name: str, data: bytes = b"img"):
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_bytes(data)
+    return path
+
+
+class TestDownloadManifest:
+    """下载清单测试"""
+
+    def test_new_manifest(self, temp_dir):
+        manifest = DownloadManifest.for_album(temp_dir, "100")
+        assert manifest.existed is False
+        assert manifest.path == temp_dir / ".manifests" / "100.json"
+        assert manifest.missing_images("1") == -1
+
+    def test_complete_photo_and_reload(self, temp_dir):
+        manifest = DownloadManifest.for_album(temp_dir, "100")
+        manifest.begin_photo("1", 1, 2)
+        for name in ("00001.jpg", "00002.jpg"):
+            manifest.record_image("1", _image(temp_dir / "100" / "1", name))
+        manifest.complete_photo("1")
+
+        reloaded = DownloadManifest.for_album(temp_dir, "100")
+        assert reloaded.existed is True
+        assert reloaded.had_photo("1") is True
+        assert reloaded.photo_verified("1") is True
+        assert reloaded.missing_images("1") == 0
+        assert reloaded.image_count(["1"]) == 2
+
+    def test_partial_photo_not_verified(self, temp_dir):
+        manifest = DownloadManifest.for_album(temp_dir, "100")
+        manifest.begin_photo("1", 1, 3)
+        manifest.record_image("1", _image(temp_dir / "100" / "1", "00001.jpg"))
+        manifest.complete_photo("1")
+
+        reloaded = DownloadManifest.for_album(temp_dir, "100")
+        assert reloaded.photo_verified("1") is False
+        assert reloaded.missing_images("1") == 2
+
+    def test_modified_file_fails_verification(self, temp_dir):
+        manifest = DownloadManifest.for_album(temp_dir, "100")
+        manifest.begin_photo("1", 1, 1)
+        path = _image(temp_dir / "100" / "1", "00001.jpg", b"original")
+        manifest.record_image("1", path)
+        manifest.complete_photo("1")
+
+        path.write_bytes(b"truncated")
+        reloaded = DownloadManifest.for_album(temp_dir, "100")
+        assert reloaded.verify_image("1", path) is False
+        assert reloaded.photo_verified("1") is False
+        assert reloaded.missing_images("1") == 1
+
+    def test_unrecorded_file_not_verified(self, temp_dir):
+        manifest = DownloadManifest.for_album(temp_dir, "100")
+        path = _image(temp_dir / "100" / "1", "00001.jpg")
+        assert manifest.verify_image("1", path) is False
+
+    def test_corrupt_manifest_starts_fresh(self, temp_dir):
+        path = temp_dir / ".manifests" / "100.json"
+        path.parent.mkdir(parents=True)
+        path.write_text("{not json", encoding="utf-8")
+        assert DownloadManifest(path, "100").existed is False
+
+    def test_version_mismatch_discarded(self, temp_dir):
+        path = temp_dir / ".manifests" / "100.json"
+        path.parent.mkdir(parents=True)
+        path.write_text(json.dumps({"version": 0, "photos": {"1": {}}}))
+        manifest = DownloadManifest(path, "100")
+        assert manifest.existed is False
+        assert manifest.had_photo("1") is False
+
+    def test_concurrent_save_while_recording(self, temp_dir):
+        manifest = DownloadManifest.for_album(temp_dir, "100")
+        folder = temp_dir / "100" / "1"
+        images = [_image(folder, f"{i:05d}.jpg", bytes([i % 256])) for i in range(60)]
+        manifest.begin_photo("1", 1, len(images))
+        errors = []
+        done = threading.Event()
+
+        def record():
+            for path in images:
+                manifest.record_image("1", path)
+            done.set()
+
+        def save():
+            try:
+                while not done.is_set():
+                    manifest.save()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=record)]
+        threads += [threading.Thread(target=save) for _ in range(4)]
+        with patch("core.manifest.logger") as logger:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        manifest.save()
+
+        assert errors == []
+        # 共用临时文件时并发写入会互相覆盖、os.replace 找不到文件
+        assert not logger.debug.called
+        assert list(manifest.path.parent.glob("*.tmp")) == []
+        reloaded = DownloadManifest(manifest.path, "100")
+        assert reloaded.missing_images("1") == 0
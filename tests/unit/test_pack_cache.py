@@ -0,0 +1,144 @@
+"""
+打包产物缓存测试
+
+验证缓存键、命中/未命中计数、文件移入缓存以及按字节上限的 LRU 淘汰。
+"""
+
+import time
+
+from core.pack_cache import PackCache
+
+
+def _artifact(folder, name: str, size: int):
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_bytes(b"x" * size)
+    return path
+
+
+class TestPackCacheKey:
+    """缓存键测试"""
+
+    def test_key_is_stable(self):
+        a = PackCache.make_key("123", "all:5", "zip", "pw", ".jpg")
+        b = PackCache.make_key("123", "all:5", "ZIP", "pw", ".JPG")
+        assert a == b
+
+    def test_key_changes_with_inputs(self):
+        base = PackCache.make_key("123", "all:5", "zip", "pw", ".jpg")
+        assert base != PackCache.make_key("123", "all:6", "zip", "pw", ".jpg")
+        assert base != PackCache.make_key("123", "all:5", "pdf", "pw", ".jpg")
+        assert base != PackCache.make_key("123", "all:5", "zip", "other", ".jpg")
+        assert base != PackCache.make_key("123", "all:5", "zip", "pw", ".png")
+        assert base != PackCache.make_key("123", "all:5", "zip", "pw", ".jpg", True)
+
+    def test_chapters_digest_tracks_ids_and_order(self):
+        digest = PackCache.chapters_digest(["1", "2", "3"])
+        assert digest == PackCache.chapters_digest([1, 2, 3])
+        # 章节数不变但被替换或重排时摘要不同
+        assert digest != PackCache.chapters_digest(["1", "2", "4"])
+        assert digest != PackCache.chapters_digest(["1", "3", "2"])
+
+    def test_key_does_not_contain_password(self):
+        assert "secret" not in PackCache.make_key("1", "all:1", "zip", "secret", "")
+
+
+class TestPackCacheStore:
+    """缓存写入与命中测试"""
+
+    def test_disabled_cache(self, temp_dir):
+        cache = PackCache(temp_dir / "cache", 0)
+        src = _artifact(temp_dir / "out", "a.zip", 10)
+
+        assert cache.enabled is False
+        assert cache.put("k", "1", src, {}) is None
+        assert src.exists()  # 关闭时原文件不动
+        assert cache.get("k") is None
+        assert not (temp_dir / "cache").exists()
+
+    def test_put_moves_file_and_hits(self, temp_dir):
+        cache = PackCache(temp_dir / "cache", 1024)
+        src = _artifact(temp_dir / "out", "123_1700000000.zip", 10)
+
+        cached_path = cache.put("k", "123", src, {"title": "T", "photo_count": 3})
+
+        assert not src.exists()
+        assert cached_path.name == "123_1700000000.zip"
+        assert cache.owns(cached_path)
+        entry = cache.get("k")
+        assert entry["path"] == cached_path
+        assert entry["title"] == "T"
+        assert entry["photo_count"] == 3
+        assert cache.get("missing") is None
+        assert cache.stats() == {"entries": 1, "bytes": 10, "hits": 1, "misses": 1}
+
+    def test_missing_file_invalidates_entry(self, temp_dir):
+        cache = PackCache(temp_dir / "cache", 1024)
+        cached_path = cache.put("k", "1", _artifact(temp_dir, "a.zip", 10), {})
+        cached_path.unlink()
+
+        assert cache.get("k") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_oversized_artifact_not_cached(self, temp_dir):
+        cache = PackCache(temp_dir / "cache", 5)
+        src = _artifact(temp_dir, "big.zip", 10)
+
+        assert cache.put("k", "1", src, {}) is None
+        assert src.exists()
+        assert not cache.owns(src)
+
+    def test_existing_entry_is_kept(self, temp_dir):
+        """同键重复写入保留先写入的文件（其它调用方可能正在发送）"""
+        cache = PackCache(temp_dir / "cache", 1024)
+        first = cache.put("k", "1", _artifact(temp_dir, "a.zip", 10), {})
+        second = _artifact(temp_dir, "a_1.zip", 10)
+
+        assert cache.put("k", "1", second, {}) is None
+        assert second.exists()
+        assert first.exists()
+        assert cache.get("k")["path"] == first
+
+
+class TestPackCacheEviction:
+    """LRU 淘汰测试"""
+
+    def test_evicts_least_recently_used(self, temp_dir):
+        cache = PackCache(temp_dir / "cache", 25)
+        cache.put("a", "1", _artifact(temp_dir, "a.zip", 10), {})
+        time.sleep(0.01)
+        cache.put("b", "2", _artifact(temp_dir, "b.zip", 10), {})
+        time.sleep(0.01)
+        assert cache.get("a") is not None  # a 变为最近使用
+        time.sleep(0.01)
+        cache.put("c", "3", _artifact(temp_dir, "c.zip", 10), {})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert not (temp_dir / "cache" / "b").exists()
+        assert cache.stats()["bytes"] == 20
+
+    def test_pinned_entry_survives_eviction(self, temp_dir):
+        cache = PackCache(temp_dir / "cache", 15)
+        cache.put("a", "1", _artifact(temp_dir, "a.zip", 10), {})
+        entry = cache.get("a", pin=True)  # 发送中
+        time.sleep(0.01)
+        cache.put("b", "2", _artifact(temp_dir, "b.zip", 10), {})
+
+        assert entry["path"].is_file()
+        cache.unpin(entry["key"])
+        cache.evict()
+        assert not entry["path"].exists()
+
+    async def test_async_put_and_get(self, temp_dir):
+        cache = PackCache(temp_dir / "cache", 1024)
+        stored = await cache.put_async(
+            "k", "1", _artifact(temp_dir, "k.zip", 10), {"title": "T"}, pin=True
+        )
+        entry = await cache.get_async("k")
+
+        assert entry["path"] == stored and entry["title"] == "T"
+        assert cache._pinned("k")
+        cache.unpin("k")
+        assert not cache._pinned("k")
@@ -7,6 +7,8 @@
 import zipfile
 from pathlib import Path
 
+import pytest
+
 
 class TestPackResult:
     """PackResult 数据类测试"""
@@ -230,3 +232,409 @@ class TestZipEncryptionFailClosed:
 
         assert result.success is True
         assert result.encrypted is False
+
+
+class TestPackAsync:
+    """异步打包：在进程池/线程中执行，不阻塞事件循环"""
+
+    @pytest.fixture(autouse=True)
+    def _reset_pool(self):
+        from core.packer import JMPacker
+
+        yield
+        JMPacker.shutdown_pool()
+        JMPacker.configure_pool(2)
+
+    @pytest.mark.asyncio
+    async def test_pack_async_in_process_pool(self, temp_dir):
+        from core.packer import JMPacker
+
+        src = temp_dir / "imgs"
+        src.mkdir()
+        (src / "001.jpg").write_bytes(b"x")
+
+        JMPacker.configure_pool(1)
+        result = await JMPacker(pack_format="zip").pack_async(src, "album")
+
+        assert result.success is True
+        assert result.output_path.exists()
+        assert JMPacker.pool_stats() == {"workers": 1, "running": 0, "queued": 0}
+
+    @pytest.mark.asyncio
+    async def test_pack_async_thread_mode(self, temp_dir):
+        from core.packer import JMPacker
+
+        src = temp_dir / "imgs"
+        src.mkdir()
+        (src / "001.jpg").write_bytes(b"x")
+
+        JMPacker.configure_pool(0)
+        result = await JMPacker(pack_format="zip").pack_async(src, "album")
+
+        assert result.success is True
+        assert JMPacker.pool_stats()["workers"] == 0
+
+    def test_pool_stats_queue_depth(self, monkeypatch):
+        import core.packer as packer_mod
+        from core.packer import JMPacker
+
+        JMPacker.configure_pool(2)
+        monkeypatch.setattr(packer_mod._PACK_POOL, "pending", 5)
+
+        assert JMPacker.pool_stats() == {"workers": 2, "running": 2, "queued": 3}
+
+
+class TestLongImgStreaming:
+    """长图打包：按头部尺寸规划分段，逐段渲染落盘"""
+
+    @staticmethod
+    def _make_images(folder: Path, sizes: list[tuple[int, int]]) -> list[Path]:
+        Image = pytest.importorskip("PIL.Image")
+        folder.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for index, size in enumerate(sizes, 1):
+            path = folder / f"{index:05d}.png"
+            Image.new("RGB", size, (index * 10, 0, 0)).save(path)
+            paths.append(path)
+        return paths
+
+    def test_plan_respects_height_and_count_limits(self, temp_dir, monkeypatch):
+        import core.packer as packer_mod
+        from core.packer import JMPacker
+
+        monkeypatch.setattr(packer_mod, "_LONG_IMG_MAX_PER_STRIP", 2)
+        paths = self._make_images(temp_dir / "src", [(600, 300)] * 5)
+        (temp_dir / "src" / "broken.png").write_bytes(b"not an image")
+
+        plan = JMPacker._plan_long_strips(paths + [temp_dir / "src" / "broken.png"])
+
+        # 600x300 缩放到 1200 宽后高 600；每段最多 2 张，坏图被跳过
+        assert [len(strip) for strip in plan] == [2, 2, 1]
+        assert all(height == 600 for strip in plan for _, height in strip)
+
+    def test_single_strip_output_png(self, temp_dir):
+        Image = pytest.importorskip("PIL.Image")
+        from core.packer import JMPacker
+
+        self._make_images(temp_dir / "src", [(600, 300), (1200, 100)])
+
+        result = JMPacker(pack_format="long_img").pack(
+            temp_dir / "src", "long", temp_dir
+        )
+
+        assert result.success is True
+        assert result.output_path.suffix == ".png"
+        with Image.open(result.output_path) as img:
+            assert img.size == (1200, 700)
+
+    def test_multi_strip_output_zip(self, temp_dir, monkeypatch):
+        import core.packer as packer_mod
+        from core.packer import JMPacker
+
+        monkeypatch.setattr(packer_mod, "_LONG_IMG_MAX_PER_STRIP", 2)
+        self._make_images(temp_dir / "src", [(600, 300)] * 3)
+
+        result = JMPacker(pack_format="long_img").pack(
+            temp_dir / "src", "long", temp_dir
+        )
+
+        assert result.success is True
+        with zipfile.ZipFile(result.output_path) as zf:
+            assert sorted(zf.namelist()) == ["long_001.png", "long_002.png"]
+
+    def test_multi_strip_fails_when_strip_missing(self, temp_dir, monkeypatch):
+        import core.packer as packer_mod
+        from core.packer import JMPacker
+
+        monkeypatch.setattr(packer_mod, "_LONG_IMG_MAX_PER_STRIP", 2)
+        paths = self._make_images(temp_dir / "src", [(600, 300)] * 3)
+        # 第 2 段唯一一张头部可读但无法解码，整段生成失败
+        paths[2].write_bytes(paths[2].read_bytes()[:60])
+
+        result = JMPacker(pack_format="long_img").pack(
+            temp_dir / "src", "long", temp_dir
+        )
+
+        assert result.success is False
+        assert "2/2" in result.error_message
+        assert not (temp_dir / "long.zip").exists()
+
+    def test_render_crops_undecodable_image(self, temp_dir):
+        Image = pytest.importorskip("PIL.Image")
+        from core.packer import JMPacker
+
+        paths = self._make_images(temp_dir / "src", [(600, 300)])
+        truncated = temp_dir / "src" / "truncated.png"
+        truncated.write_bytes(paths[0].read_bytes()[:60])
+        output = temp_dir / "strip.png"
+
+        ok = JMPacker._render_long_strip([(paths[0], 600), (truncated, 600)], output)
+
+        assert ok is True
+        with Image.open(output) as img:
+            assert img.size == (1200, 600)
+
+    def test_parallel_decode_matches_serial(self, temp_dir):
+        """并行解码按原顺序拼接，结果与逐张处理逐像素一致"""
+        Image = pytest.importorskip("PIL.Image")
+        from core.packer import JMPacker
+
+        self._make_images(
+            temp_dir / "src", [(600, 300), (300, 500), (1200, 80), (900, 900)]
+        )
+
+        serial = JMPacker(pack_format="long_img").pack(
+            temp_dir / "src", "serial", temp_dir
+        )
+        parallel = JMPacker(pack_format="long_img", decode_workers=2).pack(
+            temp_dir / "src", "parallel", temp_dir
+        )
+
+        assert serial.success is True
+        assert parallel.success is True
+        with (
+            Image.open(serial.output_path) as a,
+            Image.open(parallel.output_path) as b,
+        ):
+            assert a.size == b.size
+            assert a.tobytes() == b.tobytes()
+
+
+class TestZipCompressionPolicy:
+    """ZIP 压缩策略：已压缩图片仅存储，PNG/文本仍压缩"""
+
+    def _make_source(self, temp_dir: Path) -> Path:
+        src = temp_dir / "src"
+        src.mkdir()
+        (src / "001.jpg").write_bytes(b"jpeg" * 100)
+        (src / "002.png").write_bytes(b"png" * 100)
+        (src / "info.txt").write_text("text " * 100)
+        (src / "blob.bin").write_bytes(bytes(range(256)) * 4)
+        return src
+
+    def _compress_types(self, zip_path: Path) -> dict[str, int]:
+        with zipfile.ZipFile(zip_path) as zf:
+            return {info.filename: info.compress_type for info in zf.infolist()}
+
+    def test_auto_policy(self, temp_dir):
+        from core.packer import JMPacker
+
+        src = self._make_source(temp_dir)
+        result = JMPacker(pack_format="zip").pack(src, "auto", temp_dir)
+
+        types = self._compress_types(result.output_path)
+        assert types["001.jpg"] == zipfile.ZIP_STORED
+        assert types["002.png"] == zipfile.ZIP_DEFLATED
+        assert types["info.txt"] == zipfile.ZIP_DEFLATED
+        assert types["blob.bin"] == zipfile.ZIP_DEFLATED  # 重复数据，采样可压缩
+
+    def test_auto_policy_samples_unknown_types(self, temp_dir):
+        import os
+
+        from core.packer import _zip_compress_type
+
+        random_file = temp_dir / "noise.bin"
+        random_file.write_bytes(os.urandom(4096))
+
+        assert _zip_compress_type(random_file, "auto") == zipfile.ZIP_STORED
+
+    def test_store_and_deflate_policies(self, temp_dir):
+        from core.packer import JMPacker
+
+        src = self._make_source(temp_dir)
+        stored = JMPacker(zip_compression="store").pack(src, "store", temp_dir)
+        deflated = JMPacker(zip_compression="deflate").pack(src, "deflate", temp_dir)
+
+        assert set(self._compress_types(stored.output_path).values()) == {
+            zipfile.ZIP_STORED
+        }
+        assert set(self._compress_types(deflated.output_path).values()) == {
+            zipfile.ZIP_DEFLATED
+        }
+
+    def test_invalid_policy_and_level_fall_back(self):
+        from core.packer import JMPacker
+
+        packer = JMPacker(zip_compression="LZMA", zip_level=42)
+
+        assert packer.zip_compression == "auto"
+        assert packer.zip_level is None
+
+    def test_encrypted_zip_uses_policy(self, temp_dir):
+        pyzipper = pytest.importorskip("pyzipper")
+        from core.packer import JMPacker
+
+        src = self._make_source(temp_dir)
+        result = JMPacker(password="secret").pack(src, "enc", temp_dir)
+
+        assert result.encrypted is True
+        with pyzipper.AESZipFile(result.output_path) as zf:
+            zf.setpassword(b"secret")
+            assert zf.read("001.jpg") == b"jpeg" * 100
+            assert zf.getinfo("001.jpg").compress_type == zipfile.ZIP_STORED
+
+
+class TestPackPipeline:
+    """流水线打包：章节就绪即按顺序写入，收尾时补写其余文件"""
+
+    @staticmethod
+    def _make_album(root: Path, chapters: int) -> list[tuple[str, Path]]:
+        entries = []
+        for index in range(1, chapters + 1):
+            chapter = root / str(index)
+            chapter.mkdir(parents=True)
+            (chapter / "00001.jpg").write_bytes(b"img%d" % index)
+            entries.append((f"p{index}", chapter))
+        return entries
+
+    def test_zip_pipeline_matches_full_pack(self, temp_dir):
+        from core.packer import JMPacker
+
+        album = temp_dir / "123"
+        chapters = self._make_album(album, 3)
+        (album / "info.txt").write_text("extra")
+
+        pipeline = JMPacker().open_pipeline("out")
+        pipeline.expect(album, chapters)
+        # 乱序就绪：写入线程仍按章节顺序写入
+        pipeline.ready("p3")
+        pipeline.ready("p1")
+        result = pipeline.close()
+
+        assert result.success is True
+        assert result.output_path == temp_dir / "out.zip"
+        with zipfile.ZipFile(result.output_path) as zf:
+            names = zf.namelist()
+        assert names[:3] == ["1/00001.jpg", "2/00001.jpg", "3/00001.jpg"]
+        assert sorted(names) == sorted(
+            ["1/00001.jpg", "2/00001.jpg", "3/00001.jpg", "info.txt"]
+        )
+
+    def test_pdf_pipeline_page_order(self, temp_dir):
+        Image = pytest.importorskip("PIL.Image")
+        fitz = pytest.importorskip("fitz")
+        from core.packer import JMPacker
+
+        album = temp_dir / "123"
+        chapters = []
+        for index, height in enumerate((100, 200, 300), 1):
+            chapter = album / str(index)
+            chapter.mkdir(parents=True)
+            Image.new("RGB", (50, height)).save(chapter / "00001.jpg")
+            chapters.append((f"p{index}", chapter))
+
+        pipeline = JMPacker(pack_format="pdf").open_pipeline("out")
+        pipeline.expect(album, chapters)
+        for photo_id, _ in reversed(chapters):
+            pipeline.ready(photo_id)
+        result = pipeline.close()
+
+        assert result.success is True
+        with fitz.open(result.output_path) as doc:
+            assert [int(page.rect.height) for page in doc] == [100, 200, 300]
+
+    def test_abort_removes_partial_output(self, temp_dir):
+        from core.packer import JMPacker
+
+        album = temp_dir / "123"
+        chapters = self._make_album(album, 2)
+
+        pipeline = JMPacker().open_pipeline("out")
+        pipeline.expect(album, chapters)
+        pipeline.ready("p1")
+        pipeline.abort()
+
+        assert not (temp_dir / "out.zip").exists()
+
+    def test_unsupported_format_and_unstarted(self, temp_dir):
+        from core.packer import JMPacker
+
+        assert JMPacker(pack_format="long_img").open_pipeline("out") is None
+        assert JMPacker(pack_format="none").open_pipeline("out") is None
+
+        pipeline = JMPacker().open_pipeline("out")
+        assert pipeline.started is False
+        assert pipeline.close().success is False
+
+
+class TestZipVolumes:
+    """ZIP 分卷：按大小划分，每卷为独立（可加密）的 ZIP，逐卷交付"""
+
+    @staticmethod
+    def _make_source(root: Path, count: int = 5, size: int = 400) -> Path:
+        src = root / "123"
+        for index in range(1, count + 1):
+            chapter = src / str(index)
+            chapter.mkdir(parents=True)
+            (chapter / "00001.jpg").write_bytes(bytes([index]) * size)
+        return src
+
+    def test_plan_volumes(self, temp_dir):
+        from core.packer import JMPacker
+
+        src = self._make_source(temp_dir)
+        (src / "huge.bin").write_bytes(b"x" * 5000)
+
+        volumes = JMPacker.plan_volumes(src, 1000)
+
+        # 每卷最多 2 个 400B 文件；超大文件独占一卷；顺序为自然顺序
+        assert [len(v) for v in volumes] == [2, 2, 1, 1]
+        assert volumes[0][0] == src / "1" / "00001.jpg"
+        assert volumes[-1] == [src / "huge.bin"]
+
+    def test_volumes_are_standalone_archives(self, temp_dir):
+        from core.packer import JMPacker
+
+        src = self._make_source(temp_dir)
+        packer = JMPacker()
+        volumes = JMPacker.plan_volumes(src, 1000)
+
+        parts = list(packer.pack_volumes(src, "out", volumes))
+
+        assert [p.volume_index for p in parts] == [1, 2, 3]
+        assert all(p.success and p.volume_total == 3 for p in parts)
+        names = []
+        for part in parts:
+            assert part.output_path.name == f"out_vol{part.volume_index:02d}.zip"
+            with zipfile.ZipFile(part.output_path) as zf:
+                names += zf.namelist()
+        assert names == [f"{i}/00001.jpg" for i in range(1, 6)]
+
+    def test_encrypted_volumes(self, temp_dir):
+        pyzipper = pytest.importorskip("pyzipper")
+        from core.packer import JMPacker
+
+        src = self._make_source(temp_dir, count=2)
+        volumes = JMPacker.plan_volumes(src, 500)
+
+        parts = list(JMPacker(password="secret").pack_volumes(src, "enc", volumes))
+
+        assert len(parts) == 2
+        for part in parts:
+            assert part.encrypted is True
+            with pyzipper.AESZipFile(part.output_path) as zf:
+                zf.setpassword(b"secret")
+                name = zf.namelist()[0]
+                assert zf.read(name) == bytes([int(name[0])]) * 400
+
+    async def test_async_volumes_stream_and_cleanup_on_stop(self, temp_dir):
+        from contextlib import aclosing
+
+        from core.packer import JMPacker
+
+        src = self._make_source(temp_dir, count=4)
+        volumes = JMPacker.plan_volumes(src, 400)
+
+        received = []
+        async with aclosing(
+            JMPacker().pack_volumes_async(src, "out", volumes)
+        ) as parts:
+            async for part in parts:
+                received.append(part)
+                if len(received) == 2:
+                    break
+
+        assert [p.volume_index for p in received] == [1, 2]
+        # 未交付的卷被删除，已交付的卷由调用方处理
+        remaining = sorted(p.name for p in temp_dir.glob("out_vol*.zip"))
+        assert remaining == ["out_vol01.zip", "out_vol02.zip"]
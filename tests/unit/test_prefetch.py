@@ -0,0 +1,207 @@
+"""
+订阅新章节预取测试
+
+使用假下载管理器与真实配额数据库，验证开关、去重、配额、磁盘预算判断与
+未取用预取目录的过期清理。
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from core.base import JMConfigManager
+from core.downloader import PRIORITY_BACKGROUND
+from core.prefetch import SubscriptionPrefetcher, directory_size
+from core.quota import DownloadQuotaManager
+
+
+class _Result:
+    def __init__(self, save_path: Path):
+        self.success = True
+        self.save_path = save_path
+        self.error_message = None
+
+
+class _FakeDownloads:
+    """假下载管理器：记录调用参数与释放的目录"""
+
+    def __init__(self, delay: float = 0.0, root: Path = Path("/tmp")):
+        self.delay = delay
+        self.root = root
+        self.calls: list[tuple] = []
+        self.released: list[Path] = []
+        self.in_use: set[Path] = set()
+        self.dropped: list[str] = []
+
+    async def download_album(self, album_id, callback, skip, owner, priority):
+        self.calls.append((album_id, skip, owner, priority))
+        await asyncio.sleep(self.delay)
+        return _Result(self.root / album_id)
+
+    def release_save_path(self, save_path: Path) -> bool:
+        self.released.append(save_path)
+        return True
+
+    @asynccontextmanager
+    async def hold_album_dir(self, album_id, save_path):
+        yield save_path not in self.in_use
+
+    def drop_manifest(self, album_id: str) -> None:
+        self.dropped.append(album_id)
+
+
+def _prefetcher(sample_plugin_config, data_dir, downloads, **overrides):
+    config = JMConfigManager(
+        {**sample_plugin_config, "subscribe_prefetch": True, **overrides}, data_dir
+    )
+    quota = DownloadQuotaManager(data_dir / "quota.db")
+    return SubscriptionPrefetcher(downloads, quota, config), quota
+
+
+async def _drain(prefetcher: SubscriptionPrefetcher) -> None:
+    while prefetcher.running:
+        await asyncio.sleep(0.01)
+
+
+class TestSubscriptionPrefetcher:
+    """SubscriptionPrefetcher 测试"""
+
+    async def test_disabled_by_default(self, sample_plugin_config, data_dir):
+        downloads = _FakeDownloads()
+        config = JMConfigManager(sample_plugin_config, data_dir)
+        quota = DownloadQuotaManager(data_dir / "quota.db")
+        prefetcher = SubscriptionPrefetcher(downloads, quota, config)
+
+        prefetcher.schedule("100", 3, 5, [{"user_id": "u"}])
+        await _drain(prefetcher)
+
+        assert downloads.calls == []
+        quota.close()
+
+    async def test_queues_background_download_once(
+        self, sample_plugin_config, data_dir
+    ):
+        downloads = _FakeDownloads(delay=0.05)
+        prefetcher, quota = _prefetcher(sample_plugin_config, data_dir, downloads)
+
+        prefetcher.schedule("100", 3, 5, [{"user_id": "u"}])
+        prefetcher.schedule("100", 3, 5, [{"user_id": "u"}])  # 进行中，不重复
+        await _drain(prefetcher)
+
+        assert downloads.calls == [("100", 3, "prefetch", PRIORITY_BACKGROUND)]
+        assert downloads.released == [Path("/tmp/100")]
+        assert prefetcher.stats()["pending"] == 1
+        assert prefetcher.stats()["completed"] == 1
+        quota.close()
+
+    async def test_skips_when_subscribers_out_of_quota(
+        self, sample_plugin_config, data_dir
+    ):
+        downloads = _FakeDownloads()
+        prefetcher, quota = _prefetcher(
+            sample_plugin_config, data_dir, downloads, daily_download_limit=1
+        )
+        quota.reserve("u", 1)
+
+        prefetcher.schedule("100", 3, 5, [{"user_id": "u"}])
+        await _drain(prefetcher)
+        assert downloads.calls == []
+        assert prefetcher.stats()["skipped_quota"] == 1
+
+        # 另一位订阅者仍有额度时照常预取，且不扣配额
+        prefetcher.schedule("100", 3, 5, [{"user_id": "u"}, {"user_id": "v"}])
+        await _drain(prefetcher)
+        assert len(downloads.calls) == 1
+        assert quota.get_used_count("v") == 0
+        quota.close()
+
+    async def test_skips_over_disk_budget(self, sample_plugin_config, data_dir):
+        downloads = _FakeDownloads()
+        prefetcher, quota = _prefetcher(
+            sample_plugin_config, data_dir, downloads, subscribe_prefetch_max_mb=1
+        )
+        album = prefetcher.config.download_dir / "old"
+        album.mkdir()
+        (album / "1.jpg").write_bytes(b"x" * (1024 * 1024))
+
+        prefetcher.schedule("100", 3, 5, [{"user_id": "u"}])
+        await _drain(prefetcher)
+
+        assert downloads.calls == []
+        assert prefetcher.stats()["skipped_disk"] == 1
+        quota.close()
+
+    async def test_expires_unclaimed_dirs(self, sample_plugin_config, data_dir):
+        prefetcher, quota = _prefetcher(sample_plugin_config, data_dir, None)
+        downloads = _FakeDownloads(root=prefetcher.config.download_dir)
+        prefetcher.download_manager = downloads
+        for album_id in ("100", "200", "300"):
+            prefetcher.schedule(album_id, 0, 1, [{"user_id": "u"}])
+        await _drain(prefetcher)
+        for album_id in ("100", "200", "300"):
+            (downloads.root / album_id).mkdir()
+
+        prefetcher.claim(downloads.root / "200")  # 已被 /jmupdate 取用
+        downloads.in_use.add(downloads.root / "300")  # 仍在发送
+        for entry in prefetcher._prefetched.values():
+            entry["at"] = time.time() - 73 * 3600
+
+        assert await prefetcher.expire() == 1
+        assert not (downloads.root / "100").exists()
+        assert (downloads.root / "200").exists() and (downloads.root / "300").exists()
+        assert downloads.dropped == ["100"]
+
+        # 记录持久化：重启后仍会清理仍未取用的目录
+        reloaded, _ = _prefetcher(sample_plugin_config, data_dir, downloads)
+        assert list(reloaded._prefetched) == [str(downloads.root / "300")]
+        quota.close()
+
+    async def test_ttl_zero_never_expires(self, sample_plugin_config, data_dir):
+        downloads = _FakeDownloads()
+        prefetcher, quota = _prefetcher(
+            sample_plugin_config, data_dir, downloads, subscribe_prefetch_ttl_hours=0
+        )
+        prefetcher.schedule("100", 0, 1, [{"user_id": "u"}])
+        await _drain(prefetcher)
+        prefetcher._prefetched[str(Path("/tmp/100"))]["at"] = 0
+
+        assert await prefetcher.expire() == 0
+        assert prefetcher.stats()["pending"] == 1
+        quota.close()
+
+
+class TestDirectorySize:
+    """directory_size 测试"""
+
+    def test_excludes_top_level_dirs(self, temp_dir):
+        (temp_dir / "a").mkdir()
+        (temp_dir / "a" / "f").write_bytes(b"x" * 10)
+        (temp_dir / "pack_cache").mkdir()
+        (temp_dir / "pack_cache" / "big").write_bytes(b"x" * 100)
+
+        assert directory_size(temp_dir, ("pack_cache",)) == 10
+        assert directory_size(temp_dir) == 110
+        assert directory_size(temp_dir / "missing") == 0
+
+    def test_excludes_top_level_files(self, temp_dir):
+        (temp_dir / "a").mkdir()
+        (temp_dir / "a" / ".prefetch.json").write_bytes(b"x" * 10)
+        (temp_dir / ".prefetch.json").write_bytes(b"x" * 100)
+
+        # 只跳过顶层同名文件
+        assert directory_size(temp_dir, (".prefetch.json",)) == 10
+
+    def test_budget_counts_downloaded_content_only(self, temp_dir):
+        from core.prefetch import _EXCLUDED_ENTRIES
+
+        (temp_dir / "123").mkdir()
+        (temp_dir / "123" / "00001.jpg").write_bytes(b"x" * 10)
+        (temp_dir / ".manifests").mkdir()
+        (temp_dir / ".manifests" / "123.json").write_bytes(b"x" * 100)
+        (temp_dir / ".prefetch.json").write_bytes(b"x" * 100)
+        for name in ("pack_cache", "covers", "compressed_cache"):
+            (temp_dir / name).mkdir()
+            (temp_dir / name / "f").write_bytes(b"x" * 100)
+
+        assert directory_size(temp_dir, _EXCLUDED_ENTRIES) == 10
@@ -0,0 +1,76 @@
+"""
+下载进度事件流测试
+
+验证跨线程推送、订阅者合并积压事件、关闭后迭代结束以及百分比节流。
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.progress import ProgressEvent, ProgressStream, throttle_progress
+
+
+async def _collect(iterator) -> list:
+    return [event async for event in iterator]
+
+
+class TestProgressStream:
+    """进度流测试"""
+
+    @pytest.mark.asyncio
+    async def test_publish_from_worker_thread(self):
+        stream = ProgressStream()
+        consumer = asyncio.create_task(_collect(stream.subscribe()))
+        await asyncio.sleep(0)
+
+        def worker():
+            stream.publish(1, 2, "图片")
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0.01)
+        stream.close()
+
+        assert await consumer == [ProgressEvent(1, 2, "图片")]
+        assert stream.published == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_gets_latest_only(self):
+        stream = ProgressStream()
+        for done in range(1, 6):
+            stream.publish(done, 10, "图片")
+        await asyncio.sleep(0)
+
+        # 迟到的订阅者先收到最近一次事件
+        consumer = asyncio.create_task(_collect(stream.subscribe()))
+        await asyncio.sleep(0)
+        stream.close()
+
+        assert await consumer == [ProgressEvent(5, 10, "图片")]
+
+    @pytest.mark.asyncio
+    async def test_close_ends_idle_subscriber(self):
+        stream = ProgressStream()
+        consumer = asyncio.create_task(_collect(stream.subscribe()))
+        await asyncio.sleep(0)
+        stream.close()
+
+        assert await asyncio.wait_for(consumer, 1) == []
+
+
+class TestThrottleProgress:
+    """节流测试"""
+
+    @pytest.mark.asyncio
+    async def test_emits_once_per_bucket(self):
+        async def events():
+            for done in range(21):
+                yield ProgressEvent(done, 20, "图片")
+
+        emitted = await _collect(throttle_progress(events(), steps=4))
+
+        # 0 与 20（完成）不放行，其余每 25% 放行一次
+        assert [e.done for e in emitted] == [1, 5, 10, 15]
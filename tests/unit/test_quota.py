@@ -4,6 +4,7 @@
 重点验证原子预留（reserve）在并发下不会超发，以及 refund 回退。
 """
 
+import asyncio
 import threading
 
 from core.quota import DownloadQuotaManager
@@ -63,3 +64,35 @@ class TestQuotaRefund:
         qm = DownloadQuotaManager(data_dir / "q.db")
         qm.refund("u")  # 尚未预留也不应报错或变负
         assert qm.get_used_count("u") == 0
+
+
+class TestQuotaConnection:
+    """长连接与异步接口测试"""
+
+    def test_uses_wal_and_single_connection(self, data_dir):
+        qm = DownloadQuotaManager(data_dir / "q.db")
+        qm.reserve("u", 5)
+        first = qm._db.run(lambda conn: conn)
+        qm.get_used_count("u")
+        assert qm._db.run(lambda conn: conn) is first
+        mode = qm._db.run(lambda conn: conn.execute("PRAGMA journal_mode").fetchone())
+        assert mode[0] == "wal"
+        qm.close()
+
+    async def test_async_reserve_and_refund(self, data_dir):
+        qm = DownloadQuotaManager(data_dir / "q.db")
+        results = await asyncio.gather(*(qm.reserve_async("u", 3) for _ in range(6)))
+        assert [ok for ok, _, _ in results].count(True) == 3
+
+        await qm.refund_async("u")
+        assert qm.get_used_count("u") == 2
+        qm.close()
+
+    def test_persists_across_instances(self, data_dir):
+        qm = DownloadQuotaManager(data_dir / "q.db")
+        qm.reserve("u", 5)
+        qm.close()
+
+        reopened = DownloadQuotaManager(data_dir / "q.db")
+        assert reopened.get_used_count("u") == 1
+        reopened.close()
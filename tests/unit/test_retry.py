@@ -0,0 +1,122 @@
+"""
+失败重试测试
+
+验证退避时长、域名轮换，以及下载管理器只重试失败条目并遵守轮数与时限。
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from core.retry import backoff_delay, rotate_domains, rotate_host
+
+
+class TestRetryHelpers:
+    """退避与域名轮换"""
+
+    def test_backoff_doubles_and_caps(self):
+        assert backoff_delay(0) == 0
+        assert backoff_delay(1, base=2, cap=30) == 2
+        assert backoff_delay(3, base=2, cap=30) == 8
+        assert backoff_delay(10, base=2, cap=30) == 30
+
+    def test_rotate_domains(self):
+        domains = ["a", "b", "c"]
+        assert rotate_domains(domains, 1) == ["b", "c", "a"]
+        assert rotate_domains(domains, 3) == domains
+        assert rotate_domains([], 1) == []
+
+    def test_rotate_host(self):
+        domains = ["a.cc", "b.cc", "c.cc"]
+        url = "https://a.cc/media/photos/1/00001.webp?v=1"
+        url = rotate_host(url, domains)
+        assert url == "https://b.cc/media/photos/1/00001.webp?v=1"
+        assert rotate_host(url, domains).startswith("https://c.cc/")
+        assert rotate_host("https://c.cc/p.jpg", domains) == "https://a.cc/p.jpg"
+        assert rotate_host("https://x.cc/p.jpg", domains) == "https://a.cc/p.jpg"
+        assert rotate_host(url, []) == url
+
+
+class _FakeImage:
+    def __init__(self, url: str):
+        self.img_url = url
+        self.from_photo = SimpleNamespace(photo_id="1")
+
+
+class _FlakyDownloader:
+    """前 fail_times 次下载图片失败的下载器替身"""
+
+    def __init__(self, images, fail_times: int):
+        self.client = "client"
+        self.manifest = None
+        self.download_failed_photo = []
+        self.download_failed_image = [(img, RuntimeError("boom")) for img in images]
+        self.fail_times = fail_times
+        self.attempted_urls = []
+
+    @property
+    def has_download_failures(self):
+        return bool(self.download_failed_photo or self.download_failed_image)
+
+    def download_by_image_detail(self, image):
+        self.attempted_urls.append(image.img_url)
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            self.download_failed_image.append((image, RuntimeError("boom")))
+            raise RuntimeError("boom")
+
+
+class TestRetryFailures:
+    """JMDownloadManager._retry_failures"""
+
+    @pytest.fixture
+    def manager(self, config_manager, monkeypatch):
+        from core import downloader as downloader_module
+        from core.downloader import JMDownloadManager
+
+        monkeypatch.setattr(downloader_module.time, "sleep", lambda _s: None)
+        return JMDownloadManager(config_manager)
+
+    @staticmethod
+    def _jmcomic(domains):
+        return SimpleNamespace(
+            JmModuleConfig=SimpleNamespace(DOMAIN_IMAGE_LIST=domains)
+        )
+
+    def test_retries_only_failed_with_rotation(self, manager):
+        image = _FakeImage("https://a.cc/1.jpg")
+        downloader = _FlakyDownloader([image], fail_times=1)
+
+        elapsed = manager._retry_failures(
+            self._jmcomic(["a.cc", "b.cc"]), downloader, option=None
+        )
+
+        assert elapsed >= 0
+        assert downloader.attempted_urls == ["https://b.cc/1.jpg", "https://a.cc/1.jpg"]
+        assert downloader.download_failed_image == []
+        assert downloader.client == "client"
+
+    def test_gives_up_after_rounds(self, manager, config_manager):
+        config_manager.plugin_config["download_retry_rounds"] = 2
+        downloader = _FlakyDownloader([_FakeImage("https://a.cc/1.jpg")], 99)
+
+        manager._retry_failures(self._jmcomic([]), downloader, option=None)
+
+        assert len(downloader.attempted_urls) == 2
+        assert len(downloader.download_failed_image) == 1
+
+    def test_deadline_stops_retry(self, manager, config_manager):
+        config_manager.plugin_config["download_retry_deadline"] = 0
+        downloader = _FlakyDownloader([_FakeImage("https://a.cc/1.jpg")], 99)
+
+        manager._retry_failures(self._jmcomic([]), downloader, option=None)
+
+        assert downloader.attempted_urls == []
+        assert len(downloader.download_failed_image) == 1
+
+    def test_disabled(self, manager, config_manager):
+        config_manager.plugin_config["download_retry_rounds"] = 0
+        downloader = _FlakyDownloader([_FakeImage("https://a.cc/1.jpg")], 0)
+
+        assert manager._retry_failures(self._jmcomic([]), downloader, None) == 0
+        assert downloader.attempted_urls == []
@@ -0,0 +1,119 @@
+"""
+订阅管理器测试
+
+验证同步与异步接口读写同一份数据，以及批量回写章节数。
+"""
+
+import asyncio
+import sqlite3
+
+from core.subscribe import SubscriptionManager
+
+
+class TestSubscriptionManager:
+    """SubscriptionManager 测试"""
+
+    def test_add_exists_remove(self, data_dir):
+        sm = SubscriptionManager(data_dir / "sub.db")
+        assert sm.add("umo1", "123", "u1", "标题", 5) is True
+        assert sm.exists("umo1", "123")
+        assert sm.get_last_count("umo1", "123") == 5
+        assert sm.list_for("umo1") == [
+            {"album_id": "123", "title": "标题", "last_count": 5}
+        ]
+
+        assert sm.remove("umo1", "123") is True
+        assert sm.remove("umo1", "123") is False
+        assert sm.get_last_count("umo1", "123") is None
+        sm.close()
+
+    async def test_async_interface(self, data_dir):
+        sm = SubscriptionManager(data_dir / "sub.db")
+        assert await sm.add_async("umo1", "123", "u1", "A", 1)
+        assert await sm.add_async("umo2", "123", "u2", "A", 1)
+        assert await sm.exists_async("umo2", "123")
+
+        await asyncio.gather(
+            sm.update_count_async("umo1", "123", 3),
+            sm.update_count_async("umo2", "123", 4),
+            # 未订阅的记录不受影响
+            sm.update_count_async("umo3", "123", 9),
+        )
+
+        subs = {s["umo"]: s["last_count"] for s in await sm.list_all_async()}
+        assert subs == {"umo1": 3, "umo2": 4}
+        assert await sm.get_last_count_async("umo3", "123") is None
+        assert await sm.remove_async("umo1", "123")
+        assert await sm.list_for_async("umo1") == []
+        sm.close()
+
+    async def test_notified_count_separate_from_last_count(self, data_dir):
+        sm = SubscriptionManager(data_dir / "sub.db")
+        sm.add("umo1", "123", "u1", "A", 2)
+
+        await sm.mark_notified_async("umo1", "123", 5)
+        [sub] = await sm.list_all_async()
+        assert (sub["last_count"], sub["notified_count"]) == (2, 5)
+
+        # 下载到更少章节时不回退已通知数；下载超过时一并推进
+        await sm.update_count_async("umo1", "123", 4)
+        [sub] = await sm.list_all_async()
+        assert (sub["last_count"], sub["notified_count"]) == (4, 5)
+        await sm.update_count_async("umo1", "123", 6)
+        [sub] = await sm.list_all_async()
+        assert (sub["last_count"], sub["notified_count"]) == (6, 6)
+        sm.close()
+
+    def test_migrates_old_table(self, data_dir):
+        conn = sqlite3.connect(data_dir / "sub.db")
+        conn.execute(
+            "CREATE TABLE subscriptions (umo TEXT NOT NULL, album_id TEXT NOT NULL,"
+            " user_id TEXT, title TEXT, last_count INTEGER DEFAULT 0,"
+            " PRIMARY KEY (umo, album_id))"
+        )
+        conn.execute("INSERT INTO subscriptions VALUES ('umo1', '123', 'u1', 'A', 3)")
+        conn.commit()
+        conn.close()
+
+        sm = SubscriptionManager(data_dir / "sub.db")
+        [sub] = sm.list_all()
+        assert (sub["last_count"], sub["notified_count"]) == (3, 0)
+        sm.close()
+
+    def test_persists_across_instances(self, data_dir):
+        sm = SubscriptionManager(data_dir / "sub.db")
+        sm.add("umo1", "123", "u1", "A", 2)
+        sm.update_count("umo1", "123", 7)
+        sm.close()
+
+        reopened = SubscriptionManager(data_dir / "sub.db")
+        assert reopened.get_last_count("umo1", "123") == 7
+        reopened.close()
+
+    async def test_fingerprints_and_meta(self, data_dir):
+        sm = SubscriptionManager(data_dir / "sub.db")
+        assert await sm.get_fingerprints_async(["1"]) == {}
+        await sm.put_fingerprint_async(
+            "1",
+            {
+                "update_date": "2026-01-01",
+                "chapters_hash": "abc",
+                "photo_count": 3,
+                "checked_at": 100.0,
+            },
+        )
+        fingerprints = await sm.get_fingerprints_async(["1", "2"])
+        assert fingerprints == {
+            "1": {
+                "update_date": "2026-01-01",
+                "chapters_hash": "abc",
+                "photo_count": 3,
+                "checked_at": 100.0,
+            }
+        }
+
+        assert await sm.get_meta_async("k") is None
+        await sm.set_meta_async("k", "v1")
+        await sm.set_meta_async("k", "v2")
+        assert await sm.get_meta_async("k") == "v2"
+        sm.close()
@@ -0,0 +1,442 @@
+"""
+订阅更新检查测试
+
+使用真实 SubscriptionManager 与假详情/通知函数，验证按本子去重、并发上限、
+限速与通知分发。
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+from core.subscribe import SubscriptionManager
+from core.subscribe_checker import (
+    SubscriptionChecker,
+    TokenBucket,
+    album_fingerprint,
+    changed_before_watermark,
+    next_due_time,
+    schedule_phase,
+)
+
+
+class _FakeSource:
+    """假详情源：记录请求并统计最大并发"""
+
+    def __init__(self, counts: dict[str, int], fail: set[str] = frozenset()):
+        self.counts = counts
+        self.fail = fail
+        self.calls: list[str] = []
+        self.active = 0
+        self.peak = 0
+
+    async def fetch(self, album_id: str) -> dict | None:
+        self.calls.append(album_id)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if album_id in self.fail:
+                raise ConnectionError("boom")
+            count = self.counts[album_id]
+            return {
+                "title": f"T{album_id}",
+                "photo_count": count,
+                "photo_ids": [f"{album_id}-{i}" for i in range(count)],
+            }
+        finally:
+            self.active -= 1
+
+
+class _Notifier:
+    def __init__(self):
+        self.sent: list[tuple] = []
+
+    async def __call__(self, umo, album_id, title, last, current):
+        self.sent.append((umo, album_id, last, current))
+
+
+def _manager(data_dir, rows):
+    sm = SubscriptionManager(data_dir / "sub.db")
+    for umo, album_id, count in rows:
+        sm.add(umo, album_id, "u", "", count)
+    return sm
+
+
+class TestSubscriptionChecker:
+    """SubscriptionChecker 测试"""
+
+    async def test_dedupes_albums_and_fans_out(self, data_dir):
+        sm = _manager(
+            data_dir,
+            [("g1", "100", 3), ("g2", "100", 3), ("g3", "100", 5), ("g1", "200", 2)],
+        )
+        source = _FakeSource({"100": 5, "200": 2})
+        notifier = _Notifier()
+        checker = SubscriptionChecker(
+            sm, source.fetch, notifier, concurrency=4, rate_per_minute=0
+        )
+
+        cycle = await checker.check_once()
+
+        assert sorted(source.calls) == ["100", "200"]
+        assert sorted(notifier.sent) == [("g1", "100", 3, 5), ("g2", "100", 3, 5)]
+        assert cycle.subscriptions == 4 and cycle.albums == 2
+        assert cycle.updated == 1 and cycle.notified == 2
+        # 通知只推进已通知章节数，/jmupdate 仍从已下载的章节数开始
+        assert await sm.get_last_count_async("g2", "100") == 3
+        notified = {
+            (s["umo"], s["album_id"]): s["notified_count"]
+            for s in await sm.list_all_async()
+        }
+        assert notified[("g2", "100")] == 5
+
+        # 同一章节数不重复通知
+        await checker.check_once()
+        assert len(notifier.sent) == 2
+        sm.close()
+
+    async def test_bounded_concurrency_and_failures(self, data_dir):
+        rows = [(f"g{i}", str(i), 1) for i in range(12)]
+        sm = _manager(data_dir, rows)
+        source = _FakeSource({str(i): 1 for i in range(12)}, fail={"3", "7"})
+        checker = SubscriptionChecker(
+            sm, source.fetch, _Notifier(), concurrency=3, rate_per_minute=0
+        )
+
+        cycle = await checker.check_once()
+
+        assert source.peak <= 3
+        assert cycle.failed == 2 and cycle.fetched == 10
+        assert checker.stats()["cycles"] == 1
+        sm.close()
+
+    async def test_on_update_receives_min_last(self, data_dir):
+        sm = _manager(data_dir, [("g1", "100", 3), ("g2", "100", 4), ("g1", "200", 2)])
+        updates = []
+        checker = SubscriptionChecker(
+            sm,
+            _FakeSource({"100": 6, "200": 2}).fetch,
+            _Notifier(),
+            rate_per_minute=0,
+            on_update=lambda *args: updates.append(args),
+        )
+
+        await checker.check_once()
+
+        assert len(updates) == 1
+        album_id, last, current, rows = updates[0]
+        assert (album_id, last, current) == ("100", 3, 6)
+        assert sorted(row["umo"] for row in rows) == ["g1", "g2"]
+        sm.close()
+
+    async def test_stats_none_before_first_cycle(self, data_dir):
+        sm = _manager(data_dir, [])
+        checker = SubscriptionChecker(sm, _FakeSource({}).fetch, _Notifier())
+        assert checker.stats() is None
+        sm.close()
+
+
+class _FakeLatest:
+    """假“最新”列表：每页 page_size 个ID"""
+
+    def __init__(self, listing: list[str], page_size: int = 5):
+        self.listing = listing
+        self.page_size = page_size
+        self.pages: list[int] = []
+
+    async def fetch(self, page: int) -> list[str]:
+        self.pages.append(page)
+        start = (page - 1) * self.page_size
+        return self.listing[start : start + self.page_size]
+
+
+class TestChangeDetection:
+    """基于“最新”列表与指纹的变化检测测试"""
+
+    def test_watermark_found(self):
+        watermark = ["a", "b", "c", "d"]
+        assert changed_before_watermark(["x", "y", "a", "b", "c"], watermark) == [
+            "x",
+            "y",
+        ]
+
+    def test_updated_watermark_album_does_not_end_scan(self):
+        # c 在上一轮之后又更新，跳到了前部；a、b、d 仍保持原有先后
+        watermark = ["a", "b", "c", "d"]
+        listing = ["c", "x", "a", "b", "d"]
+        assert changed_before_watermark(listing, watermark) == ["c", "x"]
+
+    def test_watermark_missing(self):
+        assert changed_before_watermark(["x", "y", "z"], ["a", "b", "c"]) is None
+        assert changed_before_watermark(["x"], []) is None
+
+    def test_fingerprint(self):
+        fp = album_fingerprint(
+            {"update_date": "2026-01-01", "photo_count": 2, "photo_ids": ["1", "2"]}
+        )
+        assert fp["photo_count"] == 2 and fp["update_date"] == "2026-01-01"
+        other = album_fingerprint(
+            {"update_date": "2026-01-01", "photo_count": 2, "photo_ids": ["1", "3"]}
+        )
+        assert fp["chapters_hash"] != other["chapters_hash"]
+
+    async def test_only_listed_albums_are_fetched(self, data_dir):
+        rows = [(f"g{i}", str(i), 1) for i in range(10)]
+        sm = _manager(data_dir, rows)
+        source = _FakeSource({str(i): 1 for i in range(10)})
+        latest = _FakeLatest([f"other{i}" for i in range(8)])
+        checker = SubscriptionChecker(
+            sm,
+            source.fetch,
+            _Notifier(),
+            rate_per_minute=0,
+            fetch_latest=latest.fetch,
+            latest_pages=3,
+        )
+
+        # 首轮没有水位线：全量检查并记录指纹
+        first = await checker.check_once()
+        assert first.fetched == 10 and first.skipped == 0
+        fingerprints = await sm.get_fingerprints_async([str(i) for i in range(10)])
+        assert len(fingerprints) == 10
+
+        # 之后本子 3、7 有更新，排到列表前部
+        source.calls.clear()
+        source.counts["3"] = 2
+        latest.listing = ["3", "7"] + latest.listing
+        notifier = _Notifier()
+        checker.notify = notifier
+        second = await checker.check_once()
+
+        assert sorted(source.calls) == ["3", "7"]
+        assert second.skipped == 8 and second.listing_requests == 1
+        assert notifier.sent == [("g3", "3", 1, 2)]
+        sm.close()
+
+    async def test_overflowing_listing_falls_back_to_full_check(self, data_dir):
+        sm = _manager(data_dir, [("g1", "1", 1), ("g2", "2", 1)])
+        source = _FakeSource({"1": 1, "2": 1})
+        latest = _FakeLatest([f"old{i}" for i in range(5)], page_size=2)
+        checker = SubscriptionChecker(
+            sm,
+            source.fetch,
+            _Notifier(),
+            rate_per_minute=0,
+            fetch_latest=latest.fetch,
+            latest_pages=2,
+        )
+        await checker.check_once()
+
+        # 新更新超过两页，找不到水位线
+        latest.listing = [f"new{i}" for i in range(6)] + latest.listing
+        latest.pages.clear()
+        source.calls.clear()
+        cycle = await checker.check_once()
+
+        assert latest.pages == [1, 2]
+        assert sorted(source.calls) == ["1", "2"] and cycle.skipped == 0
+        sm.close()
+
+    async def test_stale_fingerprint_is_refetched(self, data_dir):
+        sm = _manager(data_dir, [("g1", "1", 1), ("g2", "2", 1)])
+        source = _FakeSource({"1": 1, "2": 1})
+        latest = _FakeLatest(["a", "b", "c"])
+        checker = SubscriptionChecker(
+            sm,
+            source.fetch,
+            _Notifier(),
+            rate_per_minute=0,
+            fetch_latest=latest.fetch,
+        )
+        await checker.check_once()
+        await sm.put_fingerprint_async("2", {"photo_count": 1, "checked_at": 0})
+
+        source.calls.clear()
+        await checker.check_once()
+        assert source.calls == ["2"]
+        sm.close()
+
+
+class TestShardedSchedule:
+    """分片调度测试"""
+
+    def test_phase_spreads_across_interval(self):
+        phases = [schedule_phase(str(i), 3600) for i in range(1000)]
+        assert all(0 <= p < 3600 for p in phases)
+        # 每个十分之一间隔都分到了本子
+        buckets = {int(p // 360) for p in phases}
+        assert buckets == set(range(10))
+        assert schedule_phase("42", 3600) == schedule_phase("42", 3600)
+
+    def test_next_due_time(self):
+        # 正常到期：顺延一个间隔
+        assert next_due_time("1", 1000.0, 1005.0, 100) == 1100.0
+        # 提前检查：保留原到期时间
+        assert next_due_time("1", 2000.0, 1005.0, 100) == 2000.0
+        # 停机较久：重新分布到下一个间隔内
+        nxt = next_due_time("1", 100.0, 5000.0, 100)
+        assert 5000.0 <= nxt < 5100.0
+        # 抖动按间隔比例
+        assert next_due_time("1", 1000.0, 1005.0, 100, jitter=0.05) == 1105.0
+
+    async def test_only_due_albums_checked_and_rescheduled(self, data_dir):
+        rows = [(f"g{i}", str(i), 1) for i in range(6)]
+        sm = _manager(data_dir, rows)
+        source = _FakeSource({str(i): 1 for i in range(6)})
+        checker = SubscriptionChecker(sm, source.fetch, _Notifier(), rate_per_minute=0)
+        interval = 3600
+
+        # 首次运行：为所有本子分配相位并持久化，相位未到的本子不检查
+        first = await checker.run_due(interval)
+        schedule = await sm.get_schedule_async([str(i) for i in range(6)])
+        assert len(schedule) == 6
+        assert first.due == len(source.calls)
+
+        # 两个本子到期
+        source.calls.clear()
+        await sm.set_schedule_async("2", time.time() - 1)
+        await sm.set_schedule_async("4", time.time() - 1)
+        cycle = await checker.run_due(interval)
+
+        assert sorted(source.calls) == ["2", "4"] and cycle.due == 2
+        schedule = await sm.get_schedule_async(["2", "4"])
+        assert all(due > time.time() for due in schedule.values())
+        sm.close()
+
+    async def test_schedule_written_in_batches(self, data_dir):
+        rows = [(f"g{i}", str(i), 1) for i in range(20)]
+        sm = _manager(data_dir, rows)
+        source = _FakeSource({str(i): 1 for i in range(20)})
+        checker = SubscriptionChecker(sm, source.fetch, _Notifier(), rate_per_minute=0)
+
+        with (
+            patch.object(
+                sm, "set_schedules_async", wraps=sm.set_schedules_async
+            ) as batch,
+            patch.object(sm, "set_schedule_async") as single,
+        ):
+            await checker.run_due(3600)
+
+        # 分配相位与检查后回写各一次批量写入，不逐本子 await
+        assert batch.call_count == 2
+        assert len(batch.call_args_list[0].args[0]) == 20
+        single.assert_not_called()
+        schedule = await sm.get_schedule_async([str(i) for i in range(20)])
+        assert len(schedule) == 20
+        sm.close()
+
+    async def test_long_downtime_rephases_instead_of_herd(self, data_dir):
+        rows = [(f"g{i}", str(i), 1) for i in range(50)]
+        sm = _manager(data_dir, rows)
+        for i in range(50):
+            await sm.set_schedule_async(str(i), time.time() - 3 * 3600)
+        source = _FakeSource({str(i): 1 for i in range(50)})
+        checker = SubscriptionChecker(sm, source.fetch, _Notifier(), rate_per_minute=0)
+
+        cycle = await checker.run_due(3600)
+
+        # 全部按相位重新分布，只有相位恰好落在当下的本子会被检查
+        assert cycle.rephased == 50
+        assert cycle.due == len(source.calls) < 10
+        schedule = await sm.get_schedule_async([str(i) for i in range(50)])
+        assert all(due > time.time() - 3600 for due in schedule.values())
+        sm.close()
+
+    async def test_due_albums_capped_per_tick(self, data_dir):
+        rows = [(f"g{i}", str(i), 1) for i in range(100)]
+        sm = _manager(data_dir, rows)
+        for i in range(100):
+            await sm.set_schedule_async(str(i), time.time() - 60 - i)
+        source = _FakeSource({str(i): 1 for i in range(100)})
+        checker = SubscriptionChecker(
+            sm, source.fetch, _Notifier(), concurrency=2, rate_per_minute=0
+        )
+
+        # 间隔 3600s、tick 60s：期望每 tick 约 2 本，上限 2 倍即 4 本
+        cycle = await checker.run_due(3600)
+        assert cycle.due == 4 and cycle.deferred == 96
+        # 到期最早的先检查
+        assert sorted(source.calls) == ["96", "97", "98", "99"]
+        sm.close()
+
+    async def test_schedule_survives_restart(self, data_dir):
+        sm = _manager(data_dir, [("g1", "1", 1)])
+        await SubscriptionChecker(
+            sm, _FakeSource({"1": 1}).fetch, _Notifier(), rate_per_minute=0
+        ).run_due(3600)
+        await sm.set_schedule_async("1", time.time() + 1800)
+        sm.close()
+
+        reopened = SubscriptionManager(data_dir / "sub.db")
+        source = _FakeSource({"1": 1})
+        cycle = await SubscriptionChecker(
+            reopened, source.fetch, _Notifier(), rate_per_minute=0
+        ).run_due(3600)
+        # 重启后沿用到期时间，不会立即全量检查
+        assert cycle.due == 0 and source.calls == []
+        reopened.close()
+
+    async def test_flagged_albums_checked_early(self, data_dir):
+        sm = _manager(data_dir, [("g1", "1", 1), ("g2", "2", 1)])
+        source = _FakeSource({"1": 1, "2": 1})
+        latest = _FakeLatest(["a", "b", "c"])
+        checker = SubscriptionChecker(
+            sm,
+            source.fetch,
+            _Notifier(),
+            rate_per_minute=0,
+            fetch_latest=latest.fetch,
+        )
+        # 建立水位线与指纹
+        await checker.check_once()
+        future = time.time() + 3000
+        await sm.set_schedule_async("1", future)
+        await sm.set_schedule_async("2", future)
+
+        source.counts["2"] = 2
+        latest.listing = ["2"] + latest.listing
+        source.calls.clear()
+        checker._last_listing_at = None  # 本轮翻列表
+        cycle = await checker.run_due(3600)
+
+        assert source.calls == ["2"] and cycle.updated == 1
+        # 提前检查后保留原到期时间
+        assert (await sm.get_schedule_async(["2"]))["2"] == future
+        sm.close()
+
+    async def test_failed_flagged_album_backs_off(self, data_dir):
+        sm = _manager(data_dir, [("g1", "1", 1)])
+        source = _FakeSource({"1": 1}, fail={"1"})
+        checker = SubscriptionChecker(sm, source.fetch, _Notifier(), rate_per_minute=0)
+        await sm.set_schedule_async("1", time.time() + 3000)
+        checker._last_listing_at = time.time()  # 本测试不翻列表
+        checker._flagged["1"] = time.time()
+
+        first = await checker.run_due(3600)
+        second = await checker.run_due(3600)
+
+        # 拉取失败后保留标记，但一个间隔内不再每个 tick 重试
+        assert first.failed == 1 and second.due == 0
+        assert source.calls == ["1"]
+        assert "1" in checker._flagged
+        sm.close()
+
+
+class TestTokenBucket:
+    """令牌桶测试"""
+
+    async def test_limits_rate_after_burst(self):
+        bucket = TokenBucket(rate=50, burst=2)
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        # 前 2 个立即取得，其余 3 个按 50/s 补充，至少约 60ms
+        assert time.monotonic() - started >= 0.05
+
+    async def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        started = time.monotonic()
+        for _ in range(100):
+            await bucket.acquire()
+        assert time.monotonic() - started < 0.05
@@ -4,10 +4,11 @@ JM-Cosmos II 工具模块
 
 from .filename import generate_album_filename
 from .formatter import MessageFormatter
-from .recall import send_with_recall
+from .recall import configure_compressed_cache, send_with_recall
 
 __all__ = [
     "MessageFormatter",
     "send_with_recall",
+    "configure_compressed_cache",
     "generate_album_filename",
 ]
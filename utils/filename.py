@@ -10,6 +10,7 @@ def generate_album_filename(
     password: str = "",
     chapter_idx: int | None = None,
     show_password: bool = False,
+    copy_index: int = 0,
 ) -> str:
     """
     生成下载文件名
@@ -19,6 +20,7 @@ def generate_album_filename(
         password: 打包密码
         chapter_idx: 章节序号 (仅章节下载时传入)
         show_password: 是否显示密码提示
+        copy_index: 同一次下载的第几个副本（>0 时追加 _N，避免并发打包同名覆盖）
 
     Returns:
         生成的文件名 (不含扩展名)
@@ -31,6 +33,10 @@ def generate_album_filename(
     else:
         name = f"{album_id}_{timestamp}"
 
+    # 共享下载的后加入者：追加副本序号
+    if copy_index:
+        name += f"_{copy_index}"
+
     # 可选：添加密码提示
     if show_password and password:
         name += f"#PW{password}"
@@ -325,13 +325,14 @@ day(今日) week(本周) month(本月) all(全部)
         return "\n".join(lines)
 
     @staticmethod
-    def format_download_result(result, pack_result=None) -> str:
+    def format_download_result(result, pack_result=None, cached: bool = False) -> str:
         """
         格式化下载结果
 
         Args:
             result: DownloadResult 实例
             pack_result: PackResult 实例（可选）
+            cached: 是否直接发送的缓存产物（跳过了下载与打包）
 
         Returns:
             格式化后的字符串
@@ -373,14 +374,35 @@ day(今日) week(本周) month(本月) all(全部)
                     lines.append("📁 已保存到本地下载目录（未发送）")
                 elif pack_result.encrypted:
                     lines.append("🔐 已加密")
+
+                volume_total = getattr(pack_result, "volume_total", 0)
+                if volume_total:
+                    lines.append(f"🗂️ 分卷: 共 {volume_total} 卷（各卷可单独解压）")
             else:
                 # 打包失败时提示用户
                 lines.append(f"⚠️ 打包失败: {pack_result.error_message or '未知错误'}")
 
+        if cached:
+            lines.append("♻️ 命中缓存，跳过下载与打包")
+
         lines.append("━━━━━━━━━━━━━━━━━━━━━")
 
         return "\n".join(lines)
 
+    @staticmethod
+    def format_volume_caption(index: int, total: int) -> str:
+        """
+        格式化分卷文件的说明文字
+
+        Args:
+            index: 卷序号（从1开始）
+            total: 总卷数
+
+        Returns:
+            格式化后的字符串
+        """
+        return f"📦 分卷 {index}/{total}"
+
     @staticmethod
     def format_download_progress(
         status: str, current: int, total: int, unit: str = ""
@@ -407,6 +429,20 @@ day(今日) week(本周) month(本月) all(全部)
         else:
             return f"⏳ {status}..."
 
+    @staticmethod
+    def format_queue_position(position: int, total: int) -> str:
+        """
+        格式化下载排队提示
+
+        Args:
+            position: 当前任务的排队位置（从1开始）
+            total: 排队任务总数
+
+        Returns:
+            格式化后的字符串
+        """
+        return f"🕒 下载任务排队中：第 {position} 位（共 {total} 个排队）"
+
     @staticmethod
     def format_help() -> str:
         """
@@ -429,7 +465,7 @@ day(今日) week(本周) month(本月) all(全部)
 【账号命令】
 /jmlogin <用户名> <密码> - 登录JM账号
 /jmlogout   - 登出账号
-/jmstatus   - 查看登录状态
+/jmstatus   - 查看登录与运行状态
 /jmfav      - 查看我的收藏（add/del 收藏或取消，需登录）
 
 【订阅命令】
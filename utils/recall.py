@@ -5,16 +5,36 @@
 """
 
 import asyncio
+import tempfile
 from pathlib import Path
 
 import astrbot.api.message_components as Comp
 from astrbot.api import logger
 from astrbot.api.event import AstrMessageEvent, MessageChain
 
+from ..core.cover_cache import COMPRESS_QUALITY, compressed_variant
+from ..core.image_cache import CompressedImageCache
 
-def _compress_image(image_path: str, quality: int = 60) -> str | None:
+# 压缩图片缓存默认字节上限
+_COMPRESSED_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# 压缩结果缓存（插件初始化时通过 configure_compressed_cache 放到下载目录下）
+_compressed_cache = CompressedImageCache(
+    Path(tempfile.gettempdir()) / "jm_cosmos_compressed", _COMPRESSED_CACHE_MAX_BYTES
+)
+
+
+def configure_compressed_cache(
+    cache_dir: Path, max_bytes: int = _COMPRESSED_CACHE_MAX_BYTES
+) -> None:
+    """设置压缩图片缓存的目录与字节上限"""
+    global _compressed_cache
+    _compressed_cache = CompressedImageCache(cache_dir, max_bytes)
+
+
+def _compress_image(image_path: str, quality: int = COMPRESS_QUALITY) -> str | None:
     """
-    压缩图片以减小文件大小
+    压缩图片以减小文件大小（结果按内容键缓存，重复压缩直接命中）
 
     Args:
         image_path: 原始图片路径
@@ -23,45 +43,22 @@ def _compress_image(image_path: str, quality: int = 60) -> str | None:
     Returns:
         压缩后的图片路径，失败返回 None
     """
-    try:
-        import time
-
-        from PIL import Image
-
-        path = Path(image_path)
-        if not path.exists():
-            return None
-
-        # 生成唯一的压缩文件名（使用时间戳避免缓存问题）
-        timestamp = int(time.time() * 1000)
-        compressed_path = path.parent / f"{path.stem}_compressed_{timestamp}.jpg"
-
-        with Image.open(path) as img:
-            # 转换为 RGB（处理 RGBA 等格式）
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-
-            # 如果图片太大，先缩小尺寸
-            max_size = 1024
-            if img.width > max_size or img.height > max_size:
-                ratio = min(max_size / img.width, max_size / img.height)
-                new_size = (int(img.width * ratio), int(img.height * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-            # 保存压缩后的图片
-            img.save(str(compressed_path), "JPEG", quality=quality, optimize=True)
-
-        logger.debug(
-            f"图片已压缩: {path.stat().st_size} -> {compressed_path.stat().st_size} bytes"
-        )
-        return str(compressed_path)
+    path = Path(image_path)
+    # 封面缓存已预生成压缩版本时直接复用
+    if quality == COMPRESS_QUALITY:
+        variant = compressed_variant(path)
+        if variant is not None:
+            return str(variant)
 
+    try:
+        compressed_path = _compressed_cache.get(path, quality)
     except ImportError:
         logger.warning("PIL 未安装，无法压缩图片")
         return None
     except Exception as e:
         logger.warning(f"压缩图片失败: {e}")
         return None
+    return str(compressed_path) if compressed_path else None
 
 
 def _get_text_only_chain(message_chain: MessageChain) -> MessageChain | None:
@@ -86,19 +83,17 @@ def _get_text_only_chain(message_chain: MessageChain) -> MessageChain | None:
     return None
 
 
-def _get_compressed_message_chain(
+async def _get_compressed_message_chain(
     message_chain: MessageChain,
-) -> tuple[MessageChain | None, list[str]]:
+) -> MessageChain | None:
     """
-    尝试压缩消息链中的图片
+    尝试压缩消息链中的图片（压缩在线程中进行，不阻塞事件循环）
 
     Returns:
-        (压缩后的消息链, 需要清理的临时文件列表)
-        如果没有图片或压缩失败返回 (None, [])
+        压缩后的消息链，如果没有图片或压缩失败返回 None
     """
     new_chain = []
     has_compressed = False
-    temp_files = []
 
     for comp in message_chain.chain:
         if isinstance(comp, Comp.Image):
@@ -107,27 +102,19 @@ def _get_compressed_message_chain(
             if image_path and not str(image_path).startswith(
                 ("http://", "https://", "base64://")
             ):
-                compressed_path = _compress_image(str(image_path))
+                compressed_path = await asyncio.to_thread(
+                    _compress_image, str(image_path)
+                )
                 if compressed_path:
                     new_chain.append(Comp.Image(file=compressed_path))
-                    temp_files.append(compressed_path)
                     has_compressed = True
                     continue
 
         new_chain.append(comp)
 
     if has_compressed:
-        return MessageChain(new_chain), temp_files
-    return None, []
-
-
-def _cleanup_temp_files(file_paths: list[str]) -> None:
-    """清理临时文件"""
-    for path in file_paths:
-        try:
-            Path(path).unlink(missing_ok=True)
-        except Exception:
-            pass
+        return MessageChain(new_chain)
+    return None
 
 
 async def send_with_recall(
@@ -205,7 +192,6 @@ async def send_with_recall(
     except Exception as e:
         error_str = str(e)
         is_timeout = "Timeout" in error_str or "timeout" in error_str.lower()
-        temp_files = []
 
         # NapCat/NTQQ 的 sendMsg 超时常伴随 EventRet result:0：底层其实已经发出，
         # 只是客户端没在超时窗口内收到回执。此时重发只会产生重复消息（封面/文件被
@@ -220,7 +206,7 @@ async def send_with_recall(
             logger.warning(f"发送超时，尝试压缩图片后重试: {e}")
 
             # 第一次回退：尝试压缩图片
-            compressed_chain, temp_files = _get_compressed_message_chain(message_chain)
+            compressed_chain = await _get_compressed_message_chain(message_chain)
             if compressed_chain:
                 try:
                     result = await do_send(compressed_chain)
@@ -233,11 +219,9 @@ async def send_with_recall(
                         logger.info(
                             f"压缩后发送成功，已安排消息 {message_id} 在 {delay} 秒后撤回"
                         )
-                    _cleanup_temp_files(temp_files)
                     return
                 except Exception as retry_e:
                     logger.warning(f"压缩后发送仍失败: {retry_e}")
-                    _cleanup_temp_files(temp_files)
 
             # 第二次回退：只发送文字（不带图片）
             text_only_chain = _get_text_only_chain(message_chain)